@@ -5,13 +5,28 @@ import argparse
 import csv
 import os
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from ingestion.manifest import (
+    MANIFEST_NAME,
+    ManifestBuilder,
+    is_unchanged,
+    part_manifest_name,
+    update_manifest,
+)
+from ingestion.response_cache import ResponseCache
+from ingestion.throttle import AdaptiveThrottle, CircuitBreaker, parse_retry_after
+from transform.contract import BRONZE_HEADER
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -26,12 +41,31 @@ load_dotenv(REPO_ROOT / ".env")
 @dataclass(frozen=True)
 class Config:
     api_key: str
+    api_base_url: str = "https://api.travelpayouts.com"
     currency: str = "usd"
     market: str = "us"
     days_ahead: int = 150
     timeout_sec: int = 15
     max_retries: int = 3
-    sleep_between_calls_sec: float = 0.2
+
+    # One shared throttle for the whole run (replaces a fixed per-call sleep):
+    # requests/sec budget + AIMD in-flight limit capped at `concurrency`
+    requests_per_sec: float = 5.0
+    concurrency: int = 1
+    breaker_failures: int = 5
+    breaker_reset_sec: float = 60.0
+
+    # Multi-node collection: this process owns routes where shard_of(route) == shard_index
+    shard_index: int = 0
+    shard_count: int = 1
+
+    # Bronze file format: "csv" (fares.csv) or "parquet" (fares.parquet)
+    output_format: str = "csv"
+
+    # Optional on-disk response cache for same-day reruns (None = disabled)
+    cache_dir: Optional[str] = None
+    cache_ttl_sec: float = 6 * 3600
+    cache_max_bytes: int = 256 * 1024 * 1024
 
     # ✅ Prefer AIRPORT IATA codes (more reliable than city codes like TYO)
     origins: Tuple[str, ...] = ("JFK", "LAX", "SFO", "ATL", "ORD")
@@ -44,6 +78,22 @@ def utc_now_iso_z() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
+def parse_shard(s: str) -> Tuple[int, int]:
+    """'i/N' -> (i, N), 0-based shard index."""
+    try:
+        i, n = (int(x) for x in s.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"--shard must look like i/N (got {s!r})")
+    if n < 1 or not 0 <= i < n:
+        raise argparse.ArgumentTypeError(f"--shard needs 0 <= i < N (got {s!r})")
+    return i, n
+
+
+def shard_of(origin: str, dest: str, shard_count: int) -> int:
+    """Stable across processes/hosts (unlike hash(), which is salted per process)."""
+    return zlib.crc32(f"{origin}-{dest}".encode("ascii")) % shard_count
+
+
 def split_codes(s: str) -> Tuple[str, ...]:
     codes = [c.strip().upper() for c in s.split(",") if c.strip()]
     return tuple(codes)
@@ -78,16 +128,27 @@ def parse_depart_date(raw: str) -> Optional[date]:
 
 # ──────────────────────────────────────────────────────────────────────────────
 # API
-def fetch_latest_prices(cfg: Config, origin: str, dest: str, session: requests.Session) -> dict:
+def fetch_latest_prices(
+    cfg: Config,
+    origin: str,
+    dest: str,
+    session: requests.Session,
+    throttle: Optional[AdaptiveThrottle] = None,
+    cache: Optional[ResponseCache] = None,
+) -> dict:
     """
     Travelpayouts: /aviasales/v3/get_latest_prices
 
     Behavior:
     - 400: invalid route/code -> return empty (do NOT fail job)
-    - 429: rate limit -> backoff + retry
+    - 429: rate limit -> wait `Retry-After` (or backoff) + retry
     - other errors -> retry then raise
+    - with a shared `throttle`, every attempt takes a slot + rate token, 429s pause
+      all workers, and an origin whose circuit is open raises CircuitOpenError
+    - with a `cache`, fresh entries skip the API entirely and stale ones are
+      revalidated with If-None-Match / If-Modified-Since (304 -> cached payload)
     """
-    url = "https://api.travelpayouts.com/aviasales/v3/get_latest_prices"
+    url = cfg.api_base_url.rstrip("/") + "/aviasales/v3/get_latest_prices"
     params = {
         "origin": origin,
         "destination": dest,
@@ -97,119 +158,340 @@ def fetch_latest_prices(cfg: Config, origin: str, dest: str, session: requests.S
         "token": cfg.api_key,
     }
 
+    stale = None
+    cache_key = (origin, dest, cfg.currency, cfg.market, params["period_type"])
+    if cache is not None:
+        cached, stale = cache.lookup(cache_key)
+        if cached is not None:
+            return cached
+    headers = stale.conditional_headers() if stale is not None else {}
+
     last_err: Optional[Exception] = None
     for attempt in range(1, cfg.max_retries + 1):
+        if throttle is not None:
+            throttle.acquire(origin)
+
+        outcome, retry_after = "error", None
+        started = time.monotonic()
         try:
-            resp = session.get(url, params=params, timeout=cfg.timeout_sec)
+            resp = session.get(url, params=params, headers=headers, timeout=cfg.timeout_sec)
+
+            if resp.status_code == 304 and stale is not None:
+                outcome = "ok"
+                return cache.revalidate(cache_key, stale)
 
             if resp.status_code == 400:
-                return {"success": False, "data": []}
+                outcome = "ok"
+                payload = {"success": False, "data": []}
+                if cache is not None:
+                    cache.store(cache_key, payload)
+                return payload
 
             if resp.status_code == 429:
-                time.sleep(1.5 * attempt)
+                outcome = "throttled"
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                last_err = RuntimeError(f"429 rate limited (Retry-After={retry_after})")
                 continue
 
             resp.raise_for_status()
-            return resp.json()
+            payload = resp.json()
+            outcome = "ok"
+            if cache is not None:
+                cache.store(
+                    cache_key,
+                    payload,
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                )
+            return payload
 
         except Exception as e:
             last_err = e
-            time.sleep(0.8 * attempt)
+
+        finally:
+            if throttle is not None:
+                throttle.release(origin, outcome, time.monotonic() - started, retry_after)
+            if outcome == "throttled" and throttle is None:
+                time.sleep(retry_after if retry_after is not None else 1.5 * attempt)
+            elif outcome == "error" and attempt < cfg.max_retries:
+                time.sleep(0.8 * attempt)
 
     raise RuntimeError(f"API failed for {origin}->{dest}: {last_err}")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Bronze writer
-def write_bronze_snapshot(cfg: Config) -> Path:
+# Bronze writer (columns: BRONZE_HEADER, defined in transform/contract.py)
+
+
+def route_pairs(cfg: Config) -> List[Tuple[str, str]]:
+    pairs = [(o, d) for o in cfg.origins for d in cfg.dests if o != d]
+    if cfg.shard_count > 1:
+        pairs = [(o, d) for o, d in pairs if shard_of(o, d, cfg.shard_count) == cfg.shard_index]
+    return pairs
+
+
+def part_name(shard_index: int, suffix: str = ".csv") -> str:
+    return f"fares.part-{shard_index}{suffix}"
+
+
+def rows_from_payload(
+    payload: dict,
+    origin: str,
+    dest: str,
+    snapshot_date: str,
+    scrape_ts: str,
+    cutoff: date,
+) -> List[list]:
+    """Turn one API payload into bronze rows (same order as BRONZE_HEADER)."""
+    rows = []
+    for item in payload.get("data") or []:
+        dep = parse_depart_date(item.get("depart_date", ""))
+        if not dep or dep > cutoff:
+            continue
+
+        price = item.get("value")
+        if price is None:
+            continue
+
+        rows.append([
+            snapshot_date,
+            origin,
+            dest,
+            dep.isoformat(),
+            float(price),
+            scrape_ts,
+            (item.get("gate") or ""),
+            safe_int(item.get("trip_class")),
+            safe_int(item.get("number_of_changes")),
+        ])
+    return rows
+
+
+class CsvBronzeWriter:
+    """Row-at-a-time CSV (default; what Redshift COPY + the Postgres loader read)."""
+
+    suffix = ".csv"
+
+    def __init__(self, path: Path) -> None:
+        # ✅ utf-8-sig helps Excel display non-English text correctly
+        self._fp = open(path, "w", newline="", encoding="utf-8-sig")
+        self._w = csv.writer(self._fp)
+        self._w.writerow(BRONZE_HEADER)
+
+    def write_rows(self, rows: List[list]) -> None:
+        self._w.writerows(rows)
+
+    def close(self) -> None:
+        self._fp.close()
+
+
+class ParquetBronzeWriter:
+    """
+    Buffers rows into typed column batches and flushes one row group per
+    `row_group_size` rows: dictionary-encoded origin/dest/gate, date32 dates,
+    float64 prices, UTC timestamp scrape_ts, small ints for trip_class/changes.
+    """
+
+    suffix = ".parquet"
+
+    def __init__(self, path: Path, row_group_size: int = 64 * 1024) -> None:
+        import pyarrow as pa  # optional dependency (only for --format parquet)
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.row_group_size = row_group_size
+        code = pa.dictionary(pa.int32(), pa.string())
+        self.schema = pa.schema([
+            ("snapshot_date", pa.date32()),
+            ("origin", code),
+            ("dest", code),
+            ("depart_date", pa.date32()),
+            ("price_usd", pa.float64()),
+            ("scrape_ts", pa.timestamp("s", tz="UTC")),
+            ("gate", code),
+            ("trip_class", pa.int16()),
+            ("number_of_changes", pa.int16()),
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self._cols: List[list] = [[] for _ in BRONZE_HEADER]
+
+    def write_rows(self, rows: List[list]) -> None:
+        cols = self._cols
+        for row in rows:
+            for col, value in zip(cols, row):
+                col.append(value)
+        if len(cols[0]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._cols[0]:
+            return
+        pa = self._pa
+        snap, origin, dest, dep, price, ts, gate, trip, changes = self._cols
+
+        def opt_int(values: list) -> "pa.Array":
+            return pa.array([int(v) if v != "" else None for v in values], pa.int16())
+
+        table = pa.Table.from_arrays(
+            [
+                pa.array(snap, pa.string()).cast(pa.date32()),
+                pa.array(origin, pa.string()).dictionary_encode(),
+                pa.array(dest, pa.string()).dictionary_encode(),
+                pa.array(dep, pa.string()).cast(pa.date32()),
+                pa.array(price, pa.float64()),
+                pa.array(ts, pa.string()).cast(pa.timestamp("s", tz="UTC")),
+                pa.array([g or None for g in gate], pa.string()).dictionary_encode(),
+                opt_int(trip),
+                opt_int(changes),
+            ],
+            schema=self.schema,
+        )
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self._cols = [[] for _ in BRONZE_HEADER]
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+BRONZE_WRITERS = {"csv": CsvBronzeWriter, "parquet": ParquetBronzeWriter}
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """One Session shared by all workers; pool sized so threads don't queue for sockets."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def write_bronze_snapshot(
+    cfg: Config,
+    bronze_root: Optional[Path] = None,
+    session: Optional[requests.Session] = None,
+) -> Path:
+    """
+    Fetch every route in `cfg` and write one bronze file for today.
+    `session` lets a caller share (or instrument) the HTTP session; by default a
+    pooled one sized to `cfg.concurrency` is created and closed here.
+    """
     snapshot_date = date.today().isoformat()
     scrape_ts = utc_now_iso_z()
     cutoff = date.today() + timedelta(days=cfg.days_ahead)
 
-    out_dir = REPO_ROOT / "data" / "bronze" / f"dt={snapshot_date}"
+    bronze_root = bronze_root or (REPO_ROOT / "data" / "bronze")
+    out_dir = bronze_root / f"dt={snapshot_date}"
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    # Stable filename downstream expects
-    out_file = out_dir / "fares.csv"
+    writer_cls = BRONZE_WRITERS[cfg.output_format]
+
+    # Stable filename downstream expects (sharded runs write a part; see merge_bronze_parts)
+    if cfg.shard_count > 1:
+        out_file = out_dir / part_name(cfg.shard_index, writer_cls.suffix)
+    else:
+        out_file = out_dir / f"fares{writer_cls.suffix}"
+
+    manifest_name = (
+        part_manifest_name(cfg.shard_index) if cfg.shard_count > 1 else MANIFEST_NAME
+    )
 
     # Temp file prevents partial writes + helps Windows behavior
-    tmp_file = out_dir / f"fares.tmp.{os.getpid()}.csv"
-
-    header = [
-        "snapshot_date",
-        "origin",
-        "dest",
-        "depart_date",
-        "price_usd",
-        "scrape_ts",
-        "gate",
-        "trip_class",
-        "number_of_changes",
-    ]
+    tmp_file = out_dir / f"{out_file.stem}.tmp.{os.getpid()}{writer_cls.suffix}"
 
     written = 0
     skipped_invalid = 0
     warns = 0
 
-    # ✅ utf-8-sig helps Excel display non-English text correctly
-    with requests.Session() as session, open(tmp_file, "w", newline="", encoding="utf-8-sig") as fp:
-        w = csv.writer(fp)
-        w.writerow(header)
-
-        for origin in cfg.origins:
-            for dest in cfg.dests:
-                if origin == dest:
-                    continue
-
+    pairs = route_pairs(cfg)
+    workers = max(1, cfg.concurrency)
+    throttle = AdaptiveThrottle(
+        cfg.requests_per_sec,
+        max_concurrency=workers,
+        breaker=CircuitBreaker(cfg.breaker_failures, cfg.breaker_reset_sec),
+    )
+    cache = None
+    if cfg.cache_dir:
+        cache = ResponseCache(Path(cfg.cache_dir), cfg.cache_ttl_sec, cfg.cache_max_bytes)
+    started = time.perf_counter()
+
+    # Workers only fetch; this thread is the single writer, so the tmp file has one owner.
+    writer = writer_cls(tmp_file)
+    manifest = ManifestBuilder()
+    try:
+        owned = make_session(workers) if session is None else nullcontext(session)
+        with owned as session, \
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+            futures = {}
+            for origin, dest in pairs:
+                fut = pool.submit(fetch_latest_prices, cfg, origin, dest, session, throttle, cache)
+                futures[fut] = (origin, dest)
+
+            for fut in as_completed(futures):
+                origin, dest = futures[fut]
                 try:
-                    payload = fetch_latest_prices(cfg, origin, dest, session)
-                    data = payload.get("data") or []
+                    payload = fut.result()
 
-                    if not data and payload.get("success") is False:
+                    if not payload.get("data") and payload.get("success") is False:
                         skipped_invalid += 1
                         continue
 
-                    for item in data:
-                        dep = parse_depart_date(item.get("depart_date", ""))
-                        if not dep or dep > cutoff:
-                            continue
-
-                        price = item.get("value")
-                        if price is None:
-                            continue
-
-                        w.writerow([
-                            snapshot_date,
-                            origin,
-                            dest,
-                            dep.isoformat(),
-                            float(price),
-                            scrape_ts,
-                            (item.get("gate") or ""),
-                            safe_int(item.get("trip_class")),
-                            safe_int(item.get("number_of_changes")),
-                        ])
-                        written += 1
+                    rows = rows_from_payload(
+                        payload, origin, dest, snapshot_date, scrape_ts, cutoff
+                    )
+                    writer.write_rows(rows)
+                    for row in rows:
+                        manifest.add_bronze_row(BRONZE_HEADER, row)
+                    written += len(rows)
 
                 except Exception as e:
                     warns += 1
                     print(f"[WARN] {origin}->{dest}: {e}")
-
-                time.sleep(cfg.sleep_between_calls_sec)
-
-    # Atomic replace into fares.csv
-    try:
-        os.replace(tmp_file, out_file)
-    except PermissionError:
-        # fares.csv is locked (open in Excel/VSCode). Write a fallback instead.
-        safe_ts = scrape_ts.replace(":", "-")
-        fallback = out_dir / f"fares_{safe_ts}_{os.getpid()}.csv"
-        os.replace(tmp_file, fallback)
-        print(f"[WARN] fares.csv is locked (close Excel/VSCode preview). Wrote: {fallback}")
-        out_file = fallback
-
-    print(f"[OK] wrote {out_file}")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    nbytes = tmp_file.stat().st_size
+
+    if is_unchanged(out_dir, out_file.name, manifest.content_hash, manifest_name):
+        # Same fares as the file already there: keep it (and its mtime) for downstream.
+        tmp_file.unlink()
+        action = "unchanged (content hash matches manifest), kept"
+    else:
+        action = "wrote"
+        # Atomic replace into fares.csv / fares.parquet
+        try:
+            os.replace(tmp_file, out_file)
+        except PermissionError:
+            # fares.csv is locked (open in Excel/VSCode). Write a fallback instead.
+            safe_ts = scrape_ts.replace(":", "-")
+            fallback = out_dir / f"{out_file.stem}_{safe_ts}_{os.getpid()}{writer_cls.suffix}"
+            os.replace(tmp_file, fallback)
+            print(f"[WARN] {out_file.name} is locked (close Excel/VSCode preview). "
+                  f"Wrote: {fallback}")
+            out_file = fallback
+
+        update_manifest(
+            out_dir, out_file.name, manifest.entry(cfg.output_format, nbytes), manifest_name
+        )
+
+    routes_per_sec = len(pairs) / elapsed if elapsed > 0 else 0.0
+    cache_note = ""
+    if cache is not None:
+        cache_note = (
+            f" (cache hits={cache.hits}, misses={cache.misses},"
+            f" revalidated_304={cache.revalidated})"
+        )
+    print(f"[OK] {action} {out_file}{cache_note}")
     print(f"     rows_written={written}, skipped_invalid_pairs={skipped_invalid}, warns={warns}")
+    print(
+        f"     routes={len(pairs)}, concurrency={workers}, "
+        f"wall_sec={elapsed:.2f}, routes_per_sec={routes_per_sec:.2f}"
+    )
+    print(
+        f"     throttled_429={throttle.throttled}, final_inflight_limit={int(throttle.limit)}, "
+        f"open_circuits={','.join(throttle.breaker.open_keys()) or '-'}"
+    )
     return out_file
 
 
@@ -219,6 +501,47 @@ def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--origins", default=os.getenv("HOT_ORIGINS", ""), help="Comma list (e.g. JFK,LAX,SFO)")
     ap.add_argument("--dests", default=os.getenv("HOT_DESTS", ""), help="Comma list (e.g. LHR,CDG,DXB)")
+    ap.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("API_CONCURRENCY", "1")),
+        help="Routes fetched in parallel (default 1)",
+    )
+    ap.add_argument(
+        "--rps",
+        type=float,
+        default=float(os.getenv("API_RPS", "5")),
+        help="Shared request budget in requests/sec across all workers (default 5)",
+    )
+    ap.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=(0, 1),
+        help="Collect only shard i of N (e.g. 0/4); writes fares.part-i.csv for merge_bronze_parts",
+    )
+    ap.add_argument(
+        "--format",
+        choices=sorted(BRONZE_WRITERS),
+        default=os.getenv("BRONZE_FORMAT", "csv"),
+        help="Bronze file format (default csv; parquet needs pyarrow)",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        default=os.getenv("API_CACHE_DIR", ""),
+        help="Reuse API responses from this folder on reruns (disabled if empty)",
+    )
+    ap.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=float(os.getenv("API_CACHE_TTL_SEC", str(6 * 3600))),
+        help="Seconds a cached response is served without asking the API (default 6h)",
+    )
+    ap.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=int(os.getenv("API_CACHE_MAX_MB", "256")),
+        help="Evict least-recently-used responses above this size (default 256)",
+    )
     args = ap.parse_args()
 
     api_key = os.getenv("TRAVELPAYOUTS_API_KEY", "").strip()
@@ -230,12 +553,20 @@ def main() -> int:
 
     cfg = Config(
         api_key=api_key,
+        api_base_url=os.getenv("TRAVELPAYOUTS_BASE_URL", Config.api_base_url),
         currency=os.getenv("CURRENCY", "usd"),
         market=os.getenv("MARKET", "us"),
         days_ahead=int(os.getenv("DAYS_AHEAD", "150")),
         timeout_sec=int(os.getenv("API_TIMEOUT_SEC", "15")),
         max_retries=int(os.getenv("API_MAX_RETRIES", "3")),
-        sleep_between_calls_sec=float(os.getenv("API_SLEEP_SEC", "0.2")),
+        requests_per_sec=args.rps,
+        concurrency=args.concurrency,
+        shard_index=args.shard[0],
+        shard_count=args.shard[1],
+        output_format=args.format,
+        cache_dir=args.cache_dir or None,
+        cache_ttl_sec=args.cache_ttl,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
         origins=origins,
         dests=dests,
     )
@@ -4,41 +4,78 @@ Ingest flight-fare snapshots and write to S3 (bronze) or local demo folder.
 Modes:
 1) Local demo (default): writes JSONL to `data/bronze/dt=YYYY-MM-DD/fares.jsonl`
 2) S3 (optional): uploads JSONL to `s3://S3_BUCKET/S3_PREFIX_BRONZE/dt=YYYY-MM-DD/fares.jsonl`
+   (`--gzip` writes `fares.jsonl.gz` instead)
 
 If API credentials are not provided, a small synthetic dataset is generated.
 
+Records are streamed end to end: the `/fares` response is parsed incrementally,
+yielded one record at a time, and written/uploaded in fixed-size multipart parts,
+so peak memory does not grow with the snapshot size.
+
+Every write also records the file in the partition's `_manifest.json` (rows, bytes,
+content hash, depart_date range, routes; see `ingestion/manifest.py`). When the
+content hash equals the manifest entry of the existing file, the new copy is
+discarded (local tmp deleted / S3 multipart upload aborted) instead of rewritten.
+
 Run examples:
   python -m ingestion.ingest_api_to_s3 --date 2026-01-01
   python -m ingestion.ingest_api_to_s3 --date 2026-01-01 --to-s3
+  python -m ingestion.ingest_api_to_s3 --date 2026-01-01 --to-s3 --gzip
 
 Step 6 (multiple days):
   python -m ingestion.ingest_api_to_s3 --start 2026-01-17 --days 3
   python -m ingestion.ingest_api_to_s3 --start 2026-01-17 --days 3 --to-s3
+
+Backfill (days in parallel, one pooled HTTP session + one S3 client; days whose
+partition already exists are skipped unless --force). Single-day runs (--date, the
+daily DAG) always fetch; the manifest content hash then reports unchanged snapshots:
+  python -m ingestion.ingest_api_to_s3 --start 2025-10-01 --days 90 --to-s3 --workers 8
+  python -m ingestion.ingest_api_to_s3 --start 2025-10-01 --days 90 --to-s3 --workers 8 --force
 """
 
 import argparse
-import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 from ingestion.config import settings
+from ingestion.manifest import (
+    ManifestBuilder,
+    is_unchanged,
+    read_s3_manifest,
+    update_manifest,
+    update_s3_manifest,
+)
+from ingestion.streaming import (
+    DEFAULT_PART_SIZE,
+    S3MultipartWriter,
+    iter_json_array_items,
+    write_jsonl_gz,
+)
 
 load_dotenv()
 
 ROOT = Path(__file__).resolve().parents[1]
 
 
-def s3_key_for_date(run_date: str) -> str:
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def s3_key_for_date(run_date: str, gz: bool = False) -> str:
     prefix = settings.s3_prefix_bronze.strip("/")
-    return f"{prefix}/dt={run_date}/fares.jsonl"
+    return f"{prefix}/dt={run_date}/fares.jsonl" + (".gz" if gz else "")
 
 
-def local_path_for_date(run_date: str) -> Path:
-    return ROOT / "data" / "bronze" / f"dt={run_date}" / "fares.jsonl"
+def local_path_for_date(run_date: str, gz: bool = False) -> Path:
+    return ROOT / "data" / "bronze" / f"dt={run_date}" / ("fares.jsonl" + (".gz" if gz else ""))
 
 
 def synthetic_snapshot(run_date: str) -> List[Dict[str, Any]]:
@@ -53,38 +90,124 @@ def synthetic_snapshot(run_date: str) -> List[Dict[str, Any]]:
     return rows
 
 
-def fetch_snapshot(run_date: str) -> List[Dict[str, Any]]:
+def iter_snapshot(
+    run_date: str, session: Optional[requests.Session] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield snapshot records one by one; the `/fares` body is never fully in memory."""
     if not settings.api_base_url or not settings.api_key:
-        return synthetic_snapshot(run_date)
+        yield from synthetic_snapshot(run_date)
+        return
 
     url = settings.api_base_url.rstrip("/") + "/fares"
     headers = {"Authorization": f"Bearer {settings.api_key}"}
-    resp = requests.get(url, params={"date": run_date}, headers=headers, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    if isinstance(data, dict) and "results" in data:
-        return data["results"]
-    if isinstance(data, list):
-        return data
-    raise ValueError("Unexpected API response format")
+    params = {"date": run_date}
+    http = session if session is not None else requests
+    with http.get(url, params=params, headers=headers, timeout=30, stream=True) as resp:
+        resp.raise_for_status()
+        yield from iter_json_array_items(resp.iter_content(chunk_size=STREAM_CHUNK_BYTES))
 
 
-def write_jsonl_local(records: List[Dict[str, Any]], path: Path) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        for r in records:
-            f.write(json.dumps(r) + "\n")
+def fetch_snapshot(run_date: str) -> List[Dict[str, Any]]:
+    return list(iter_snapshot(run_date))
+
+
+@dataclass
+class WriteStats:
+    records: int
+    bytes: int
+    unchanged: bool = False  # content hash matched the manifest; existing file kept
+
 
+def _tracked(
+    records: Iterable[Dict[str, Any]], manifest: ManifestBuilder
+) -> Iterator[Dict[str, Any]]:
+    for r in records:
+        manifest.add_record(r)
+        yield r
 
-def upload_jsonl_to_s3(records: List[Dict[str, Any]], key: str) -> None:
+
+def write_jsonl_local(
+    records: Iterable[Dict[str, Any]], path: Path, gz: bool = False
+) -> WriteStats:
+    """Stream records to `path` via a tmp file + atomic replace, then update `_manifest.json`."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+    manifest = ManifestBuilder()
+    try:
+        with tmp.open("wb") as f:
+            count = write_jsonl_gz(_tracked(records, manifest), f, compress=gz)
+        nbytes = tmp.stat().st_size
+        if is_unchanged(path.parent, path.name, manifest.content_hash):
+            tmp.unlink()
+            return WriteStats(count, nbytes, unchanged=True)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    update_manifest(path.parent, path.name, manifest.entry("jsonl.gz" if gz else "jsonl", nbytes))
+    return WriteStats(count, nbytes)
+
+
+def make_http_session(pool_size: int) -> requests.Session:
+    """One keep-alive Session shared by all backfill workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def make_s3_client(pool_size: int = 10):
     import boto3  # optional import
+    from botocore.config import Config as BotoConfig
+
+    return boto3.client(
+        "s3",
+        region_name=settings.aws_region,
+        config=BotoConfig(max_pool_connections=max(10, pool_size)),
+    )
 
+
+def s3_key_exists(s3, key: str) -> bool:
+    resp = s3.list_objects_v2(Bucket=settings.s3_bucket, Prefix=key, MaxKeys=1)
+    return any(obj["Key"] == key for obj in resp.get("Contents", []))
+
+
+def upload_jsonl_to_s3(
+    records: Iterable[Dict[str, Any]],
+    key: str,
+    gz: bool = False,
+    s3=None,
+    part_size: int = DEFAULT_PART_SIZE,
+) -> WriteStats:
+    """Stream records into one S3 object via multipart upload, then update `_manifest.json`."""
     if not settings.s3_bucket:
         raise ValueError("S3_BUCKET is not set")
 
-    s3 = boto3.client("s3", region_name=settings.aws_region)
-    body = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
-    s3.put_object(Bucket=settings.s3_bucket, Key=key, Body=body)
+    if s3 is None:
+        s3 = make_s3_client()
+
+    manifest = ManifestBuilder()
+    sink = S3MultipartWriter(s3, settings.s3_bucket, key, part_size=part_size)
+    try:
+        count = write_jsonl_gz(_tracked(records, manifest), sink, compress=gz)
+        nbytes = sink.bytes_written
+        name = key.rsplit("/", 1)[-1]
+        previous = read_s3_manifest(s3, settings.s3_bucket, key)["files"].get(name)
+        same = previous is not None and previous.get("content_hash") == manifest.content_hash
+        if same and s3_key_exists(s3, key):
+            sink.abort()  # never completed -> the existing object is untouched
+            return WriteStats(count, nbytes, unchanged=True)
+
+        sink.commit()
+        update_s3_manifest(
+            s3, settings.s3_bucket, key, manifest.entry("jsonl.gz" if gz else "jsonl", nbytes)
+        )
+    except BaseException:
+        sink.abort()  # no-op once committed
+        raise
+    return WriteStats(count, nbytes)
 
 
 def daterange(start_yyyy_mm_dd: str, days: int) -> List[str]:
@@ -92,12 +215,76 @@ def daterange(start_yyyy_mm_dd: str, days: int) -> List[str]:
     return [(start + timedelta(days=i)).isoformat() for i in range(days)]
 
 
+@dataclass
+class DayResult:
+    run_date: str
+    target: str
+    status: str  # written | unchanged | skipped | failed
+    records: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+
+def ingest_day(
+    run_date: str,
+    to_s3: bool,
+    gz: bool = False,
+    force: bool = False,
+    session: Optional[requests.Session] = None,
+    s3=None,
+    skip_existing: bool = False,
+) -> DayResult:
+    """
+    Fetch + write one day; never raises (failures are reported in the result).
+    With `skip_existing` (backfills) a day whose partition exists is not fetched unless `force`.
+    """
+    started = time.perf_counter()
+    if to_s3:
+        key = s3_key_for_date(run_date, gz=gz)
+        target = f"s3://{settings.s3_bucket}/{key}"
+    else:
+        path = local_path_for_date(run_date, gz=gz)
+        target = str(path)
+
+    try:
+        if skip_existing and not force:
+            exists = s3_key_exists(s3, key) if to_s3 else path.exists()
+            if exists:
+                return DayResult(run_date, target, "skipped", seconds=time.perf_counter() - started)
+
+        records = iter_snapshot(run_date, session=session)
+        if to_s3:
+            stats = upload_jsonl_to_s3(records, key, gz=gz, s3=s3)
+        else:
+            stats = write_jsonl_local(records, path, gz=gz)
+        status = "unchanged" if stats.unchanged else "written"
+        return DayResult(run_date, target, status, stats.records, time.perf_counter() - started)
+
+    except Exception as e:
+        return DayResult(run_date, target, "failed", 0, time.perf_counter() - started, str(e))
+
+
+def print_timing_table(results: List[DayResult]) -> None:
+    print(f"{'date':<12}{'status':<10}{'records':>10}{'seconds':>10}  target")
+    for r in results:
+        note = f"  ({r.error})" if r.error else ""
+        print(f"{r.run_date:<12}{r.status:<10}{r.records:>10}{r.seconds:>10.2f}  {r.target}{note}")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--date", default=None, help="Single run date YYYY-MM-DD (optional)")
     parser.add_argument("--start", default=None, help="Start date YYYY-MM-DD (for multi-day run)")
     parser.add_argument("--days", type=int, default=1, help="Number of days to run (default 1)")
     parser.add_argument("--to-s3", action="store_true", help="Upload to S3 instead of local disk")
+    parser.add_argument("--gzip", action="store_true", help="Write gzip-compressed fares.jsonl.gz")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Days ingested in parallel (default 1)"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="--start backfills: re-ingest days whose partition already exists",
+    )
     args = parser.parse_args()
 
     # Decide which dates to run
@@ -108,22 +295,28 @@ def main() -> None:
     else:
         run_dates = [str(date.today())]
 
-    total = 0
-    for run_date in run_dates:
-        records = fetch_snapshot(run_date)
-
-        if args.to_s3:
-            key = s3_key_for_date(run_date)
-            upload_jsonl_to_s3(records, key)
-            print(f"Uploaded {len(records)} records to s3://{settings.s3_bucket}/{key}")
-        else:
-            path = local_path_for_date(run_date)
-            write_jsonl_local(records, path)
-            print(f"Wrote {len(records)} records to {path}")
-
-        total += len(records)
-
-    print(f"Done. Days={len(run_dates)} total_records={total}")
+    workers = max(1, min(args.workers, len(run_dates)))
+    started = time.perf_counter()
+
+    # One pooled HTTP session and one S3 client for every day (both are thread-safe).
+    s3 = make_s3_client(workers) if args.to_s3 else None
+    with make_http_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda d: ingest_day(d, args.to_s3, args.gzip, args.force, session=session, s3=s3,
+                                 skip_existing=bool(args.start)),
+            run_dates,
+        ))
+
+    print_timing_table(results)
+    total = sum(r.records for r in results)
+    failed = [r.run_date for r in results if r.status == "failed"]
+    skipped = sum(r.status == "skipped" for r in results)
+    print(
+        f"Done. Days={len(run_dates)} total_records={total} skipped={skipped} "
+        f"failed={len(failed)} wall_sec={time.perf_counter() - started:.2f}"
+    )
+    if failed:
+        raise SystemExit(f"[FAILED] days: {failed}")
 
 
 if __name__ == "__main__":
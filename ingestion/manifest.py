@@ -0,0 +1,187 @@
+"""
+Per-partition bronze manifests (`dt=YYYY-MM-DD/_manifest.json`).
+
+One manifest per partition, one entry per data file:
+
+  {"partition": "dt=2026-01-23",
+   "files": {"fares.csv": {"format": "csv", "rows": 1234, "bytes": 98765,
+                           "content_hash": "...", "min_depart_date": "2026-01-24",
+                           "max_depart_date": "2026-06-20", "routes": ["JFK-LHR", ...],
+                           "written_at": "2026-01-23T02:10:00Z"}}}
+
+`content_hash` is an order-independent hash over the fare rows *without*
+`scrape_ts`, so the same fares fetched again (in any order, at any time) hash
+the same and writers can skip the rewrite. Being a sum, it also merges: the
+hash of concatenated shard parts is the sum of the part hashes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Set
+
+MANIFEST_NAME = "_manifest.json"
+VOLATILE_FIELDS = ("scrape_ts",)
+_MOD = 1 << 256
+
+
+def _utc_now_iso_z() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+class ManifestBuilder:
+    """Accumulates manifest stats while rows stream past a writer."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self._hash = 0
+        self.min_depart: Optional[str] = None
+        self.max_depart: Optional[str] = None
+        self.routes: Set[str] = set()
+
+    def add(self, origin: str, dest: str, depart_date: str, identity: str) -> None:
+        digest = hashlib.sha256(identity.encode("utf-8")).digest()
+        self._hash = (self._hash + int.from_bytes(digest, "big")) % _MOD
+        self.rows += 1
+        self.routes.add(f"{origin}-{dest}")
+        if depart_date:
+            if self.min_depart is None or depart_date < self.min_depart:
+                self.min_depart = depart_date
+            if self.max_depart is None or depart_date > self.max_depart:
+                self.max_depart = depart_date
+
+    def add_bronze_row(self, header: Iterable[str], row: list) -> None:
+        """Collector rows (list in BRONZE_HEADER order)."""
+        values = dict(zip(header, row))
+        identity = "\x1f".join(str(v) for k, v in values.items() if k not in VOLATILE_FIELDS)
+        self.add(values["origin"], values["dest"], str(values["depart_date"]), identity)
+
+    def add_record(self, record: Mapping[str, Any]) -> None:
+        """ingest_api_to_s3 records (dicts)."""
+        stable = {k: v for k, v in record.items() if k not in VOLATILE_FIELDS}
+        identity = json.dumps(stable, sort_keys=True, default=str)
+        self.add(
+            str(record.get("origin", "")),
+            str(record.get("dest", "")),
+            str(record.get("depart_date") or ""),
+            identity,
+        )
+
+    @property
+    def content_hash(self) -> str:
+        return f"{self._hash:064x}"
+
+    def entry(self, fmt: str, nbytes: int) -> Dict[str, Any]:
+        return {
+            "format": fmt,
+            "rows": self.rows,
+            "bytes": nbytes,
+            "content_hash": self.content_hash,
+            "min_depart_date": self.min_depart,
+            "max_depart_date": self.max_depart,
+            "routes": sorted(self.routes),
+            "written_at": _utc_now_iso_z(),
+        }
+
+
+def merge_entries(entries: Iterable[Mapping[str, Any]], fmt: str, nbytes: int) -> Dict[str, Any]:
+    """Manifest entry for the concatenation of several files (e.g. shard parts)."""
+    entries = list(entries)
+    total_hash = sum(int(e["content_hash"], 16) for e in entries) % _MOD
+    mins = [e["min_depart_date"] for e in entries if e.get("min_depart_date")]
+    maxs = [e["max_depart_date"] for e in entries if e.get("max_depart_date")]
+    return {
+        "format": fmt,
+        "rows": sum(int(e["rows"]) for e in entries),
+        "bytes": nbytes,
+        "content_hash": f"{total_hash:064x}",
+        "min_depart_date": min(mins) if mins else None,
+        "max_depart_date": max(maxs) if maxs else None,
+        "routes": sorted({r for e in entries for r in e.get("routes", [])}),
+        "written_at": _utc_now_iso_z(),
+    }
+
+
+# ── local files ──────────────────────────────────────────────────────────────
+def read_manifest(path: Path) -> Dict[str, Any]:
+    """Manifest at `path`, or an empty one if missing/corrupt."""
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault("partition", path.parent.name)
+    manifest.setdefault("files", {})
+    return manifest
+
+
+def file_entry(
+    partition_dir: Path, file_name: str, manifest_name: str = MANIFEST_NAME
+) -> Optional[Dict[str, Any]]:
+    return read_manifest(partition_dir / manifest_name)["files"].get(file_name)
+
+
+def update_manifest(
+    partition_dir: Path,
+    file_name: str,
+    entry: Optional[Mapping[str, Any]],
+    manifest_name: str = MANIFEST_NAME,
+) -> Path:
+    """Set (or drop, when `entry` is None) one file's entry; atomic replace."""
+    path = partition_dir / manifest_name
+    manifest = read_manifest(path)
+    if entry is None:
+        manifest["files"].pop(file_name, None)
+    else:
+        manifest["files"][file_name] = dict(entry)
+
+    tmp = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def part_manifest_name(shard_index: int) -> str:
+    """Shards write their own manifest so parallel shards never race on one file."""
+    return f"_manifest.part-{shard_index}.json"
+
+
+def is_unchanged(
+    partition_dir: Path, file_name: str, content_hash: str, manifest_name: str = MANIFEST_NAME
+) -> bool:
+    """True if `file_name` exists and its manifest entry has the same content hash."""
+    entry = file_entry(partition_dir, file_name, manifest_name)
+    return (
+        entry is not None
+        and entry.get("content_hash") == content_hash
+        and (partition_dir / file_name).exists()
+    )
+
+
+# ── S3 ───────────────────────────────────────────────────────────────────────
+def s3_manifest_key(data_key: str) -> str:
+    return data_key.rsplit("/", 1)[0] + "/" + MANIFEST_NAME
+
+
+def read_s3_manifest(s3, bucket: str, data_key: str) -> Dict[str, Any]:
+    key = s3_manifest_key(data_key)
+    try:
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+        manifest = json.loads(body)
+    except Exception:  # missing (NoSuchKey) or unreadable -> start a fresh manifest
+        manifest = {}
+    manifest.setdefault("partition", key.rsplit("/", 2)[-2])
+    manifest.setdefault("files", {})
+    return manifest
+
+
+def update_s3_manifest(s3, bucket: str, data_key: str, entry: Mapping[str, Any]) -> str:
+    key = s3_manifest_key(data_key)
+    manifest = read_s3_manifest(s3, bucket, data_key)
+    manifest["files"][data_key.rsplit("/", 1)[-1]] = dict(entry)
+    body = json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+    s3.put_object(Bucket=bucket, Key=key, Body=body, ContentType="application/json")
+    return key
@@ -0,0 +1,154 @@
+"""
+Merge sharded collector output into the `fares.csv` downstream reads.
+
+Each `python -m ingestion.collector --shard i/N` run writes
+`data/bronze/dt=YYYY-MM-DD/fares.part-i.csv`. Once all N shards finished:
+
+  python -m ingestion.merge_bronze_parts --shards 4
+  python -m ingestion.merge_bronze_parts --shards 4 --date 2026-01-23
+  python -m ingestion.merge_bronze_parts --shards 4 --format parquet
+
+The merge refuses to run unless exactly parts 0..N-1 exist, so a missing shard
+never silently becomes a smaller snapshot. Part manifests (`_manifest.part-i.json`)
+are combined into the partition's `_manifest.json`; if the combined content hash
+matches the existing `fares.*`, the merge keeps that file instead of rewriting it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import os
+import re
+import shutil
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+from ingestion.collector import BRONZE_HEADER, REPO_ROOT, part_name
+from ingestion.manifest import (
+    file_entry,
+    is_unchanged,
+    merge_entries,
+    part_manifest_name,
+    update_manifest,
+)
+
+PART_RE = re.compile(r"^fares\.part-(\d+)(\.csv|\.parquet)$")
+
+
+def find_parts(out_dir: Path, shard_count: int, suffix: str = ".csv") -> List[Path]:
+    """Return parts 0..N-1 in order; raise if any is missing or an unexpected one exists."""
+    found = {}
+    for p in out_dir.iterdir():
+        m = PART_RE.match(p.name)
+        if m and m.group(2) == suffix:
+            found[int(m.group(1))] = p
+
+    missing = [i for i in range(shard_count) if i not in found]
+    extra = sorted(i for i in found if i >= shard_count)
+    if missing:
+        raise FileNotFoundError(
+            f"Missing shard parts in {out_dir}: {[part_name(i, suffix) for i in missing]}"
+        )
+    if extra:
+        raise ValueError(f"Unexpected shard parts for N={shard_count} in {out_dir}: {extra}")
+    return [found[i] for i in range(shard_count)]
+
+
+def _concat_csv(parts: List[Path], tmp_file: Path) -> None:
+    expected_header = ",".join(BRONZE_HEADER).encode("utf-8")
+
+    # Byte-level concat: keep the first part's BOM + header, skip it on the others.
+    with open(tmp_file, "wb") as dst:
+        for n, part in enumerate(parts):
+            with open(part, "rb") as src:
+                header = src.readline()
+                if header.removeprefix(codecs.BOM_UTF8).rstrip(b"\r\n") != expected_header:
+                    raise ValueError(f"Unexpected header in {part}: {header!r}")
+                if n == 0:
+                    dst.write(header)
+                shutil.copyfileobj(src, dst)
+
+
+def _concat_parquet(parts: List[Path], tmp_file: Path) -> None:
+    import pyarrow.parquet as pq  # optional dependency (only for parquet parts)
+
+    # Row groups are copied one at a time, so memory stays at one row group.
+    writer = None
+    try:
+        for part in parts:
+            pf = pq.ParquetFile(part)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_file, pf.schema_arrow, compression="zstd")
+            elif pf.schema_arrow != writer.schema:
+                raise ValueError(f"Unexpected schema in {part}")
+            for i in range(pf.num_row_groups):
+                writer.write_table(pf.read_row_group(i))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def merge_bronze_parts(
+    out_dir: Path,
+    shard_count: int,
+    keep_parts: bool = False,
+    suffix: str = ".csv",
+) -> Path:
+    parts = find_parts(out_dir, shard_count, suffix)
+    part_entries = [file_entry(out_dir, p.name, part_manifest_name(i)) for i, p in enumerate(parts)]
+    have_manifests = all(e is not None for e in part_entries)
+
+    out_file = out_dir / f"fares{suffix}"
+    tmp_file = out_dir / f"fares.tmp.{os.getpid()}{suffix}"
+    fmt = suffix.lstrip(".")
+
+    merged = merge_entries(part_entries, fmt, 0) if have_manifests else None
+    if merged is not None and is_unchanged(out_dir, out_file.name, merged["content_hash"]):
+        action = "unchanged (content hash matches manifest), kept"
+    else:
+        action = "merged"
+        try:
+            if suffix == ".parquet":
+                _concat_parquet(parts, tmp_file)
+            else:
+                _concat_csv(parts, tmp_file)
+        except Exception:
+            tmp_file.unlink(missing_ok=True)
+            raise
+
+        nbytes = tmp_file.stat().st_size
+        os.replace(tmp_file, out_file)
+
+        if merged is not None:
+            merged["bytes"] = nbytes
+        else:
+            print("[WARN] some part manifests are missing; dropping the manifest entry")
+        update_manifest(out_dir, out_file.name, merged)
+
+    if not keep_parts:
+        for i, part in enumerate(parts):
+            part.unlink()
+            (out_dir / part_manifest_name(i)).unlink(missing_ok=True)
+
+    print(f"[OK] {action} {len(parts)} parts -> {out_file}")
+    return out_file
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shards", type=int, required=True, help="Total shard count N")
+    ap.add_argument("--date", default=date.today().isoformat(), help="Snapshot date YYYY-MM-DD")
+    ap.add_argument("--bronze-root", default=str(REPO_ROOT / "data" / "bronze"))
+    ap.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Part file format")
+    ap.add_argument("--keep-parts", action="store_true", help="Do not delete parts after merging")
+    args = ap.parse_args(argv)
+
+    out_dir = Path(args.bronze_root) / f"dt={args.date}"
+    merge_bronze_parts(out_dir, args.shards, keep_parts=args.keep_parts, suffix=f".{args.format}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+"""
+On-disk cache of Travelpayouts responses for collector reruns.
+
+One JSON file per (origin, dest, currency, market, period_type). Entries younger
+than `ttl_sec` are served without touching the API; older entries keep their
+`ETag` / `Last-Modified` so the next request can be conditional (304 -> reuse).
+Total size is capped at `max_bytes` by evicting least-recently-used files.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+CacheKey = Tuple[str, str, str, str, str]
+
+
+@dataclass
+class CacheEntry:
+    payload: dict
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: Path, ttl_sec: float, max_bytes: int) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self._sizes: Dict[Path, int] = {p: p.stat().st_size for p in self.cache_dir.glob("*.json")}
+
+    def _path(self, key: CacheKey) -> Path:
+        digest = hashlib.sha1("|".join(key).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def load(self, key: CacheKey) -> Optional[CacheEntry]:
+        """Entry for `key` regardless of age (None if absent/corrupt)."""
+        path = self._path(key)
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(
+            payload=raw["payload"],
+            stored_at=float(raw["stored_at"]),
+            etag=raw.get("etag"),
+            last_modified=raw.get("last_modified"),
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored_at < self.ttl_sec
+
+    def lookup(self, key: CacheKey) -> Tuple[Optional[dict], Optional[CacheEntry]]:
+        """
+        (payload, None) on a fresh hit; (None, stale_entry_or_None) on a miss.
+        A stale entry is returned so the caller can send a conditional request.
+        """
+        entry = self.load(key)
+        if entry is not None and self.is_fresh(entry):
+            try:
+                os.utime(self._path(key))  # LRU: mtime == last use
+            except OSError:
+                pass
+            with self._lock:
+                self.hits += 1
+            return entry.payload, None
+        with self._lock:
+            self.misses += 1
+        return None, entry
+
+    def store(self, key: CacheKey, payload: dict, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> None:
+        path = self._path(key)
+        tmp = path.with_suffix(f".tmp.{os.getpid()}.{threading.get_ident()}")
+        body = {
+            "key": list(key),
+            "stored_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "payload": payload,
+        }
+        data = json.dumps(body).encode("utf-8")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._sizes[path] = len(data)
+            if sum(self._sizes.values()) > self.max_bytes:
+                self._evict_locked()
+
+    def revalidate(self, key: CacheKey, entry: CacheEntry) -> dict:
+        """Server said 304: the stale payload is current again."""
+        with self._lock:
+            self.revalidated += 1
+        self.store(key, entry.payload, entry.etag, entry.last_modified)
+        return entry.payload
+
+    def _evict_locked(self) -> None:
+        """Drop least-recently-used files until the cache fits `max_bytes`."""
+        by_age = []
+        for p in list(self._sizes):
+            try:
+                by_age.append((p.stat().st_mtime, p))
+            except OSError:
+                self._sizes.pop(p, None)
+
+        total = sum(self._sizes.values())
+        for _, p in sorted(by_age):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= self._sizes.pop(p)
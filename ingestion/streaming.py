@@ -0,0 +1,212 @@
+"""
+Bounded-memory building blocks for `ingest_api_to_s3`.
+
+- `iter_json_array_items`: yield the items of a JSON array (top-level, or under one
+  key of a top-level object such as `{"results": [...]}`) from a byte-chunk stream,
+  holding only the current item + one chunk in memory.
+- `S3MultipartWriter`: file-like sink that uploads fixed-size parts through
+  S3 multipart upload; the object is only written by an explicit `commit()`,
+  anything else (an error, `close()`, garbage collection) aborts the upload.
+- `write_jsonl_gz`: records -> gzip JSONL into any binary sink.
+"""
+
+from __future__ import annotations
+
+import codecs
+import gzip
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+_WS = " \t\r\n"
+_DECODER = json.JSONDecoder()
+
+# S3 requires every part except the last to be >= 5 MiB.
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+class _CharStream:
+    """Incrementally decoded text over byte chunks, with a sliding buffer."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append one more chunk; False at end of stream."""
+        if self.eof:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self.buf = self.buf[self.pos:] + self._decoder.decode(chunk)
+                self.pos = 0
+                return True
+        self.buf = self.buf[self.pos:] + self._decoder.decode(b"", final=True)
+        self.pos = 0
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Next non-whitespace char ('' at end of stream)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        got = self.peek()
+        if got != char:
+            raise ValueError(f"Unexpected JSON: expected {char!r}, got {got!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete JSON value, reading more chunks until it parses."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number/literal that touches the buffer end may continue in the next chunk.
+            if end == len(self.buf) and not self.eof and not isinstance(obj, (dict, list, str)):
+                self.fill()
+                continue
+            self.pos = end
+            return obj
+
+
+def _iter_array(stream: _CharStream) -> Iterator[Any]:
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.pos += 1
+        return
+    while True:
+        yield stream.value()
+        sep = stream.peek()
+        stream.pos += 1
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError(f"Unexpected JSON: expected ',' or ']', got {sep!r}")
+
+
+def iter_json_array_items(chunks: Iterable[bytes], key: Optional[str] = "results") -> Iterator[Any]:
+    """
+    Stream items from `[...]` or from `{..., "<key>": [...], ...}`.
+    Other keys of the top-level object are parsed and discarded.
+    """
+    stream = _CharStream(chunks)
+    first = stream.peek()
+
+    if first == "[":
+        yield from _iter_array(stream)
+        return
+    if first != "{":
+        raise ValueError("Unexpected API response format")
+
+    stream.pos += 1
+    while stream.peek() != "}":
+        name = stream.value()
+        stream.expect(":")
+        if name == key and stream.peek() == "[":
+            yield from _iter_array(stream)
+            return
+        stream.value()  # skip
+        if stream.peek() == ",":
+            stream.pos += 1
+    raise ValueError(f"Unexpected API response format (no {key!r} array)")
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """
+    Writable binary stream -> one S3 object via multipart upload.
+
+    Buffers at most `part_size` bytes; each full buffer becomes one part.
+    `commit()` uploads the tail and completes. `abort()` discards the upload, and so
+    does `close()` before a commit: io.IOBase closes a collected writer, which must
+    not replace the object with whatever was written so far.
+    """
+
+    def __init__(self, s3, bucket: str, key: str, part_size: int = DEFAULT_PART_SIZE) -> None:
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be >= {MIN_PART_SIZE} bytes (S3 minimum)")
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.bytes_uploaded = 0
+        self.bytes_written = 0
+        self._buf = bytearray()
+        self._parts: List[Dict[str, Any]] = []
+        self._upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buf += b
+        self.bytes_written += len(b)
+        while len(self._buf) >= self.part_size:
+            self._upload_part(bytes(self._buf[: self.part_size]))
+            del self._buf[: self.part_size]
+        return len(b)
+
+    def _upload_part(self, data: bytes) -> None:
+        n = len(self._parts) + 1
+        resp = self.s3.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=n, Body=data
+        )
+        self._parts.append({"PartNumber": n, "ETag": resp["ETag"]})
+        self.bytes_uploaded += len(data)
+
+    def commit(self) -> None:
+        if self.closed:
+            raise ValueError("commit() on a closed S3MultipartWriter")
+        # The last part may be smaller than 5 MiB (and an empty object still needs one part).
+        if self._buf or not self._parts:
+            self._upload_part(bytes(self._buf))
+            self._buf.clear()
+        self.s3.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+        super().close()
+
+    def abort(self) -> None:
+        if self.closed:
+            return
+        self._buf.clear()
+        try:
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+        finally:
+            super().close()
+
+    def close(self) -> None:
+        self.abort()
+
+
+def write_jsonl_gz(records: Iterable[Dict[str, Any]], sink, compress: bool = True) -> int:
+    """Write records as (gzip) JSONL into binary `sink`; returns the record count."""
+    count = 0
+    out = gzip.GzipFile(fileobj=sink, mode="wb", mtime=0) if compress else sink
+    try:
+        for r in records:
+            out.write((json.dumps(r) + "\n").encode("utf-8"))
+            count += 1
+    finally:
+        if compress:
+            out.close()  # flushes the gzip trailer into sink; does not close sink
+    return count
@@ -0,0 +1,269 @@
+"""
+Local stub of the fare APIs, for offline tests and benchmarks.
+
+Serves:
+- `/aviasales/v3/get_latest_prices` (Travelpayouts, used by `ingestion/collector.py`)
+- `/fares?date=YYYY-MM-DD` (generic API, used by `ingestion/ingest_api_to_s3.py`)
+
+Knobs (see `StubConfig`): payload size, lognormal latency, 400 for invalid codes,
+500 for failing origins, an initial run of 429s and periodic 429 bursts with
+`Retry-After`, and ETag / If-None-Match (304) support.
+
+Run standalone:
+  python -m ingestion.stub_api --port 8765 --latency-ms 40 --burst-429-every 200
+  TRAVELPAYOUTS_BASE_URL=http://127.0.0.1:8765 python -m ingestion.collector ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+GATES = ("aviasales", "kiwi.com", "trip.com", "mytrip", "gotogate")
+AIRLINES = ("DL", "UA", "AA", "BA", "AF", "EK")
+
+
+@dataclass
+class StubConfig:
+    rows_per_route: int = 50
+    fares_rows: int = 1000
+    latency_ms: float = 0.0  # median; 0 disables
+    latency_sigma: float = 0.5  # lognormal spread
+    invalid_codes: Tuple[str, ...] = ("XXX",)
+    error_origins: Tuple[str, ...] = ()
+    initial_429: int = 0  # first N requests get 429
+    burst_429_every: int = 0  # after every N requests ...
+    burst_429_len: int = 5  # ... the next `burst_429_len` get 429
+    retry_after_sec: float = 1.0
+    etag: bool = True
+    seed: int = 7
+
+
+@dataclass
+class StubStats:
+    requests: int = 0
+    by_status: Counter = field(default_factory=Counter)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def next_request(self) -> int:
+        with self.lock:
+            self.requests += 1
+            return self.requests
+
+    def record(self, status: int) -> None:
+        with self.lock:
+            self.by_status[status] += 1
+
+
+def _route_fares(cfg: StubConfig, origin: str, dest: str) -> list:
+    rng = random.Random(zlib.crc32(f"{cfg.seed}:{origin}-{dest}".encode()))
+    today = date.today()
+    base = rng.uniform(150, 1200)
+    data = []
+    for _ in range(cfg.rows_per_route):
+        dep = today + timedelta(days=rng.randint(1, 180))
+        data.append({
+            "origin": origin,
+            "destination": dest,
+            "depart_date": dep.isoformat(),
+            "value": round(base * rng.uniform(0.7, 1.6), 2),
+            "gate": rng.choice(GATES),
+            "trip_class": 0,
+            "number_of_changes": rng.randint(0, 2),
+        })
+    return data
+
+
+def _fares_record(rng: random.Random, run_date: str) -> dict:
+    origin, dest = rng.sample(("JFK", "LAX", "SFO", "ATL", "ORD", "LHR", "CDG", "DXB"), 2)
+    dep = date.fromisoformat(run_date) + timedelta(days=rng.randint(1, 180))
+    return {
+        "snapshot_date": run_date,
+        "origin": origin,
+        "dest": dest,
+        "depart_date": dep.isoformat(),
+        "airline": rng.choice(AIRLINES),
+        "cabin": "ECON",
+        "price_usd": round(rng.uniform(90, 1500), 2),
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cfg: StubConfig
+    stats: StubStats
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[dict] = None) -> None:
+        self.stats.record(status)
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _sleep_latency(self) -> None:
+        if self.cfg.latency_ms > 0:
+            median = math.log(self.cfg.latency_ms / 1000)
+            time.sleep(random.lognormvariate(median, self.cfg.latency_sigma))
+
+    def _throttled(self, n: int) -> bool:
+        cfg = self.cfg
+        if n <= cfg.initial_429:
+            return True
+        if cfg.burst_429_every > 0:
+            k = n - cfg.initial_429 - 1
+            return k % (cfg.burst_429_every + cfg.burst_429_len) >= cfg.burst_429_every
+        return False
+
+    def do_GET(self) -> None:
+        n = self.stats.next_request()
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self._sleep_latency()
+
+        if self._throttled(n):
+            self._send(429, headers={"Retry-After": f"{self.cfg.retry_after_sec:g}"})
+        elif url.path == "/aviasales/v3/get_latest_prices":
+            self._latest_prices(q)
+        elif url.path == "/fares":
+            self._fares(q)
+        else:
+            self._send(404)
+
+    def _latest_prices(self, q: dict) -> None:
+        origin, dest = q.get("origin", ""), q.get("destination", "")
+        if origin in self.cfg.invalid_codes or dest in self.cfg.invalid_codes:
+            self._send(400, b'{"success": false, "error": "invalid code"}')
+            return
+        if origin in self.cfg.error_origins:
+            self._send(500)
+            return
+
+        etag = f'"{self.cfg.seed}-{origin}-{dest}-{date.today().isoformat()}"'
+        if self.cfg.etag and self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+
+        body = json.dumps({"success": True, "data": _route_fares(self.cfg, origin, dest)}).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.cfg.etag:
+            headers["ETag"] = etag
+        self._send(200, body, headers)
+
+    def _fares(self, q: dict) -> None:
+        # Chunked transfer: the stub never holds the whole (possibly huge) body either.
+        run_date = q.get("date") or date.today().isoformat()
+        rng = random.Random(zlib.crc32(f"{self.cfg.seed}:{run_date}".encode()))
+        self.stats.record(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        chunk(b'{"count": %d, "results": [' % self.cfg.fares_rows)
+        batch = []
+        for i in range(self.cfg.fares_rows):
+            batch.append(("," if i else "") + json.dumps(_fares_record(rng, run_date)))
+            if len(batch) == 500:
+                chunk("".join(batch).encode())
+                batch = []
+        chunk(("".join(batch) + "]}").encode())
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients dropping keep-alive connections at shutdown is expected noise.
+        if not isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """Threaded stub server on 127.0.0.1 (port 0 = pick a free one)."""
+
+    def __init__(self, cfg: Optional[StubConfig] = None, port: int = 0) -> None:
+        self.cfg = cfg or StubConfig()
+        self.stats = StubStats()
+        handler = type("BoundStubHandler", (StubHandler,), {"cfg": self.cfg, "stats": self.stats})
+        self._server = _QuietServer(("127.0.0.1", port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Local stub of the fare APIs")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--rows-per-route", type=int, default=StubConfig.rows_per_route)
+    ap.add_argument("--fares-rows", type=int, default=StubConfig.fares_rows)
+    ap.add_argument("--latency-ms", type=float, default=StubConfig.latency_ms)
+    ap.add_argument("--latency-sigma", type=float, default=StubConfig.latency_sigma)
+    ap.add_argument("--initial-429", type=int, default=0)
+    ap.add_argument("--burst-429-every", type=int, default=0)
+    ap.add_argument("--burst-429-len", type=int, default=StubConfig.burst_429_len)
+    ap.add_argument("--retry-after", type=float, default=StubConfig.retry_after_sec)
+    args = ap.parse_args()
+
+    cfg = StubConfig(
+        rows_per_route=args.rows_per_route,
+        fares_rows=args.fares_rows,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        initial_429=args.initial_429,
+        burst_429_every=args.burst_429_every,
+        burst_429_len=args.burst_429_len,
+        retry_after_sec=args.retry_after,
+    )
+    server = StubServer(cfg, port=args.port)
+    print(f"[OK] stub fare API on {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,223 @@
+"""
+Request throttling shared by the fare collectors.
+
+A single `TokenBucket` is shared by every worker thread so the whole run stays
+under one requests/sec budget, no matter how many routes are in flight.
+`AdaptiveThrottle` adds AIMD in-flight control, `Retry-After` handling and
+per-origin circuit breakers on top of it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/sec, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.capacity = float(burst) if burst is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available; otherwise return seconds to wait (0.0 == acquired)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until `tokens` are available."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """`Retry-After` as seconds (delta-seconds or HTTP-date); None if missing/invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while a key's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-key (origin) breaker.
+
+    `failure_threshold` consecutive failures open the circuit for `reset_after_sec`;
+    after that one trial request is let through (half-open) and its outcome decides.
+    A throttled (429) trial says nothing about the origin: `cancel_trial` lets the
+    next request try again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_after_sec: float = 60.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_after_sec = reset_after_sec
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        with self._lock:
+            opened = self._opened_at.get(key)
+            if opened is None:
+                return True
+            if time.monotonic() - opened < self.reset_after_sec or self._trial.get(key):
+                return False
+            self._trial[key] = True  # half-open: exactly one trial request
+            return True
+
+    def record_success(self, key: str) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+            self._opened_at.pop(key, None)
+            self._trial.pop(key, None)
+
+    def cancel_trial(self, key: str) -> None:
+        with self._lock:
+            self._trial.pop(key, None)
+
+    def record_failure(self, key: str) -> None:
+        with self._lock:
+            n = self._failures.get(key, 0) + 1
+            self._failures[key] = n
+            if n >= self.failure_threshold or self._trial.get(key):
+                self._opened_at[key] = time.monotonic()
+                self._trial.pop(key, None)
+
+    def open_keys(self) -> Tuple[str, ...]:
+        with self._lock:
+            return tuple(sorted(self._opened_at))
+
+
+class AdaptiveThrottle:
+    """
+    One shared controller for every in-flight API call.
+
+    - requests/sec ceiling: `TokenBucket`
+    - in-flight limit: AIMD (+1 per window of successes, x`backoff_factor` on 429 or on
+      latency above `latency_tolerance` x the best latency seen, ignoring anything
+      under `latency_floor_sec`)
+    - 429 `Retry-After`: pauses *all* workers until the deadline, not just the one retrying
+    - per-origin `CircuitBreaker` so a dead origin stops burning quota
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        backoff_factor: float = 0.5,
+        latency_tolerance: float = 3.0,
+        latency_floor_sec: float = 0.5,
+        default_retry_after_sec: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.bucket = TokenBucket(rate)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.backoff_factor = backoff_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_floor_sec = latency_floor_sec
+        self.default_retry_after_sec = default_retry_after_sec
+        self.breaker = breaker or CircuitBreaker()
+
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self._best_latency: Optional[float] = None
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    # ── slots ────────────────────────────────────────────────────────────────
+    def acquire(self, key: str) -> None:
+        """Wait for cooldown, a concurrency slot and a rate token. Raises CircuitOpenError."""
+        if not self.breaker.allow(key):
+            raise CircuitOpenError(f"circuit open for {key}")
+
+        with self._cond:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    self._cond.wait(pause)
+                    continue
+                if self.in_flight < int(self.limit):
+                    break
+                self._cond.wait()
+            self.in_flight += 1
+
+        self.bucket.acquire()
+
+    def release(
+        self, key: str, outcome: str, latency: float, retry_after: Optional[float] = None
+    ) -> None:
+        """Report one finished call. `outcome` is "ok", "throttled" or "error"."""
+        if outcome == "ok":
+            self.breaker.record_success(key)
+        elif outcome == "error":
+            self.breaker.record_failure(key)
+        else:
+            self.breaker.cancel_trial(key)
+
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+
+            if outcome == "throttled":
+                self.throttled += 1
+                wait = retry_after if retry_after is not None else self.default_retry_after_sec
+                self._paused_until = max(self._paused_until, now + wait)
+                self._decrease(now)
+            elif outcome == "ok":
+                if self._best_latency is None or latency < self._best_latency:
+                    self._best_latency = latency
+                slow = max(self.latency_tolerance * self._best_latency, self.latency_floor_sec)
+                if latency > slow:
+                    self._decrease(now)
+                else:
+                    self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+
+            self._cond.notify_all()
+
+    def _decrease(self, now: float) -> None:
+        # At most one multiplicative cut per cooldown window, so one burst of 429s
+        # from N in-flight calls does not collapse the limit N times.
+        if now - self._last_decrease < max(self.default_retry_after_sec, 0.5):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_concurrency), self.limit * self.backoff_factor)
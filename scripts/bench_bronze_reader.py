@@ -0,0 +1,87 @@
+"""Benchmark the partition-aware bronze reader against the old sequential read.
+
+Generates N synthetic `dt=YYYY-MM-DD/fares.csv` partitions (collector layout) in a
+temp dir, then times:
+  - sequential: glob + pd.read_csv per file (no dtypes) + pd.concat  (old reader)
+  - parallel:   transform.bronze_to_silver.read_bronze_csvs (pyarrow, declared types)
+
+Run:
+  python scripts/bench_bronze_reader.py
+  python scripts/bench_bronze_reader.py --partitions 400 --rows 5000 --workers 16
+"""
+
+import argparse
+import csv
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from ingestion.collector import BRONZE_HEADER  # noqa: E402
+from transform.bronze_to_silver import read_bronze_csvs  # noqa: E402
+
+CODES = ("JFK", "LAX", "SFO", "ATL", "ORD", "LHR", "CDG", "DXB", "HND", "SYD")
+GATES = ("aviasales", "kiwi.com", "trip.com", "mytrip")
+
+
+def make_partitions(root: Path, n: int, rows: int) -> None:
+    rng = random.Random(7)
+    first = date(2025, 1, 1)
+    for i in range(n):
+        day = (first + timedelta(days=i)).isoformat()
+        part = root / f"dt={day}"
+        part.mkdir(parents=True)
+        with open(part / "fares.csv", "w", newline="", encoding="utf-8-sig") as fp:
+            w = csv.writer(fp)
+            w.writerow(BRONZE_HEADER)
+            for _ in range(rows):
+                o, d = rng.sample(CODES, 2)
+                dep = (first + timedelta(days=i + rng.randint(1, 180))).isoformat()
+                w.writerow([day, o, d, dep, round(rng.uniform(80, 1500), 2),
+                            f"{day}T02:10:00Z", rng.choice(GATES), 0, rng.randint(0, 2)])
+
+
+def read_sequential(root: Path) -> pd.DataFrame:
+    return pd.concat([pd.read_csv(f) for f in sorted(root.glob("dt=*/fares.csv"))],
+                     ignore_index=True)
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - started
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--partitions", type=int, default=300)
+    ap.add_argument("--rows", type=int, default=2000, help="Rows per partition")
+    ap.add_argument("--workers", type=int, default=8)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_partitions(root, args.partitions, args.rows)
+
+        old, t_old = timed(read_sequential, root)
+        new, t_new = timed(read_bronze_csvs, root, workers=args.workers)
+        assert len(old) == len(new)
+
+        mem_old = old.memory_usage(deep=True).sum() / 1e6
+        mem_new = new.memory_usage(deep=True).sum() / 1e6
+        print(f"partitions={args.partitions} rows={len(new)} workers={args.workers}")
+        print(f"sequential pd.read_csv  {t_old:8.2f}s  {mem_old:8.1f} MB")
+        print(f"read_bronze_csvs        {t_new:8.2f}s  {mem_new:8.1f} MB  "
+              f"speedup x{t_old / t_new:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,176 @@
+"""Offline throughput benchmark for the ingestion clients.
+
+Starts the local stub API (`ingestion/stub_api.py`) and runs
+`collector.write_bronze_snapshot` (once per --concurrency value) and
+`ingest_api_to_s3.fetch_snapshot` (--fetch-runs times) against it. Reports
+routes/sec, rows/sec and client-side p50/p99 request latency (for fetch_snapshot:
+of the whole streamed response, over its runs). Save a run with --json and compare a later
+run against it with --baseline.
+
+Run:
+  python scripts/bench_collector.py
+  python scripts/bench_collector.py --routes 30x30 --concurrency 1,8,32 --latency-ms 40
+  python scripts/bench_collector.py --burst-429-every 200 --json bench_baseline.json
+  python scripts/bench_collector.py --baseline bench_baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from ingestion import collector, ingest_api_to_s3  # noqa: E402
+from ingestion.config import Settings  # noqa: E402
+from ingestion.manifest import read_manifest  # noqa: E402
+from ingestion.stub_api import StubConfig, StubServer  # noqa: E402
+
+
+def iata_codes(n: int, first: str) -> tuple:
+    # Deterministic 3-letter codes: first letter fixed, so origins and dests never collide.
+    return tuple(first + chr(65 + i // 26 % 26) + chr(65 + i % 26) for i in range(n))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+def bench_collector(
+    stub: StubServer, n_origins: int, n_dests: int, concurrency: int, rps: float
+) -> Dict:
+    cfg = collector.Config(
+        api_key="bench",
+        api_base_url=stub.url,
+        origins=iata_codes(n_origins, "O"),
+        dests=iata_codes(n_dests, "D"),
+        days_ahead=365,
+        concurrency=concurrency,
+        requests_per_sec=rps,
+        max_retries=5,
+    )
+    latencies: List[float] = []
+    session = collector.make_session(concurrency)
+    session.hooks["response"].append(lambda r, *a, **k: latencies.append(r.elapsed.total_seconds()))
+
+    requests_before = stub.stats.requests
+    with tempfile.TemporaryDirectory() as tmp, session, contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        out = collector.write_bronze_snapshot(cfg, bronze_root=Path(tmp), session=session)
+        elapsed = time.perf_counter() - started
+        rows = read_manifest(out.parent / "_manifest.json")["files"][out.name]["rows"]
+
+    routes = len(collector.route_pairs(cfg))
+    return {
+        "name": f"collector c={concurrency}",
+        "seconds": round(elapsed, 3),
+        "routes_per_sec": round(routes / elapsed, 1),
+        "rows_per_sec": round(rows / elapsed, 1),
+        "requests": stub.stats.requests - requests_before,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def bench_fetch_snapshot(stub: StubServer, runs: int) -> Dict:
+    # fetch_snapshot reads the module-level settings; point them at the stub for this run.
+    saved = ingest_api_to_s3.settings
+    ingest_api_to_s3.settings = Settings(api_base_url=stub.url, api_key="bench")
+    latencies: List[float] = []  # one whole streamed /fares response per run
+    n = 0
+    try:
+        for _ in range(max(1, runs)):
+            started = time.perf_counter()
+            n += sum(1 for _ in ingest_api_to_s3.iter_snapshot("2026-01-01"))
+            latencies.append(time.perf_counter() - started)
+    finally:
+        ingest_api_to_s3.settings = saved
+    elapsed = sum(latencies)
+    return {
+        "name": "ingest_api_to_s3.fetch_snapshot",
+        "seconds": round(elapsed, 3),
+        "routes_per_sec": None,
+        "rows_per_sec": round(n / elapsed, 1),
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def print_table(results: List[Dict], baseline: Optional[Dict[str, Dict]] = None) -> None:
+    cols = ["seconds", "routes_per_sec", "rows_per_sec", "requests", "p50_ms", "p99_ms"]
+    print(f"{'benchmark':<34}" + "".join(f"{c:>16}" for c in cols))
+    for r in results:
+        cells = []
+        for c in cols:
+            v = r[c]
+            cell = "-" if v is None else f"{v}"
+            base = (baseline or {}).get(r["name"], {}).get(c)
+            if v is not None and base:
+                cell += f" ({(v - base) / base:+.0%})"
+            cells.append(f"{cell:>16}")
+        print(f"{r['name']:<34}" + "".join(cells))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--routes", default="20x20", help="Origins x dests matrix (default 20x20)")
+    ap.add_argument("--concurrency", default="1,4,16", help="Comma list of concurrency values")
+    ap.add_argument("--rps", type=float, default=1000.0, help="Collector requests/sec budget")
+    ap.add_argument("--rows-per-route", type=int, default=StubConfig.rows_per_route)
+    ap.add_argument("--fares-rows", type=int, default=100_000, help="Records served by /fares")
+    ap.add_argument("--fetch-runs", type=int, default=20, help="fetch_snapshot calls timed")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="Median stub latency")
+    ap.add_argument("--latency-sigma", type=float, default=StubConfig.latency_sigma)
+    ap.add_argument("--burst-429-every", type=int, default=0, help="429 burst after N requests")
+    ap.add_argument("--burst-429-len", type=int, default=StubConfig.burst_429_len)
+    ap.add_argument("--retry-after", type=float, default=0.2)
+    ap.add_argument("--json", default=None, help="Write results to this JSON file")
+    ap.add_argument("--baseline", default=None, help="Compare against a previous --json file")
+    args = ap.parse_args()
+
+    n_origins, n_dests = (int(x) for x in args.routes.lower().split("x"))
+    stub_cfg = StubConfig(
+        rows_per_route=args.rows_per_route,
+        fares_rows=args.fares_rows,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        burst_429_every=args.burst_429_every,
+        burst_429_len=args.burst_429_len,
+        retry_after_sec=args.retry_after,
+    )
+
+    results = []
+    with StubServer(stub_cfg) as stub:
+        for c in (int(x) for x in args.concurrency.split(",")):
+            results.append(bench_collector(stub, n_origins, n_dests, c, args.rps))
+        results.append(bench_fetch_snapshot(stub, args.fetch_runs))
+        statuses = dict(stub.stats.by_status)
+
+    baseline = None
+    if args.baseline:
+        baseline = {r["name"]: r for r in json.loads(Path(args.baseline).read_text())["results"]}
+
+    print_table(results, baseline)
+    print(f"stub responses by status: {statuses}")
+
+    if args.json:
+        payload = {"args": vars(args), "results": results}
+        Path(args.json).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"SUCCESS: wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+"""Throughput of the bronze -> silver engines (bronze_to_silver --engine).
+
+Generates N synthetic `dt=YYYY-MM-DD/fares.csv` partitions (collector layout, see
+scripts/bench_bronze_reader.py), reads them once with read_bronze_table, then times
+each engine's clean/cast/dedupe step and checks they return the same rows.
+
+Run:
+  python scripts/bench_engines.py
+  python scripts/bench_engines.py --partitions 400 --rows 20000 --threads 16
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from bench_bronze_reader import make_partitions  # noqa: E402
+from transform.bronze_to_silver import ENGINES, read_bronze_table  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--partitions", type=int, default=200)
+    ap.add_argument("--rows", type=int, default=20000, help="Rows per partition")
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--engines", nargs="+", default=sorted(ENGINES), choices=sorted(ENGINES))
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_partitions(root, args.partitions, args.rows)
+        table = read_bronze_table(root, workers=args.threads)
+
+    print(f"partitions={args.partitions} bronze_rows={table.num_rows} threads={args.threads}")
+    results = {}
+    for engine in args.engines:
+        started = time.perf_counter()
+        df = ENGINES[engine](table, args.threads)
+        sec = time.perf_counter() - started
+        results[engine] = df.drop(columns=["load_ts"]).reset_index(drop=True)
+        print(f"{engine:10} {sec:8.2f}s  {table.num_rows / sec / 1e6:6.2f}M rows/s  "
+              f"silver_rows={len(df)}")
+
+    base = next(iter(results.values()))
+    for engine, df in results.items():
+        if not df.equals(base):
+            print(f"[FAILED] {engine} output differs from {args.engines[0]}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
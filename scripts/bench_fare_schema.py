@@ -0,0 +1,86 @@
+"""Memory / throughput of plain vs compact fare frames (transform/fare_schema.py).
+
+Builds an N-row synthetic silver frame in the old representation (object str
+codes, Python `date` objects, float64 prices, per-row load_ts) and its compact
+form, then times the operations the pipeline runs on them.
+
+Run:
+  python scripts/bench_fare_schema.py
+  python scripts/bench_fare_schema.py --rows 5000000
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from transform.fare_schema import to_compact  # noqa: E402
+from transform.contract import DEDUPE_COLUMNS  # noqa: E402
+
+AIRPORTS = np.array(["JFK", "LAX", "SFO", "ATL", "ORD", "LHR", "CDG", "DXB", "HND", "SYD",
+                     "SEA", "BOS", "MIA", "DFW", "DEN", "FRA", "AMS", "MAD", "IST", "SIN"])
+
+
+def plain_frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    snap = np.datetime64("2026-01-01") + rng.integers(0, 90, n).astype("timedelta64[D]")
+    dep = snap + rng.integers(1, 180, n).astype("timedelta64[D]")
+    return pd.DataFrame({
+        "snapshot_date": pd.Series(snap).dt.date,
+        "origin": AIRPORTS[rng.integers(0, len(AIRPORTS), n)].astype(object),
+        "dest": AIRPORTS[rng.integers(0, len(AIRPORTS), n)].astype(object),
+        "depart_date": pd.Series(dep).dt.date,
+        "price_usd": rng.integers(5000, 150000, n) / 100.0,
+        "gate": np.array(["aviasales", "kiwi.com", "trip.com"], dtype=object)[
+            rng.integers(0, 3, n)],
+        "load_ts": datetime.now(timezone.utc),
+    })
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=3_000_000)
+    args = ap.parse_args()
+
+    plain = plain_frame(args.rows)
+    started = time.perf_counter()
+    compact = to_compact(plain)
+    convert_sec = time.perf_counter() - started
+
+    ops = {
+        "min price by route": lambda df: df.groupby(["origin", "dest"], observed=True)[
+            "price_usd"].min(),
+        "dedupe (silver key)": lambda df: df.drop_duplicates(subset=DEDUPE_COLUMNS, keep="last"),
+        "route filter": lambda df: df[(df["origin"] == "JFK") & (df["dest"] == "LHR")],
+        "sort route/depart": lambda df: df.sort_values(["origin", "dest", "depart_date"]),
+    }
+
+    mb = {name: df.memory_usage(deep=True).sum() / 1e6 for name, df in
+          (("plain", plain), ("compact", compact))}
+    print(f"rows={args.rows}  to_compact: {convert_sec:.2f}s "
+          f"({args.rows / convert_sec / 1e6:.1f}M rows/s)")
+    print(f"{'':24}{'plain':>12}{'compact':>12}")
+    print(f"{'memory (MB)':24}{mb['plain']:12.1f}{mb['compact']:12.1f}"
+          f"   x{mb['plain'] / mb['compact']:.1f} smaller")
+    for name, op in ops.items():
+        t_plain = timed(lambda op=op: op(plain))
+        t_compact = timed(lambda op=op: op(compact))
+        print(f"{name + ' (s)':24}{t_plain:12.2f}{t_compact:12.2f}   x{t_plain / t_compact:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,23 +1,42 @@
-"""Load sample fare data into local Postgres for a runnable demo.
+"""Load bronze fare data into local Postgres `raw.fares` with COPY FROM STDIN.
 
-Creates schemas + raw.fares table (fresh), then loads the newest
-`data/bronze/dt=*/fares.csv` if present, falling back to `data/sample/fares_sample.csv`.
+Creates schemas + raw.fares if missing, empties it (unless --append), then streams
+every selected `data/bronze/dt=*/fares.{csv,jsonl,jsonl.gz,parquet}` partition in
+with warehouse.postgres_copy (collector CSVs go straight from the file, other formats
+via in-memory CSV buffers), falling back to `data/sample/fares_sample.csv` when there
+is no bronze data. All files load in one transaction; rows/sec is reported per file.
 
 Run:
-  python scripts/load_sample_to_postgres.py
+  python scripts/load_sample_to_postgres.py                       # all partitions
+  python scripts/load_sample_to_postgres.py --latest              # newest partition only
+  python scripts/load_sample_to_postgres.py --start 2026-01-01 --end 2026-01-31 --append
 """
 
+import argparse
 import os
+import sys
+import time
 from pathlib import Path
 
-import pandas as pd
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
-from sqlalchemy.types import Date, Integer, Numeric, TIMESTAMP, Text as SqlText
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
 load_dotenv(ROOT / ".env")  # load repo .env reliably
 
+from transform.bronze_reader import bronze_partition_date, find_bronze_files  # noqa: E402
+from warehouse.postgres_copy import (  # noqa: E402
+    CONTROL_DDL,
+    CONTROL_TABLE,
+    RAW_TABLE,
+    bronze_partitions,
+    load_files,
+    load_incremental,
+    loaded_partitions,
+    pending_partitions,
+)
+
 
 def pg_url() -> str:
     host = os.getenv("PGHOST", "localhost")
@@ -34,9 +53,7 @@ create schema if not exists raw;
 create schema if not exists staging;
 create schema if not exists marts;
 
-drop table if exists raw.fares cascade;
-
-create table raw.fares (
+create table if not exists raw.fares (
   snapshot_date date,
   origin varchar(8),
   dest varchar(8),
@@ -50,88 +67,99 @@ create table raw.fares (
 """
 
 
-def resolve_csv_path() -> Path:
+def resolve_bronze_paths(start=None, end=None, latest: bool = False) -> list:
     bronze_dir = ROOT / "data" / "bronze"
-    bronze_candidates = sorted(bronze_dir.glob("dt=*/fares.csv"))
-    if bronze_candidates:
-        return bronze_candidates[-1]
+    files = [
+        p for p in find_bronze_files(bronze_dir, start=start, end=end) if p.parent != bronze_dir
+    ]
+    if files and latest:
+        newest = files[-1].parent  # one dt= directory per partition
+        return [p for p in files if p.parent == newest]
+    if files:
+        return files
 
-    return ROOT / "data" / "sample" / "fares_sample.csv"
+    return [ROOT / "data" / "sample" / "fares_sample.csv"]
 
 
-def main() -> None:
-    engine = create_engine(pg_url(), future=True)
-
-    csv_path = resolve_csv_path()
-    if not csv_path.exists():
-        raise FileNotFoundError(f"CSV not found: {csv_path}")
-
-    df = pd.read_csv(csv_path)
-    df.columns = [c.strip().lower() for c in df.columns]  # normalize headers
-
-    # Align to expected raw.fares schema
-    if "gate" not in df.columns and "airline" in df.columns:
-        df["gate"] = df["airline"]
-
-    for missing_col in ["trip_class", "number_of_changes"]:
-        if missing_col not in df.columns:
-            df[missing_col] = pd.NA
-
-    expected_cols = [
-        "snapshot_date",
-        "origin",
-        "dest",
-        "depart_date",
-        "price_usd",
-        "scrape_ts",
-        "gate",
-        "trip_class",
-        "number_of_changes",
-    ]
-    for col in expected_cols:
-        if col not in df.columns:
-            df[col] = pd.NA
-    df = df[expected_cols]
+def load_partitions_incremental(engine, files, workers: int, force: bool) -> None:
+    partitions = bronze_partitions(files)
+    for path in files:
+        if bronze_partition_date(path) is None:
+            print(f"[WARN] Not a dt=YYYY-MM-DD partition, skipped in --incremental: {path}")
 
-    # Parse/clean types (safe even if some values are missing/bad)
-    for col in ["snapshot_date", "depart_date", "scrape_ts"]:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce")
+    raw = engine.raw_connection()
+    try:
+        todo = pending_partitions(partitions, loaded_partitions(raw), force)
+    finally:
+        raw.close()
 
-    if "price_usd" in df.columns:
-        df["price_usd"] = pd.to_numeric(df["price_usd"], errors="coerce")
+    started = time.perf_counter()
+    stats = load_incremental(engine.raw_connection, todo, workers=workers)
+    elapsed = time.perf_counter() - started
 
-    if "trip_class" in df.columns:
-        df["trip_class"] = pd.to_numeric(df["trip_class"], errors="coerce").astype("Int64")
+    for s in stats:
+        print(f"[OK] {s.rows:>9} rows  {s.rows_per_sec:>10,.0f} rows/s  {s.path}")
+    total = sum(s.rows for s in stats)
+    print(
+        f"[OK] Replaced {len(stats)} partition(s), {total} rows, skipped "
+        f"{len(partitions) - len(todo)} unchanged in {elapsed:.2f}s"
+    )
 
-    if "number_of_changes" in df.columns:
-        df["number_of_changes"] = pd.to_numeric(df["number_of_changes"], errors="coerce").astype("Int64")
 
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--start", default=None, help="first dt=YYYY-MM-DD partition to load")
+    ap.add_argument("--end", default=None, help="last dt=YYYY-MM-DD partition to load")
+    ap.add_argument("--latest", action="store_true", help="only load the newest partition")
+    ap.add_argument("--append", action="store_true", help="keep existing raw.fares rows")
+    ap.add_argument(
+        "--recreate", action="store_true", help="drop + recreate raw.fares (schema changes)"
+    )
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only replace new/changed snapshot_date partitions (tracked in raw.loaded_partitions)",
+    )
+    ap.add_argument("--force", action="store_true", help="--incremental: reload unchanged too")
+    ap.add_argument("--workers", type=int, default=4, help="--incremental: parallel partitions")
+    args = ap.parse_args()
+
+    files = resolve_bronze_paths(args.start, args.end, args.latest)
+    missing = [p for p in files if not p.exists()]
+    if missing:
+        raise FileNotFoundError(f"Bronze file not found: {missing[0]}")
+
+    workers = max(1, args.workers)
+    engine = create_engine(pg_url(), future=True, pool_size=workers, max_overflow=0)
     with engine.begin() as conn:
+        if args.recreate:
+            conn.execute(text(f"drop table if exists {RAW_TABLE} cascade"))
         conn.execute(text(DDL))
-
-        df.to_sql(
-            "fares",
-            con=conn,
-            schema="raw",
-            if_exists="append",
-            index=False,
-            method="multi",
-            chunksize=1000,
-            dtype={
-                "snapshot_date": Date(),
-                "origin": SqlText(),
-                "dest": SqlText(),
-                "depart_date": Date(),
-                "price_usd": Numeric(10, 2),
-                "scrape_ts": TIMESTAMP(timezone=True),
-                "gate": SqlText(),
-                "trip_class": Integer(),
-                "number_of_changes": Integer(),
-            },
-        )
-
-    print(f"Loaded {len(df)} rows into raw.fares from {csv_path}")
+        conn.execute(text(CONTROL_DDL))
+        if args.recreate or not (args.incremental or args.append):
+            # Full reload: forget partitions so the next --incremental run re-checks all.
+            conn.execute(text(f"truncate {CONTROL_TABLE}"))
+
+    if args.incremental:
+        load_partitions_incremental(engine, files, workers, args.force)
+        return
+
+    started = time.perf_counter()
+    raw = engine.raw_connection()  # psycopg2 connection: COPY needs cursor.copy_expert
+    try:
+        stats = load_files(raw, files, truncate=not args.append)
+    finally:
+        raw.close()
+    elapsed = time.perf_counter() - started
+
+    for s in stats:
+        print(f"[OK] {s.rows:>9} rows  {s.rows_per_sec:>10,.0f} rows/s  {s.mode:<8}  {s.path}")
+    total = sum(s.rows for s in stats)
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"[OK] Loaded {total} rows into {RAW_TABLE} from {len(stats)} file(s) "
+        f"in {elapsed:.2f}s ({rate:,.0f} rows/s)"
+    )
 
 
 if __name__ == "__main__":
@@ -1,23 +1,46 @@
 """Run analysis SQL queries against the local Postgres database.
 
-Assumes dbt build has created marts.fact_fares and dims.
+Assumes dbt build has created marts.fact_fares and dims. The queries are
+independent (read-only), so they run concurrently on pooled connections via
+warehouse/sql_runner.py. Results stream through server-side cursors in batches of
+--batch-size rows into analytics/outputs/<query>.csv.
+
+A query is not re-executed when its text and the marts.fact_fares watermark
+(row count, max scrape_ts, max snapshot_date, price sum and row-hash sum) match the
+last run that wrote its CSV (warehouse/result_cache.py); --no-cache forces every
+query to run.
 
 Run:
   python scripts/run_analysis_queries.py
+  python scripts/run_analysis_queries.py --workers 2 --report analytics/outputs/run_report.json
 """
+import argparse
 import os
-import csv
+import sys
+import threading
 from pathlib import Path
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 
 load_dotenv()
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
 ANALYSIS_DIR = ROOT / "sql" / "analysis"
 OUTPUT_DIR = ROOT / "analytics" / "outputs"
 
+from warehouse.result_cache import (  # noqa: E402
+    DEFAULT_BATCH_SIZE,
+    cached_entry,
+    load_cache,
+    query_key,
+    save_cache,
+    stream_to_csv,
+    watermark,
+)
+from warehouse.sql_runner import format_result, plan_scripts, run_scripts, write_report  # noqa: E402
+
 QUERY_FILES = [
     "route_price_trends.sql",
     "lead_time_buckets.sql",
@@ -35,36 +58,105 @@ def pg_url() -> str:
     return f"postgresql+psycopg2://{user}:{pwd}@{host}:{port}/{db}"
 
 
-def run_file(conn, path: Path, output_dir: Path) -> None:
-    sql = path.read_text(encoding="utf-8")
+def output_path(output_dir: Path, name: str, index: int) -> Path:
+    stem = Path(name).stem
+    return output_dir / (f"{stem}.csv" if index == 0 else f"{stem}_{index}.csv")
+
+
+def csv_streamer(output_dir: Path, batch_size: int, previews: dict):
+    """sql_runner on_rows hook: stream result rows to CSV, keep the first 20 for printing."""
+    lock = threading.Lock()
+
+    def on_rows(script, index, cur) -> int:
+        path = output_path(output_dir, script.name, index)
+        preview: list = []
+        rows = stream_to_csv(cur, path, batch_size, preview)
+        with lock:
+            previews.setdefault(script.name, []).append((path, preview))
+        return rows
 
-    result = conn.execute(text(sql))
-    rows = result.fetchall()
-    columns = list(result.keys())
+    return on_rows
 
-    print(f"\n--- {path.name} ({len(rows)} rows) ---")
-    for r in rows[:20]:
-        print(tuple(r))
 
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / f"{path.stem}.csv"
-    with output_path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(columns)
-        writer.writerows(rows)
+def server_side_cursor(batch_size: int):
+    def factory(conn, script, index):
+        cur = conn.cursor(name=f"analysis_{Path(script.name).stem}_{index}")
+        cur.itersize = batch_size
+        return cur
 
-    print(f"SUCCESS: wrote {output_path}")
+    return factory
 
 
 def main() -> None:
-    engine = create_engine(pg_url())
-    with engine.begin() as conn:
-        for filename in QUERY_FILES:
-            path = ANALYSIS_DIR / filename
-            try:
-                run_file(conn, path, OUTPUT_DIR)
-            except Exception as exc:
-                print(f"FAILED: {path.name} -> {exc}")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=4, help="queries run at once")
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per fetch")
+    ap.add_argument("--no-cache", action="store_true", help="re-run every query")
+    ap.add_argument("--report", default=None, help="write a JSON run report here")
+    args = ap.parse_args()
+
+    queries = [(name, (ANALYSIS_DIR / name).read_text(encoding="utf-8")) for name in QUERY_FILES]
+    workers = max(1, args.workers)
+    engine = create_engine(pg_url(), pool_size=workers, max_overflow=0)
+
+    conn = engine.raw_connection()
+    try:
+        mark = watermark(conn)
+    finally:
+        conn.close()
+    if mark is None:
+        print("[WARN] marts.fact_fares watermark unavailable: result cache disabled")
+
+    cache = {} if args.no_cache else load_cache(OUTPUT_DIR)
+    keys = {name: query_key(sql, mark) for name, sql in queries} if mark else {}
+    cached = {
+        name: entry for name, _ in queries
+        if name in keys and (entry := cached_entry(cache, OUTPUT_DIR, name, keys[name]))
+    }
+    for name, entry in cached.items():
+        print(f"CACHED: {name} ({entry['rows']} rows, {entry['csv']})")
+
+    previews: dict = {}
+
+    def on_done(result) -> None:
+        print(f"\n{format_result(result)}")
+        for path, rows in previews.get(result.name, []):
+            for r in rows:
+                print(tuple(r))
+            print(f"SUCCESS: wrote {path}")
+
+    report = run_scripts(
+        plan_scripts([q for q in queries if q[0] not in cached], serial_default=False),
+        engine.raw_connection,
+        workers=workers,
+        on_rows=csv_streamer(OUTPUT_DIR, args.batch_size, previews),
+        on_done=on_done,
+        cursor_factory=server_side_cursor(args.batch_size),
+    )
+    report["cached"] = sorted(cached)
+
+    for result in report["scripts"]:
+        if result["status"] == "ok" and result["name"] in keys and result["statements"]:
+            cache[result["name"]] = {
+                "key": keys[result["name"]],
+                "rows": result["statements"][-1]["rowcount"],
+                "csv": output_path(OUTPUT_DIR, result["name"], 0).name,
+            }
+    if keys:
+        save_cache(OUTPUT_DIR, cache)
+
+    print("\nquery                        status     seconds       rows")
+    by_name = {r["name"]: r for r in report["scripts"]}
+    for name, _ in queries:
+        if name in cached:
+            print(f"{name:<28} {'cached':<8} {0.0:>9.3f} {cached[name]['rows']:>10}")
+            continue
+        r = by_name[name]
+        rows = sum(max(s["rowcount"], 0) for s in r["statements"])
+        print(f"{name:<28} {r['status']:<8} {r['seconds']:>9.3f} {rows:>10}")
+    print(f"Finished {len(queries)} queries ({len(cached)} cached) in {report['seconds']:.2f}s")
+    if args.report:
+        print(f"Report: {write_report(report, Path(args.report))}")
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,9 @@
-"""Optional Spark job placeholder: bronze (raw) -> silver (curated Parquet)."""
+"""Optional Spark job placeholder: bronze (raw) -> silver (curated Parquet).
+
+The clean/cast/dedupe rules are defined once behind the engine interface in
+transform/bronze_to_silver.py (`ENGINES`: bronze pyarrow Table -> compact silver
+frame); transform/engines.py has the DuckDB version as SQL. A Spark engine would
+port that SQL and write the same snapshot_date= layout (transform/silver_dataset.py).
+"""
 
 # TODO: implement when you add Spark (Glue job or local PySpark)
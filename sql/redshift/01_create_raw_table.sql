@@ -1,4 +1,6 @@
 drop table if exists "raw".fares;
+-- Recreating raw.fares empties it: forget which partitions were loaded (manifest COPY).
+drop table if exists "raw".load_audit;
 
 create table "raw".fares (
   snapshot_date date,
@@ -0,0 +1,13 @@
+-- Rendered by: python warehouse/run_redshift_sql.py --start YYYY-MM-DD --end YYYY-MM-DD
+-- One COPY over a manifest listing every bronze partition in the range, so Redshift
+-- spreads the files across slices; the audit rows commit in the same transaction.
+copy {{REDSHIFT_SCHEMA_RAW}}.fares
+from '{{MANIFEST_URL}}'
+iam_role '{{IAM_ROLE_ARN}}'
+manifest
+{{COPY_FORMAT}}
+region '{{AWS_REGION}}';
+
+insert into {{REDSHIFT_SCHEMA_RAW}}.load_audit (snapshot_date, source_url, format, manifest_url)
+values
+{{AUDIT_ROWS}};
@@ -0,0 +1,32 @@
+-- Rendered by: python warehouse/run_redshift_sql.py --start YYYY-MM-DD --end YYYY-MM-DD --format parquet
+-- Collector Parquet (ingestion/collector.py ParquetBronzeWriter) stores price_usd as a
+-- double, which COPY does not load into raw.fares.price_usd decimal(10,2): the files land
+-- in a stage table with the Parquet column types (matched by position, BRONZE_HEADER
+-- order) and are cast on insert. Audit rows commit in the same transaction.
+create temp table fares_parquet_stage (
+  snapshot_date date,
+  origin varchar(8),
+  dest varchar(8),
+  depart_date date,
+  price_usd double precision,
+  scrape_ts timestamp,
+  gate varchar(256),
+  trip_class smallint,
+  number_of_changes smallint
+);
+
+copy fares_parquet_stage
+from '{{MANIFEST_URL}}'
+iam_role '{{IAM_ROLE_ARN}}'
+manifest
+{{COPY_FORMAT}}
+region '{{AWS_REGION}}';
+
+insert into {{REDSHIFT_SCHEMA_RAW}}.fares
+select snapshot_date, origin, dest, depart_date, round(price_usd, 2)::decimal(10,2),
+       scrape_ts, gate, trip_class, number_of_changes
+from fares_parquet_stage;
+
+insert into {{REDSHIFT_SCHEMA_RAW}}.load_audit (snapshot_date, source_url, format, manifest_url)
+values
+{{AUDIT_ROWS}};
@@ -1,3 +1,4 @@
+-- depends: 02_copy_from_s3.sql
 
 
 select count(*) as raw_cnt from bronze.fares;
@@ -1,3 +1,4 @@
+-- depends: 02_copy_from_s3.sql
 -- Proof queries after dbt build (row counts)
 -- Replace {{REDSHIFT_SCHEMA_RAW}} if you use a different raw schema.
 select '{{REDSHIFT_SCHEMA_RAW}}.fares' as table_name, count(*) as row_count from {{REDSHIFT_SCHEMA_RAW}}.fares
@@ -0,0 +1,115 @@
+import gzip
+import json
+
+import pandas as pd
+import pyarrow as pa
+
+from ingestion.collector import BRONZE_HEADER, ParquetBronzeWriter
+from transform.bronze_reader import find_bronze_files, iter_bronze_batches, read_bronze_file
+
+
+def _write_mixed_bronze(root):
+    (root / "dt=2026-01-01").mkdir(parents=True)
+    (root / "dt=2026-01-01" / "fares.csv").write_text(
+        ",".join(BRONZE_HEADER) + "\n"
+        "2026-01-01,JFK,LHR,2026-03-01,450.5,2026-01-01T02:10:00Z,aviasales,0,1\n",
+        encoding="utf-8",
+    )
+    (root / "dt=2026-01-02").mkdir()
+    writer = ParquetBronzeWriter(root / "dt=2026-01-02" / "fares.parquet")
+    writer.write_rows(
+        [["2026-01-02", "JFK", "LHR", "2026-03-01", 440.0, "2026-01-02T02:10:00Z", "kiwi", 0, ""]]
+    )
+    writer.close()
+    (root / "dt=2026-01-03").mkdir()
+    with gzip.open(root / "dt=2026-01-03" / "fares.jsonl.gz", "wt", encoding="utf-8") as fp:
+        for dest in ("LAX", "SFO"):
+            fp.write(json.dumps({
+                "snapshot_date": "2026-01-03", "origin": "ATL", "dest": dest,
+                "depart_date": "2026-02-14", "airline": "DL", "cabin": "ECON",
+                "price_usd": 215, "scrape_ts": "2026-01-03T02:49:36Z",
+            }) + "\n")
+    (root / "notes.txt").write_text("not bronze", encoding="utf-8")
+
+
+def test_mixed_formats_unify_to_one_schema(tmp_path):
+    _write_mixed_bronze(tmp_path)
+    files = find_bronze_files(tmp_path)
+    assert [f.name for f in files] == ["fares.csv", "fares.parquet", "fares.jsonl.gz"]
+
+    tables = [read_bronze_file(f) for f in files]
+    table = pa.concat_tables(tables, promote_options="default")
+    assert table.schema.field("snapshot_date").type == pa.string()
+    assert table.schema.field("origin").type == pa.string()  # parquet dictionary decoded
+    assert table.schema.field("price_usd").type == pa.float64()
+    assert table.schema.field("trip_class").type == pa.int16()
+
+    rows = table.to_pylist()
+    assert [r["snapshot_date"] for r in rows] == ["2026-01-01", "2026-01-02"] + ["2026-01-03"] * 2
+    assert {r["scrape_ts"] for r in rows[:2]} == {
+        "2026-01-01T02:10:00Z", "2026-01-02T02:10:00Z"
+    }
+    assert [r["gate"] for r in rows] == ["aviasales", "kiwi", "DL", "DL"]  # gate <- airline
+    assert rows[1]["number_of_changes"] is None
+    assert rows[3]["cabin"] == "ECON" and rows[3]["price_usd"] == 215.0
+
+
+def test_streaming_blocks_and_column_projection(tmp_path):
+    path = tmp_path / "fares.jsonl"
+    with open(path, "w", encoding="utf-8") as fp:
+        for i in range(2000):
+            fp.write(json.dumps({"Snapshot Date": "2026-01-01", "origin": "JFK", "dest": "LAX",
+                                 "airline": "AA", "price_usd": 100 + i}) + "\n")
+
+    batches = list(iter_bronze_batches(path, block_size=8 * 1024, columns=["price_usd", "gate"]))
+    assert len(batches) > 1
+    assert all(b.column_names == ["price_usd", "gate"] for b in batches)
+    assert sum(b.num_rows for b in batches) == 2000
+    assert batches[-1].column("price_usd").to_pylist()[-1] == 2099.0
+
+
+def test_mixed_history_chunked_matches_full_rebuild(tmp_path):
+    from transform.bronze_to_silver import _clean_and_cast, read_bronze_table, run_chunked
+    from transform.silver_dataset import read_silver, write_silver_dataset
+
+    _write_mixed_bronze(tmp_path / "bronze")
+    write_silver_dataset(_clean_and_cast(read_bronze_table(tmp_path / "bronze").to_pandas()),
+                         tmp_path / "full")
+    run_chunked(tmp_path / "bronze", tmp_path / "chunked", max_memory=1)
+
+    full, chunked = read_silver(tmp_path / "full"), read_silver(tmp_path / "chunked")
+    # airline/cabin only exist in the JSONL partition; the reader unifies file schemas.
+    assert {"airline", "cabin", "gate"} <= set(chunked.columns)
+    cols = sorted(set(full.columns) - {"load_ts"})
+    pd.testing.assert_frame_equal(full[cols], chunked[cols])
+
+
+def test_mixed_formats_in_one_partition_agree_across_modes(tmp_path):
+    from transform.bronze_to_silver import (
+        _clean_and_cast, read_bronze_table, run_chunked, run_incremental,
+    )
+    from transform.silver_dataset import read_silver, write_silver_dataset
+
+    bronze = tmp_path / "bronze"
+    _write_mixed_bronze(bronze)
+    # dt=2026-01-01 now also has fares.jsonl (read before fares.csv), without
+    # scrape_ts/trip_class/number_of_changes and with the csv's key under another gate.
+    with open(bronze / "dt=2026-01-01" / "fares.jsonl", "w", encoding="utf-8") as fp:
+        for dest, gate in (("LHR", "from-jsonl"), ("CDG", "kiwi")):
+            fp.write(json.dumps({
+                "snapshot_date": "2026-01-01", "origin": "JFK", "dest": dest,
+                "depart_date": "2026-03-01", "price_usd": 450.5, "gate": gate,
+            }) + "\n")
+
+    write_silver_dataset(_clean_and_cast(read_bronze_table(bronze).to_pandas()), tmp_path / "full")
+    run_chunked(bronze, tmp_path / "chunked", max_memory=1)
+    run_incremental(bronze, tmp_path / "incremental")
+
+    full = read_silver(tmp_path / "full")
+    cols = sorted(set(full.columns) - {"load_ts"})
+    assert {"scrape_ts", "trip_class", "number_of_changes"} <= set(cols)
+    jfk_lhr = full[(full["snapshot_date"].astype(str) == "2026-01-01") & (full["dest"] == "LHR")]
+    assert jfk_lhr["gate"].tolist() == ["aviasales"]  # the csv row is the later one
+    for mode in ("chunked", "incremental"):
+        got = read_silver(tmp_path / mode)
+        pd.testing.assert_frame_equal(full[cols], got[cols], obj=mode)
@@ -1,3 +1,4 @@
+import pytest
 import pandas as pd
 from transform.bronze_to_silver import _standardize_columns, _clean_and_cast
 
@@ -17,3 +18,179 @@ def test_bronze_to_silver_adds_load_ts_and_cleans():
     assert df.loc[0, "origin"] == "JFK"
     assert df.loc[0, "dest"] == "LAX"
     assert float(df.loc[0, "price_usd"]) > 0
+
+def test_read_bronze_csvs_finds_dt_partitions_and_filters_dates(tmp_path):
+    from transform.bronze_to_silver import read_bronze_csvs
+
+    for day in ("2026-01-01", "2026-01-02", "2026-01-03"):
+        part = tmp_path / f"dt={day}"
+        part.mkdir()
+        (part / "fares.csv").write_text(
+            "﻿snapshot_date,origin,dest,depart_date,price_usd,gate,trip_class\n"
+            f"{day},JFK,LAX,2026-02-01,199.5,kiwi.com,\n",
+            encoding="utf-8",
+        )
+    (tmp_path / "dt=2026-01-02" / "fares.tmp.123.csv").write_text("garbage\n", encoding="utf-8")
+
+    df = read_bronze_csvs(tmp_path, start="2026-01-02", end="2026-01-03", workers=2)
+
+    assert sorted(df["snapshot_date"]) == ["2026-01-02", "2026-01-03"]
+    assert str(df["price_usd"].dtype) == "float64"
+    assert df["trip_class"].isna().all()
+
+def test_incremental_silver_rewrites_only_touched_partitions(tmp_path):
+    from transform.bronze_to_silver import run_incremental
+
+    bronze, dataset = tmp_path / "bronze", tmp_path / "silver"
+    header = "snapshot_date,origin,dest,depart_date,price_usd\n"
+
+    def write(day, body):
+        (bronze / f"dt={day}").mkdir(parents=True, exist_ok=True)
+        (bronze / f"dt={day}" / "fares.csv").write_text(header + body, encoding="utf-8")
+
+    write("2026-01-01", "2026-01-01,JFK,LAX,2026-02-01,199\n2026-01-01,JFK,LAX,2026-02-01,199\n")
+    write("2026-01-02", "2026-01-02,JFK,LAX,2026-02-01,205\n")
+
+    first = run_incremental(bronze, dataset)
+    assert (first["changed"], first["partitions_rewritten"], first["rows_written"]) == (2, 2, 2)
+    assert run_incremental(bronze, dataset)["changed"] == 0
+
+    # A late file re-delivers a 2026-01-01 fare: the 01-01 partition is rebuilt and deduped.
+    write("2026-01-03", "2026-01-03,JFK,SFO,2026-02-03,99\n2026-01-01,JFK,LAX,2026-02-01,199\n")
+    third = run_incremental(bronze, dataset)
+    assert (third["changed"], third["partitions_rewritten"]) == (1, 2)
+
+    df = pd.read_parquet(dataset)
+    counts = df["snapshot_date"].astype(str).value_counts().to_dict()
+    assert counts == {"2026-01-01": 1, "2026-01-02": 1, "2026-01-03": 1}
+
+    # Same key in fares.jsonl and fares.csv of one partition: like a full rebuild (files
+    # in find_bronze_files order, jsonl before csv), the csv row is the one kept.
+    (bronze / "dt=2026-01-02" / "fares.jsonl").write_text(
+        '{"snapshot_date": "2026-01-02", "origin": "JFK", "dest": "LAX", '
+        '"depart_date": "2026-02-01", "price_usd": 205, "gate": "from-jsonl"}\n',
+        encoding="utf-8",
+    )
+    (bronze / "dt=2026-01-02" / "fares.csv").write_text(
+        header.strip() + ",gate\n2026-01-02,JFK,LAX,2026-02-01,205,from-csv\n", encoding="utf-8"
+    )
+    run_incremental(bronze, dataset)
+    assert pd.read_parquet(dataset / "snapshot_date=2026-01-02")["gate"].tolist() == ["from-csv"]
+
+def test_silver_dataset_prunes_partitions_buckets_and_row_groups(tmp_path):
+    from transform.silver_dataset import ScanStats, read_silver, write_silver_dataset
+
+    routes = [(o, d) for o in ("ATL", "JFK", "LAX", "ORD") for d in ("CDG", "LHR", "NRT")]
+    rows = [
+        {"snapshot_date": snap, "origin": o, "dest": d,
+         "depart_date": pd.Timestamp("2026-03-01") + pd.Timedelta(days=i), "price_usd": 100.0 + i}
+        for snap in ("2026-01-01", "2026-01-02")
+        for o, d in routes
+        for i in range(50)
+    ]
+    df = pd.DataFrame(rows)
+    df["depart_date"] = df["depart_date"].dt.date
+    write_silver_dataset(df, tmp_path, buckets=4, row_group_size=50)
+
+    stats = ScanStats()
+    hit = read_silver(tmp_path, origin="JFK", dest="LHR", start="2026-01-02", stats=stats)
+
+    assert len(hit) == 50
+    assert set(hit["origin"]) == {"JFK"} and set(hit["dest"]) == {"LHR"}
+    assert set(hit["snapshot_date"].dt.strftime("%Y-%m-%d")) == {"2026-01-02"}
+    assert stats.row_groups_read == 1
+    assert stats.row_groups_total < len(routes)  # only this route's bucket file was opened
+    assert len(read_silver(tmp_path)) == len(df)
+
+def test_chunked_mode_matches_in_memory_dedupe(tmp_path):
+    from transform.bronze_to_silver import read_bronze_csvs, run_chunked
+    from transform.silver_dataset import read_silver
+
+    bronze = tmp_path / "bronze"
+    lines = ["snapshot_date,origin,dest,depart_date,price_usd,gate"]
+    for i in range(8000):
+        # Every key appears twice with a different gate; dedupe must keep the later row.
+        lines.append(f"2026-01-0{1 + i % 2},JFK,LAX,2026-02-{1 + i % 28:02d},{100 + i % 50},g{i}")
+    lines.append("2026-01-01,JFK,LAX,2026-02-01,-5,bad")
+    (bronze / "dt=2026-01-01").mkdir(parents=True)
+    (bronze / "dt=2026-01-01" / "fares.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    expected = _clean_and_cast(_standardize_columns(read_bronze_csvs(bronze)))
+    stats = run_chunked(bronze, tmp_path / "silver", max_memory=1)  # smallest blocks
+    got = read_silver(tmp_path / "silver")
+
+    assert stats["rows_written"] == len(expected) == len(got)
+    assert stats["block_size"] * 3 < (bronze / "dt=2026-01-01" / "fares.csv").stat().st_size
+    cols = ["snapshot_date", "origin", "dest", "depart_date", "price_usd", "gate"]
+
+    def rows(df):
+        return sorted(map(tuple, df[cols].astype(str).to_numpy().tolist()))
+
+    assert rows(got) == rows(expected)
+
+def test_chunked_mode_keeps_columns_of_mixed_format_partition(tmp_path):
+    import json
+
+    from transform.bronze_to_silver import read_bronze_table, run_chunked
+    from transform.silver_dataset import read_silver, write_silver_dataset
+
+    part = tmp_path / "bronze" / "dt=2026-01-01"
+    part.mkdir(parents=True)
+    # The JSONL file (read first) has no scrape_ts/trip_class/number_of_changes.
+    (part / "fares.jsonl").write_text(json.dumps({
+        "snapshot_date": "2026-01-01", "origin": "ATL", "dest": "LAX",
+        "depart_date": "2026-02-14", "airline": "DL", "price_usd": 215,
+    }) + "\n", encoding="utf-8")
+    (part / "fares.csv").write_text(
+        "snapshot_date,origin,dest,depart_date,price_usd,scrape_ts,gate,trip_class,"
+        "number_of_changes\n"
+        "2026-01-01,JFK,LHR,2026-03-01,450.5,2026-01-01T02:10:00Z,kiwi,0,1\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "bronze" / "dt=2026-01-02").mkdir()
+    (tmp_path / "bronze" / "dt=2026-01-02" / "fares.csv").write_text(
+        "snapshot_date,origin,dest,depart_date,price_usd,gate\n"
+        "2026-01-02,JFK,LHR,2026-03-01,440,kiwi\n",
+        encoding="utf-8",
+    )
+
+    write_silver_dataset(_clean_and_cast(read_bronze_table(tmp_path / "bronze").to_pandas()),
+                         tmp_path / "full")
+    run_chunked(tmp_path / "bronze", tmp_path / "chunked", max_memory=1)
+
+    full, chunked = read_silver(tmp_path / "full"), read_silver(tmp_path / "chunked")
+    assert {"scrape_ts", "trip_class", "number_of_changes", "airline"} <= set(chunked.columns)
+    cols = sorted(set(full.columns) - {"load_ts"})
+    pd.testing.assert_frame_equal(full[cols], chunked[cols])
+
+def test_duckdb_engine_writes_same_silver_as_pandas(tmp_path):
+    pytest.importorskip("duckdb")
+    from transform.bronze_to_silver import ENGINES, read_bronze_table
+    from transform.silver_dataset import read_silver, write_silver_dataset
+
+    bronze = tmp_path / "bronze"
+    for day in ("2026-01-01", "2026-01-02"):
+        (bronze / f"dt={day}").mkdir(parents=True)
+        (bronze / f"dt={day}" / "fares.csv").write_text(
+            "Snapshot Date,origin,dest,depart-date,price_usd,gate,trip_class\n"
+            f"{day}, jfk ,LHR,2026-03-01,450.5,g1,0\n"
+            f"{day},JFK,LHR,2026-03-01,450.5,g2,0\n"  # duplicate key: later row wins
+            f"{day},JFK,LHR,2026-03-02,451,g1,1\n"
+            f"{day},JFKX,LHR,2026-03-02,300,g1,0\n"  # not an IATA code
+            f"{day},SFO,LAX,not-a-date,120,g1,0\n"
+            f"{day},SFO,LAX,2026-03-05,0,g1,0\n"
+            f"{day},SFO,LAX,2026-03-05,,g1,0\n"
+            f"{day},SFO,,2026-03-05,99.99,g1,0\n"
+            f"{day},SFO,LAX,2026-03-05,99.99,g3,2\n",
+            encoding="utf-8",
+        )
+    table = read_bronze_table(bronze, workers=2)
+
+    silver = {}
+    for engine in ("pandas", "duckdb"):
+        df = ENGINES[engine](table, 2)
+        write_silver_dataset(df, tmp_path / engine)
+        silver[engine] = read_silver(tmp_path / engine).drop(columns=["load_ts"])
+
+    assert len(silver["pandas"]) == 6
+    pd.testing.assert_frame_equal(silver["pandas"], silver["duckdb"])
@@ -0,0 +1,222 @@
+import csv
+import time
+
+import pytest
+import requests
+
+from ingestion import collector
+from ingestion.collector import Config, fetch_latest_prices, write_bronze_snapshot
+from ingestion.manifest import read_manifest
+from ingestion.response_cache import ResponseCache
+from ingestion.stub_api import StubConfig, StubServer
+from ingestion.throttle import AdaptiveThrottle, CircuitBreaker, CircuitOpenError, TokenBucket
+
+
+def _fake_fetch(cfg, origin, dest, session, throttle=None, cache=None):
+    if dest == "XXX":
+        return {"success": False, "data": []}
+    return {
+        "success": True,
+        "data": [{"depart_date": "2000-01-01", "value": 100, "gate": "G", "trip_class": 0}],
+    }
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, burst=1)
+    started = time.perf_counter()
+    for _ in range(5):
+        bucket.acquire()
+    # first token is free, the next 4 cost 1/20 s each
+    assert time.perf_counter() - started >= 0.18
+
+
+def test_concurrent_snapshot_writes_every_route(tmp_path, monkeypatch):
+    monkeypatch.setattr(collector, "fetch_latest_prices", _fake_fetch)
+    cfg = Config(
+        api_key="x",
+        origins=("JFK", "LAX", "SFO"),
+        dests=("LHR", "CDG", "XXX"),
+        requests_per_sec=1000,
+        concurrency=4,
+    )
+
+    out = write_bronze_snapshot(cfg, bronze_root=tmp_path)
+
+    with out.open(encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert out.name == "fares.csv"
+    assert sorted((r["origin"], r["dest"]) for r in rows) == sorted(
+        (o, d) for o in ("JFK", "LAX", "SFO") for d in ("LHR", "CDG")
+    )
+    assert not list(out.parent.glob("fares.tmp.*"))
+
+
+@pytest.fixture
+def stub_api():
+    cfg = StubConfig(rows_per_route=1, retry_after_sec=0.2, error_origins=("BAD",))
+    with StubServer(cfg) as server:
+        yield server
+
+
+def test_throttle_honours_retry_after_and_backs_off(stub_api):
+    stub_api.cfg.initial_429 = 1
+    cfg = Config(api_key="x", api_base_url=stub_api.url, max_retries=3)
+    throttle = AdaptiveThrottle(rate=1000, max_concurrency=8)
+
+    started = time.monotonic()
+    with requests.Session() as s:
+        payload = fetch_latest_prices(cfg, "JFK", "LHR", s, throttle)
+
+    assert payload["success"] is True
+    assert time.monotonic() - started >= 0.2
+    assert throttle.throttled == 1
+    assert throttle.limit == 4.0 + 1.0 / 4.0
+
+
+def test_circuit_opens_for_failing_origin(stub_api):
+    cfg = Config(api_key="x", api_base_url=stub_api.url, max_retries=1)
+    throttle = AdaptiveThrottle(rate=1000, max_concurrency=2, breaker=CircuitBreaker(2, 60))
+
+    with requests.Session() as s:
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="API failed"):
+                fetch_latest_prices(cfg, "BAD", "LHR", s, throttle)
+        with pytest.raises(CircuitOpenError):
+            fetch_latest_prices(cfg, "BAD", "CDG", s, throttle)
+        assert fetch_latest_prices(cfg, "JFK", "CDG", s, throttle)["success"] is True
+
+
+def test_throttled_half_open_trial_does_not_wedge_the_circuit(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_after_sec=60)
+    throttle = AdaptiveThrottle(rate=1000, max_concurrency=2, breaker=breaker,
+                                default_retry_after_sec=0)
+    breaker.record_failure("JFK")
+    now[0] = 61.0
+
+    throttle.acquire("JFK")  # the half-open trial
+    throttle.release("JFK", "throttled", 0.1)
+    assert breaker.allow("JFK")  # a new trial, not stuck open forever
+    breaker.record_failure("JFK")
+    assert not breaker.allow("JFK")  # failed trial re-opens with a fresh timer
+    now[0] = 122.0
+    throttle.acquire("JFK")
+    throttle.release("JFK", "ok", 0.1)
+    assert breaker.open_keys() == ()
+
+
+def test_snapshot_survives_429_burst(stub_api, tmp_path):
+    stub_api.cfg.initial_429 = 5
+    cfg = Config(
+        api_key="x",
+        api_base_url=stub_api.url,
+        days_ahead=365,
+        origins=("JFK", "LAX", "SFO"),
+        dests=("LHR", "CDG"),
+        requests_per_sec=1000,
+        concurrency=4,
+        max_retries=4,
+    )
+
+    out = write_bronze_snapshot(cfg, bronze_root=tmp_path)
+
+    with out.open(encoding="utf-8-sig", newline="") as f:
+        assert len(list(csv.DictReader(f))) == 6
+
+
+def test_shards_partition_routes_and_merge(tmp_path, monkeypatch):
+    from ingestion.collector import route_pairs
+    from ingestion.merge_bronze_parts import merge_bronze_parts
+
+    monkeypatch.setattr(collector, "fetch_latest_prices", _fake_fetch)
+    base = dict(api_key="x", origins=("JFK", "LAX", "SFO", "ATL"), dests=("LHR", "CDG", "DXB"))
+
+    all_pairs = route_pairs(Config(**base))
+    shards = [route_pairs(Config(**base, shard_index=i, shard_count=3)) for i in range(3)]
+    assert sorted(p for s in shards for p in s) == sorted(all_pairs)
+
+    parts = [
+        write_bronze_snapshot(Config(**base, shard_index=i, shard_count=3), bronze_root=tmp_path)
+        for i in range(2)
+    ]
+    out_dir = parts[0].parent
+    with pytest.raises(FileNotFoundError, match="fares.part-2.csv"):
+        merge_bronze_parts(out_dir, 3)
+
+    write_bronze_snapshot(Config(**base, shard_index=2, shard_count=3), bronze_root=tmp_path)
+    merged = merge_bronze_parts(out_dir, 3)
+
+    with merged.open(encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert sorted((r["origin"], r["dest"]) for r in rows) == sorted(all_pairs)
+    assert not list(out_dir.glob("fares.part-*"))
+    assert not list(out_dir.glob("_manifest.part-*"))
+
+    entry = read_manifest(out_dir / "_manifest.json")["files"]["fares.csv"]
+    assert entry["rows"] == len(rows) and entry["bytes"] == merged.stat().st_size
+    assert len(entry["routes"]) == len(all_pairs)
+
+
+def test_rerun_with_same_fares_keeps_existing_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(collector, "fetch_latest_prices", _fake_fetch)
+    cfg = Config(api_key="x", origins=("JFK", "LAX"), dests=("LHR",), concurrency=2)
+
+    out = write_bronze_snapshot(cfg, bronze_root=tmp_path)
+    first_hash = read_manifest(out.parent / "_manifest.json")["files"]["fares.csv"]["content_hash"]
+    inode = out.stat().st_ino
+    write_bronze_snapshot(cfg, bronze_root=tmp_path)
+
+    assert out.stat().st_ino == inode
+    assert not list(out.parent.glob("fares.tmp.*"))
+    manifest = read_manifest(out.parent / "_manifest.json")
+    assert manifest["files"]["fares.csv"]["content_hash"] == first_hash
+
+
+def test_response_cache_skips_fresh_and_revalidates_stale(stub_api, tmp_path):
+    cfg = Config(api_key="x", api_base_url=stub_api.url)
+    cache = ResponseCache(tmp_path / "cache", ttl_sec=3600, max_bytes=10_000)
+
+    with requests.Session() as s:
+        first = fetch_latest_prices(cfg, "JFK", "LHR", s, cache=cache)
+        again = fetch_latest_prices(cfg, "JFK", "LHR", s, cache=cache)
+        assert again == first
+        assert (stub_api.stats.requests, cache.hits, cache.misses) == (1, 1, 1)
+
+        cache.ttl_sec = 0
+        assert fetch_latest_prices(cfg, "JFK", "LHR", s, cache=cache) == first
+        assert (stub_api.stats.requests, cache.revalidated) == (2, 1)
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, ttl_sec=3600, max_bytes=400)
+    keys = [(o, "LHR", "usd", "us", "year") for o in ("JFK", "LAX", "SFO", "ATL")]
+    for k in keys:
+        cache.store(k, {"data": ["x" * 50]})
+        time.sleep(0.01)
+
+    assert cache.load(keys[0]) is None
+    assert cache.load(keys[-1]) is not None
+    assert sum(p.stat().st_size for p in tmp_path.glob("*.json")) <= 400
+
+
+def test_parquet_bronze_is_typed_and_merges(tmp_path, monkeypatch):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from ingestion.merge_bronze_parts import merge_bronze_parts
+
+    monkeypatch.setattr(collector, "fetch_latest_prices", _fake_fetch)
+    base = dict(api_key="x", origins=("JFK", "LAX"), dests=("LHR", "CDG"), output_format="parquet")
+
+    for i in range(2):
+        write_bronze_snapshot(Config(**base, shard_index=i, shard_count=2), bronze_root=tmp_path)
+    out_dir = next(tmp_path.glob("dt=*"))
+    merged = merge_bronze_parts(out_dir, 2, suffix=".parquet")
+
+    table = pq.read_table(merged)
+    assert merged.name == "fares.parquet"
+    assert table.num_rows == 4
+    assert table.schema.field("origin").type == pa.dictionary(pa.int32(), pa.string())
+    assert table.schema.field("depart_date").type == pa.date32()
+    assert table.column("trip_class").to_pylist() == [0, 0, 0, 0]
@@ -0,0 +1,83 @@
+import csv
+import gzip
+import json
+
+import pandas as pd
+import pytest
+
+from transform.contract import BRONZE_HEADER
+from transform.delta import (
+    BASE_NAME,
+    DELTA_NAME,
+    encode_snapshot,
+    partition_dates,
+    read_bronze_partition,
+    read_snapshot,
+)
+
+
+def _write_bronze(root, day, fares):
+    """fares: {(origin, dest, depart_date, gate): price}"""
+    part = root / f"dt={day}"
+    part.mkdir(parents=True)
+    with open(part / "fares.csv", "w", newline="", encoding="utf-8-sig") as fp:
+        w = csv.writer(fp)
+        w.writerow(BRONZE_HEADER)
+        for (o, d, dep, gate), price in fares.items():
+            w.writerow([day, o, d, dep, price, f"{day}T02:00:00Z", gate, "0", "1"])
+
+
+def test_delta_store_round_trips_every_snapshot(tmp_path):
+    bronze, store = tmp_path / "bronze", tmp_path / "delta"
+    day1 = {("JFK", "LHR", f"2026-03-{i:02d}", "kiwi.com"): 400.0 + i for i in range(1, 29)}
+    day2 = dict(day1)
+    day2[("JFK", "LHR", "2026-03-05", "kiwi.com")] = 999.0  # changed
+    del day2[("JFK", "LHR", "2026-03-06", "kiwi.com")]  # gone
+    day2[("ATL", "CDG", "2026-04-01", "")] = 650.0  # new
+    day3 = dict(day2)
+    day3[("JFK", "LHR", "2026-03-06", "kiwi.com")] = 410.0  # back again
+    for day, fares in (("2026-01-01", day1), ("2026-01-02", day2), ("2026-01-03", day3)):
+        _write_bronze(bronze, day, fares)
+
+    stats = [encode_snapshot(bronze, store, d, base_every=7)
+             for d in ("2026-01-01", "2026-01-02", "2026-01-03")]
+
+    assert [s.kind for s in stats] == ["base", "delta", "delta"]
+    assert (stats[1].inserted, stats[1].changed, stats[1].deleted) == (1, 1, 1)
+    assert (stats[2].inserted, stats[2].changed, stats[2].deleted) == (1, 0, 0)
+    assert (store / "dt=2026-01-01" / BASE_NAME).exists()
+    assert len(pd.read_parquet(store / "dt=2026-01-02" / DELTA_NAME)) == 3
+
+    for d in ("2026-01-01", "2026-01-02", "2026-01-03"):
+        rebuilt = read_snapshot(store, d).drop(columns=["scrape_ts"])
+        original = read_bronze_partition(bronze, d).drop(columns=["scrape_ts"])
+        pd.testing.assert_frame_equal(rebuilt, original)
+
+
+def test_delta_store_refuses_to_rewrite_history(tmp_path):
+    bronze, store = tmp_path / "bronze", tmp_path / "delta"
+    for d in ("2026-01-01", "2026-01-02"):
+        _write_bronze(bronze, d, {("JFK", "LHR", "2026-03-01", "kiwi.com"): 400.0})
+        encode_snapshot(bronze, store, d)
+
+    with pytest.raises(ValueError):
+        encode_snapshot(bronze, store, "2026-01-01")
+
+
+def test_partition_reads_any_bronze_format(tmp_path):
+    fares = {("JFK", "LHR", "2026-03-01", "kiwi.com"): 400.0,
+             ("ATL", "CDG", "2026-04-01", ""): 650.0}
+    _write_bronze(tmp_path / "csv", "2026-01-01", fares)
+    part = tmp_path / "jsonl" / "dt=2026-01-01"
+    part.mkdir(parents=True)
+    with gzip.open(part / "fares.jsonl.gz", "wt", encoding="utf-8") as fp:
+        for (o, d, dep, gate), price in fares.items():
+            fp.write(json.dumps({
+                "snapshot_date": "2026-01-01", "origin": o, "dest": d, "depart_date": dep,
+                "price_usd": price, "scrape_ts": "2026-01-01T02:00:00Z", "airline": gate,
+                "trip_class": 0, "number_of_changes": 1,
+            }) + "\n")
+
+    assert partition_dates(tmp_path / "jsonl") == ["2026-01-01"]
+    pd.testing.assert_frame_equal(read_bronze_partition(tmp_path / "jsonl", "2026-01-01"),
+                                  read_bronze_partition(tmp_path / "csv", "2026-01-01"))
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from transform.drift import SKETCH_DIR, check_drift, update_sketches
+from transform.fare_schema import to_compact
+from transform.silver_dataset import write_silver_dataset
+from transform.sketches import DistinctSketch, QuantileSketch
+
+
+def test_sketches_merge_like_the_union():
+    rng = np.random.default_rng(3)
+    a, b = rng.lognormal(5, 0.4, 5000), rng.lognormal(6, 0.4, 5000)
+    merged = QuantileSketch.from_values(a).merge(QuantileSketch.from_values(b))
+    for q in (0.1, 0.5, 0.9):
+        exact = np.quantile(np.concatenate([a, b]), q)
+        assert abs(merged.quantile(q) / exact - 1) < 0.03
+
+    left = DistinctSketch.from_values(pd.Series(np.arange(0, 300)))
+    right = DistinctSketch.from_values(pd.Series(np.arange(200, 500)))
+    assert abs(left.merge(right).estimate() / 500 - 1) < 0.3
+
+
+def _day(day: int, routes) -> pd.DataFrame:
+    rng = np.random.default_rng(day)
+    frames = []
+    for (origin, dest), price in routes.items():
+        n = 60
+        frames.append(pd.DataFrame({
+            "snapshot_date": f"2026-01-{day:02d}",
+            "origin": origin,
+            "dest": dest,
+            "depart_date": pd.Timestamp("2026-03-01") + pd.to_timedelta(np.arange(n) % 30, "D"),
+            "price_usd": price * rng.uniform(0.9, 1.1, n),
+            "gate": np.array(["aviasales", "kiwi"])[np.arange(n) % 2],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_drift_flags_price_jump_and_collapsed_route(tmp_path):
+    normal = {("JFK", "LHR"): 450.0, ("SFO", "LAX"): 120.0, ("ATL", "ORD"): 200.0}
+    history = [_day(d, normal) for d in range(1, 8)]
+    today = _day(8, {("JFK", "LHR"): 6000.0, ("ATL", "ORD"): 200.0})  # SFO-LAX gone
+    write_silver_dataset(to_compact(pd.concat(history + [today], ignore_index=True)), tmp_path)
+
+    dates = [f"2026-01-{d:02d}" for d in range(1, 9)]
+    rebuilt = update_sketches(tmp_path, {d: f"hash-{d}" for d in dates})
+    assert rebuilt == dates and len(list((tmp_path / SKETCH_DIR).glob("*.json"))) == 8
+
+    found = {(f["route"], f["check"]) for f in check_drift(tmp_path, ["2026-01-08"])}
+    assert found == {
+        ("JFK-LHR", "price_median_shift"),
+        ("JFK-LHR", "price_spike"),
+        ("SFO-LAX", "route_rows_collapsed"),
+    }
+    assert check_drift(tmp_path, ["2026-01-07"]) == []
+
+    # Unchanged content hashes: nothing is re-read.
+    assert update_sketches(tmp_path, {d: f"hash-{d}" for d in dates}) == []
+
+
+def test_validate_dataset_reports_drift_unless_turned_off(tmp_path):
+    from transform.drift import DriftThresholds
+    from transform.validate_silver import validate_dataset
+
+    normal = {("JFK", "LHR"): 450.0, ("SFO", "LAX"): 120.0}
+    days = [_day(d, normal) for d in range(1, 8)] + [_day(8, {("JFK", "LHR"): 6000.0})]
+    write_silver_dataset(to_compact(pd.concat(days, ignore_index=True)), tmp_path)
+
+    off = validate_dataset(tmp_path, workers=2, use_cache=False, use_drift=False)
+    assert off["drift"] == [] and not (tmp_path / SKETCH_DIR).exists()
+    on = validate_dataset(tmp_path, workers=2, use_cache=False)
+    assert {f["route"] for f in on["drift"]} == {"JFK-LHR", "SFO-LAX"}
+    short = validate_dataset(tmp_path, workers=2, use_cache=False,
+                             drift=DriftThresholds(min_baseline_days=8))
+    assert short["drift"] == []
@@ -0,0 +1,30 @@
+from datetime import date
+
+import pandas as pd
+
+from transform.fare_schema import airport_dtype, to_arrow_table, to_compact
+
+
+def test_compact_frame_keeps_values_in_small_dtypes():
+    plain = pd.DataFrame({
+        "snapshot_date": [date(2026, 1, 1), date(2026, 1, 2)],
+        "origin": [" jfk ", "LHR"],
+        "dest": ["LAX", "X1"],  # not an IATA code -> NaN (fails the required-column check)
+        "depart_date": ["2026-02-01", "2026-02-03"],
+        "price_usd": [199.99, 1234.56],
+        "trip_class": ["0", ""],
+    })
+
+    df = to_compact(plain)
+
+    assert df["origin"].dtype == airport_dtype() and df["origin"].cat.codes.dtype.itemsize == 2
+    assert df["origin"].tolist() == ["JFK", "LHR"]
+    assert df["dest"].isna().tolist() == [False, True]
+    assert str(df["depart_date"].dtype) == "datetime64[s]"
+    assert str(df["price_usd"].dtype) == "float32"
+    assert pd.concat([df, df])["origin"].dtype == airport_dtype()  # shared dictionary
+
+    stored = to_arrow_table(df).to_pydict()
+    assert stored["price_usd"] == [199.99, 1234.56]  # exact cents again on the way out
+    assert stored["snapshot_date"] == [date(2026, 1, 1), date(2026, 1, 2)]
+    assert stored["origin"] == ["JFK", "LHR"]
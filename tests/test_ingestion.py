@@ -1,3 +1,11 @@
+import gzip
+import io
+import json
+import os
+
+import pytest
+
+from ingestion.config import Settings
 from ingestion.ingest_api_to_s3 import synthetic_snapshot, local_path_for_date
 
 def test_synthetic_snapshot_has_rows():
@@ -9,3 +17,161 @@ def test_synthetic_snapshot_has_rows():
 def test_local_path_format():
     p = local_path_for_date("2026-01-01")
     assert "dt=2026-01-01" in str(p)
+
+
+class FakeS3:
+    """Local S3 stand-in: just enough of the multipart API."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.aborted = []
+        self.part_sizes = []
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = f"u{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId][PartNumber] = Body
+        self.part_sizes.append(len(Body))
+        return {"ETag": f"e{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        self.objects[(Bucket, Key)] = b"".join(parts[n] for n in numbers)
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def list_objects_v2(self, Bucket, Prefix, MaxKeys):
+        keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix))
+        return {"Contents": [{"Key": k} for k in keys[:MaxKeys]]}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId)
+        self.aborted.append(Key)
+
+
+def _chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def test_iter_json_array_items_streams_results_key():
+    from ingestion.streaming import iter_json_array_items
+
+    records = [{"origin": "JFK", "price_usd": 100 + i, "note": "é,]}"} for i in range(50)]
+    body = json.dumps({"meta": {"n": [1, 2]}, "results": records, "tail": 1}).encode("utf-8")
+
+    assert list(iter_json_array_items(_chunked(body, 7))) == records
+    assert list(iter_json_array_items(_chunked(json.dumps(records).encode(), 3))) == records
+
+
+def test_streaming_upload_uses_fixed_size_gzip_parts(monkeypatch):
+    from ingestion import ingest_api_to_s3 as mod
+    from ingestion.streaming import MIN_PART_SIZE
+
+    monkeypatch.setattr(mod, "settings", Settings(s3_bucket="bucket"))
+    s3 = FakeS3()
+    records = ({"i": i, "pad": os.urandom(128).hex()} for i in range(60_000))
+
+    stats = mod.upload_jsonl_to_s3(
+        records, "k.jsonl.gz", gz=True, s3=s3, part_size=MIN_PART_SIZE
+    )
+
+    lines = gzip.decompress(s3.objects[("bucket", "k.jsonl.gz")]).splitlines()
+    assert stats.records == len(lines) == 60_000
+    assert json.loads(lines[-1])["i"] == 59_999
+    assert len(s3.part_sizes) > 1
+    assert all(size == MIN_PART_SIZE for size in s3.part_sizes[:-1])
+
+
+def test_streaming_upload_aborts_on_error(monkeypatch):
+    from ingestion import ingest_api_to_s3 as mod
+
+    monkeypatch.setattr(mod, "settings", Settings(s3_bucket="bucket"))
+    s3 = FakeS3()
+
+    def broken():
+        yield {"i": 1}
+        raise RuntimeError("api died")
+
+    with pytest.raises(RuntimeError):
+        mod.upload_jsonl_to_s3(broken(), "k.jsonl", s3=s3)
+    assert s3.aborted == ["k.jsonl"] and not s3.objects
+
+
+def test_streaming_upload_aborts_when_manifest_checks_fail(monkeypatch):
+    from ingestion import ingest_api_to_s3 as mod
+
+    monkeypatch.setattr(mod, "settings", Settings(s3_bucket="bucket"))
+    s3 = FakeS3()
+    mod.upload_jsonl_to_s3([{"i": 1}], "dt=2026-01-01/k.jsonl", s3=s3)
+    before = dict(s3.objects)
+
+    def throttled(**kwargs):
+        raise RuntimeError("SlowDown")
+
+    monkeypatch.setattr(s3, "list_objects_v2", throttled)
+    with pytest.raises(RuntimeError):
+        mod.upload_jsonl_to_s3([{"i": 1}], "dt=2026-01-01/k.jsonl", s3=s3)
+    assert s3.aborted == ["dt=2026-01-01/k.jsonl"] and s3.objects == before
+
+
+def test_collected_multipart_writer_aborts_instead_of_completing():
+    import gc
+
+    from ingestion.streaming import S3MultipartWriter
+
+    s3 = FakeS3()
+    writer = S3MultipartWriter(s3, "bucket", "k.jsonl")
+    writer.write(b'{"i": 1}\n')
+    del writer
+    gc.collect()
+    assert s3.aborted == ["k.jsonl"] and not s3.objects and not s3.uploads
+
+
+def test_ingest_day_skips_existing_partition_only_in_backfills(monkeypatch):
+    from ingestion import ingest_api_to_s3 as mod
+
+    monkeypatch.setattr(mod, "settings", Settings(s3_bucket="bucket"))
+    s3 = FakeS3()
+
+    first = mod.ingest_day("2026-01-01", to_s3=True, s3=s3)
+    rerun = mod.ingest_day("2026-01-01", to_s3=True, s3=s3)  # daily DAG re-run
+    backfill = mod.ingest_day("2026-01-01", to_s3=True, s3=s3, skip_existing=True)
+    forced = mod.ingest_day("2026-01-01", to_s3=True, force=True, s3=s3, skip_existing=True)
+
+    assert (first.status, first.records) == ("written", 3)
+    assert (rerun.status, rerun.records) == ("unchanged", 3)
+    assert (backfill.status, backfill.records) == ("skipped", 0)
+    assert (forced.status, forced.records) == ("unchanged", 3)
+    assert sorted(k for _, k in s3.objects) == [
+        "bronze/dt=2026-01-01/_manifest.json",
+        "bronze/dt=2026-01-01/fares.jsonl",
+    ]
+
+
+def test_manifest_hash_ignores_order_and_scrape_ts(tmp_path):
+    from ingestion.ingest_api_to_s3 import write_jsonl_local
+    from ingestion.manifest import read_manifest
+
+    rows = synthetic_snapshot("2026-01-01")
+    path = tmp_path / "dt=2026-01-01" / "fares.jsonl"
+
+    first = write_jsonl_local(rows, path)
+    rerun = [dict(r, scrape_ts="2099-01-01T00:00:00Z") for r in reversed(rows)]
+    second = write_jsonl_local(rerun, path)
+    changed = write_jsonl_local(rows[:2], path)
+
+    entry = read_manifest(path.parent / "_manifest.json")["files"]["fares.jsonl"]
+    assert (first.unchanged, second.unchanged, changed.unchanged) == (False, True, False)
+    assert entry["rows"] == 2 and entry["bytes"] == path.stat().st_size
+    assert entry["routes"] == ["ATL-JFK", "ATL-LAX"]
+    assert entry["min_depart_date"] == "2026-02-14"
@@ -0,0 +1,236 @@
+import csv
+import io
+import os
+
+import pytest
+
+from tests.test_bronze_reader import _write_mixed_bronze
+from transform.bronze_reader import find_bronze_files
+from warehouse.postgres_copy import (
+    CONTROL_DDL,
+    CONTROL_TABLE,
+    RAW_COLUMNS,
+    bronze_partitions,
+    direct_columns,
+    load_files,
+    load_incremental,
+    loaded_partitions,
+    pending_partitions,
+)
+
+
+class _CopyCursor:
+    """Just enough of a psycopg2 cursor: parses what COPY would receive."""
+
+    def __init__(self, sink):
+        self.sink, self.rowcount, self.staged = sink, -1, 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.sink.append(("sql", sql))
+        if "_last_file" in sql:  # every staged row is distinct in these tests
+            self.rowcount = self.staged
+
+    def copy_expert(self, sql, fp):
+        text = fp.read().decode("utf-8-sig")
+        rows = list(csv.reader(io.StringIO(text)))
+        if "HEADER true" in sql:
+            rows = rows[1:]
+        cols = sql.split("(", 1)[1].split(")", 1)[0].split(", ")
+        self.sink.extend(("row", dict(zip(cols, r))) for r in rows)
+        self.rowcount = len(rows)
+        self.staged += len(rows)
+
+
+class _CopyConnection:
+    def __init__(self, sink=None):
+        self.sink, self.committed, self.closed = [] if sink is None else sink, False, False
+
+    def cursor(self):
+        return _CopyCursor(self.sink)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_copy_streams_every_partition(tmp_path):
+    _write_mixed_bronze(tmp_path)
+    bom = tmp_path / "dt=2026-01-04" / "fares.csv"
+    bom.parent.mkdir()
+    bom.write_text(
+        "\ufeff" + ",".join(RAW_COLUMNS) + "\n"
+        "2026-01-04,JFK,LHR,2026-03-01,430,2026-01-04T02:10:00Z,kiwi,,\n",
+        encoding="utf-8",
+    )
+    legacy = tmp_path / "dt=2026-01-05" / "fares.csv"
+    legacy.parent.mkdir()
+    legacy.write_text(
+        "Snapshot Date,Origin,Dest,Depart Date,Airline,Price USD\n"
+        "2026-01-05,SFO,LAX,not-a-date,UA,99\n",
+        encoding="utf-8",
+    )
+    files = find_bronze_files(tmp_path)
+    assert direct_columns(bom) == RAW_COLUMNS and direct_columns(legacy) is None
+
+    conn = _CopyConnection()
+    stats = load_files(conn, files)
+    assert conn.committed and conn.sink[0] == ("sql", "TRUNCATE raw.fares")
+    assert [(s.mode, s.rows) for s in stats] == [
+        ("direct", 1), ("buffered", 1), ("buffered", 2), ("direct", 1), ("buffered", 1)
+    ]
+    rows = [r for kind, r in conn.sink if kind == "row"]
+    assert [r["gate"] for r in rows] == ["aviasales", "kiwi", "DL", "DL", "kiwi", "UA"]
+    assert rows[1]["number_of_changes"] == ""  # NULL
+    assert rows[2]["depart_date"] == "2026-02-14" and rows[2]["trip_class"] == ""
+    assert rows[5]["depart_date"] == "" and rows[5]["price_usd"] == "99"  # bad date -> NULL
+
+
+def test_incremental_plans_only_changed_partitions(tmp_path):
+    _write_mixed_bronze(tmp_path)
+    (tmp_path / "dt=2026-01-01" / "fares.jsonl").write_text("", encoding="utf-8")
+    partitions = bronze_partitions(find_bronze_files(tmp_path))
+    assert [(p.snapshot_date, len(p.files)) for p in partitions] == [
+        ("2026-01-01", 2), ("2026-01-02", 1), ("2026-01-03", 1)
+    ]
+    loaded = {p.snapshot_date: p.content_hash for p in partitions}
+    assert pending_partitions(partitions, loaded) == []
+    assert len(pending_partitions(partitions, loaded, force=True)) == 3
+
+    (tmp_path / "dt=2026-01-01" / "fares.jsonl").write_text(
+        '{"snapshot_date": "2026-01-01", "origin": "SFO", "dest": "LAX", "price_usd": 99}\n',
+        encoding="utf-8",
+    )
+    changed = pending_partitions(bronze_partitions(find_bronze_files(tmp_path)), loaded)
+    assert [p.snapshot_date for p in changed] == ["2026-01-01"]
+
+    conns = []
+
+    def connect():
+        conns.append(_CopyConnection([]))
+        return conns[-1]
+
+    stats = load_incremental(connect, partitions, workers=2)
+    assert [s.rows for s in stats] == [2, 1, 2]
+    assert all(c.committed and c.closed for c in conns) and len(conns) == 3
+    steps = [sql.split()[0] for kind, sql in conns[0].sink if kind == "sql"]
+    # stage, replace, control row
+    assert steps == ["CREATE", "ALTER", "ALTER", "DELETE", "INSERT", "DROP", "INSERT"]
+
+
+def _pg_connect():
+    psycopg2 = pytest.importorskip("psycopg2")
+    try:
+        return psycopg2.connect(
+            host=os.getenv("PGHOST", "localhost"),
+            port=os.getenv("PGPORT", "5432"),
+            dbname=os.getenv("PGDATABASE", "fare_db"),
+            user=os.getenv("PGUSER", "fare_user"),
+            password=os.getenv("PGPASSWORD", ""),
+            connect_timeout=3,
+        )
+    except psycopg2.OperationalError:
+        pytest.skip("no Postgres reachable via PG* env vars")
+
+
+_FARES_DDL = (
+    "(snapshot_date date, origin varchar(8), dest varchar(8), depart_date date, "
+    "price_usd numeric(10,2), scrape_ts timestamptz, gate text, trip_class int, "
+    "number_of_changes int)"
+)
+
+
+def test_copy_into_postgres(tmp_path):
+    """Round trip through a real server; runs when PG* points at one (docker compose / CI)."""
+    conn = _pg_connect()
+    _write_mixed_bronze(tmp_path)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"create temp table fares_copy_test {_FARES_DDL}")
+        stats = load_files(conn, find_bronze_files(tmp_path), table="fares_copy_test")
+        assert sum(s.rows for s in stats) == 4
+        with conn.cursor() as cur:
+            cur.execute(
+                "select gate, count(*), sum(price_usd), count(number_of_changes) "
+                "from fares_copy_test group by gate order by gate"
+            )
+            got = [(g, n, float(p), c) for g, n, p, c in cur.fetchall()]
+        assert got == [("DL", 2, 430.0, 0), ("aviasales", 1, 450.5, 1), ("kiwi", 1, 440.0, 0)]
+    finally:
+        conn.close()
+
+
+def test_incremental_replaces_partitions_in_postgres(tmp_path):
+    admin = _pg_connect()
+    admin.autocommit = True
+    schema = "copy_test"
+    table, control = f"{schema}.fares", f"{schema}.loaded_partitions"
+    with admin.cursor() as cur:
+        cur.execute(f"drop schema if exists {schema} cascade; create schema {schema}")
+        cur.execute(f"create table {table} {_FARES_DDL}")
+        cur.execute(CONTROL_DDL.replace(CONTROL_TABLE, control))
+    try:
+        _write_mixed_bronze(tmp_path)
+        parts = bronze_partitions(find_bronze_files(tmp_path))
+        load_incremental(_pg_connect, parts, workers=3, table=table, control_table=control)
+        assert pending_partitions(parts, loaded_partitions(admin, control)) == []
+
+        (tmp_path / "dt=2026-01-01" / "fares.csv").write_text(
+            ",".join(RAW_COLUMNS) + "\n"
+            "2026-01-01,JFK,LHR,2026-03-01,300,2026-01-01T02:10:00Z,kiwi,0,0\n"
+            "2026-01-01,JFK,CDG,2026-03-01,310,2026-01-01T02:10:00Z,kiwi,0,0\n",
+            encoding="utf-8",
+        )
+        parts = bronze_partitions(find_bronze_files(tmp_path))
+        todo = pending_partitions(parts, loaded_partitions(admin, control))
+        assert [p.snapshot_date for p in todo] == ["2026-01-01"]
+        load_incremental(_pg_connect, todo, table=table, control_table=control)
+        with admin.cursor() as cur:
+            cur.execute(f"select snapshot_date::text, count(*) from {table} group by 1 order by 1")
+            assert cur.fetchall() == [("2026-01-01", 2), ("2026-01-02", 1), ("2026-01-03", 2)]
+
+        # The same fares also delivered as fares.jsonl: loaded once. Fares differing only
+        # in gate are different raw rows, also when repeated within one file.
+        (tmp_path / "dt=2026-01-01" / "fares.jsonl").write_text(
+            '{"snapshot_date": "2026-01-01", "origin": "JFK", "dest": "LHR", '
+            '"depart_date": "2026-03-01", "price_usd": 300, '
+            '"scrape_ts": "2026-01-01T02:10:00Z", "gate": "kiwi", "trip_class": 0, '
+            '"number_of_changes": 0}\n'
+            '{"snapshot_date": "2026-01-01", "origin": "JFK", "dest": "LHR", '
+            '"depart_date": "2026-03-01", "price_usd": 300, "gate": "aviasales"}\n'
+            '{"snapshot_date": "2026-01-01", "origin": "JFK", "dest": "LHR", '
+            '"depart_date": "2026-03-01", "price_usd": 300, "gate": "aviasales"}\n',
+            encoding="utf-8",
+        )
+        parts = bronze_partitions(find_bronze_files(tmp_path))
+        todo = pending_partitions(parts, loaded_partitions(admin, control))
+        assert [s.rows for s in load_incremental(_pg_connect, todo, table=table,
+                                                 control_table=control)] == [4]
+        query = (f"select dest, gate from {table} where snapshot_date = '2026-01-01' "
+                 "order by dest, gate")
+        incremental = [("CDG", "kiwi"), ("LHR", "aviasales"), ("LHR", "aviasales"),
+                       ("LHR", "kiwi")]
+        with admin.cursor() as cur:
+            cur.execute(query)
+            assert cur.fetchall() == incremental
+
+        # A full load keeps the same rows.
+        stats = load_files(admin, find_bronze_files(tmp_path), table=table)
+        assert [(s.mode, s.rows) for s in stats][0] == ("partition", 4)
+        with admin.cursor() as cur:
+            cur.execute(query)
+            assert cur.fetchall() == incremental
+    finally:
+        with admin.cursor() as cur:
+            cur.execute(f"drop schema if exists {schema} cascade")
+        admin.close()
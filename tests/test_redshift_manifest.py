@@ -0,0 +1,136 @@
+import json
+import sys
+import types
+
+import pytest
+
+from warehouse import run_redshift_sql as rs
+
+
+def test_dry_run_renders_manifest_and_copy(tmp_path, monkeypatch, capsys):
+    for d in ("2026-01-01", "2026-01-02", "2026-01-05"):
+        (tmp_path / f"dt={d}").mkdir()
+        (tmp_path / f"dt={d}" / "fares.jsonl.gz").write_bytes(b"x" * 10)
+    (tmp_path / "dt=2026-01-02" / "fares.csv").write_bytes(b"csv")  # other format
+    monkeypatch.setenv("S3_BUCKET", "fares-bucket")
+    monkeypatch.setenv("IAM_ROLE_ARN", "arn:aws:iam::1:role/Copy")
+    monkeypatch.setattr(sys, "argv", [
+        "run_redshift_sql.py", "--start", "2026-01-01", "--end", "2026-01-03",
+        "--format", "jsonl.gz", "--local-bronze", str(tmp_path), "--dry-run",
+    ])
+
+    assert rs.main() == 0
+    out = capsys.readouterr().out
+    manifest = json.loads(out.split("---\n", 1)[1].split("\n\n", 1)[0])
+    assert manifest["entries"] == [
+        {"url": f"s3://fares-bucket/bronze/dt={d}/fares.jsonl.gz", "mandatory": True,
+         "meta": {"content_length": 10}}
+        for d in ("2026-01-01", "2026-01-02")
+    ]
+    assert ("manifest\nformat as json 's3://fares-bucket/bronze/_manifests/fares_jsonpaths.json'"
+            " timeformat 'auto' dateformat 'auto' gzip\n") in out
+    assert "from 's3://fares-bucket/bronze/_manifests/fares_2026-01-01_2026-01-03_jsonl.gz_" in out
+    url = "s3://fares-bucket/bronze/dt=2026-01-02/fares.jsonl.gz"
+    assert f"('2026-01-02', '{url}', 'jsonl.gz'," in out
+    assert "{{" not in out
+
+
+def test_s3_listing_filters_range_and_format():
+    class _S3:
+        def get_paginator(self, name):
+            return self
+
+        def paginate(self, **kwargs):
+            assert kwargs["StartAfter"] == "bronze/dt=2026-01-02"
+            keys = ["dt=2026-01-02/fares.parquet", "dt=2026-01-02/_manifest.json",
+                    "dt=2026-01-03/fares.csv", "dt=2026-01-03/fares.parquet",
+                    "dt=2026-01-09/fares.parquet"]
+            return [{"Contents": [{"Key": f"bronze/{k}", "Size": 5} for k in keys]}]
+
+    objects = rs.list_s3_partitions(_S3(), "b", "bronze/", "parquet", "2026-01-02", "2026-01-03")
+    assert [o.url for o in objects] == [
+        "s3://b/bronze/dt=2026-01-02/fares.parquet", "s3://b/bronze/dt=2026-01-03/fares.parquet"
+    ]
+    assert rs.build_copy_manifest(objects)["entries"][0]["meta"] == {"content_length": 5}
+
+
+def test_jsonpaths_map_ingested_records_onto_raw_fares():
+    from ingestion.collector import BRONZE_HEADER
+
+    paths = json.loads(rs.JSONPATHS_FILE.read_text(encoding="utf-8"))["jsonpaths"]
+    assert [p[2:] for p in paths] == [c if c != "gate" else "airline" for c in BRONZE_HEADER]
+
+
+def test_parquet_copy_casts_collector_price_to_decimal(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from ingestion.collector import ParquetBronzeWriter
+
+    path = tmp_path / "fares.parquet"
+    writer = ParquetBronzeWriter(path)
+    writer.write_rows([["2026-01-02", "JFK", "LHR", "2026-03-01", 440.0, "2026-01-02T02:10:00Z",
+                        "kiwi", 0, ""]])
+    writer.close()
+    assert str(pq.read_schema(path).field("price_usd").type) == "double"
+
+    monkeypatch.setenv("IAM_ROLE_ARN", "arn:aws:iam::1:role/Copy")
+    obj = rs.BronzeObject("2026-01-02", "s3://b/bronze/dt=2026-01-02/fares.parquet", 1)
+    sql = rs.render_manifest_copy("s3://b/m.manifest", [obj], "parquet")
+    assert "price_usd double precision" in sql and "copy fares_parquet_stage" in sql
+    assert "round(price_usd, 2)::decimal(10,2)" in sql and "format as parquet" in sql
+
+
+class _Conn:
+    closed = False
+
+    def __init__(self):
+        _Conn.last = self
+
+    def cursor(self):
+        class _Cur:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                pass
+
+            def fetchall(self):
+                return []
+
+        return _Cur()
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("failure", ["no_iam_role", "put_object"])
+def test_manifest_copy_closes_connection_on_every_exit(tmp_path, monkeypatch, failure):
+    (tmp_path / "dt=2026-01-01").mkdir()
+    (tmp_path / "dt=2026-01-01" / "fares.csv").write_bytes(b"x")
+    for name, value in {"S3_BUCKET": "b", "REDSHIFT_HOST": "h", "REDSHIFT_USER": "u",
+                        "REDSHIFT_PASSWORD": "p", "IAM_ROLE_ARN": "arn:aws:iam::1:role/C"}.items():
+        monkeypatch.setenv(name, value)
+    if failure == "no_iam_role":
+        monkeypatch.delenv("IAM_ROLE_ARN")
+
+    class _S3:
+        def put_object(self, **kwargs):
+            raise RuntimeError("AccessDenied")
+
+    monkeypatch.setitem(sys.modules, "psycopg2", types.SimpleNamespace(connect=lambda **_: _Conn()))
+    monkeypatch.setitem(sys.modules, "boto3", types.SimpleNamespace(client=lambda *_, **__: _S3()))
+    monkeypatch.setattr(sys, "argv", [
+        "run_redshift_sql.py", "--start", "2026-01-01", "--local-bronze", str(tmp_path),
+    ])
+
+    if failure == "put_object":
+        with pytest.raises(RuntimeError, match="AccessDenied"):
+            rs.main()
+    else:
+        assert rs.main() == 1
+    assert _Conn.last.closed
@@ -0,0 +1,137 @@
+import csv
+
+from warehouse.result_cache import (
+    cached_entry,
+    load_cache,
+    query_key,
+    save_cache,
+    stream_to_csv,
+    watermark,
+)
+from warehouse.sql_runner import plan_scripts, run_scripts
+
+
+class _NamedCursor:
+    """Server-side cursor stand-in: description appears on first fetch."""
+
+    def __init__(self, rows, fetches):
+        self.rows, self.fetches, self.description, self.rowcount = rows, fetches, None, -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt):
+        self.stmt = stmt
+
+    def fetchmany(self, size):
+        self.description = [("route",), ("price",)]
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        self.fetches.append(len(batch))
+        return batch
+
+
+def test_stream_to_csv_in_batches(tmp_path):
+    fetches = []
+    cur = _NamedCursor([(f"R{i}", i) for i in range(25)], fetches)
+    preview = []
+    path = tmp_path / "out" / "q.csv"
+    assert stream_to_csv(cur, path, batch_size=10, preview=preview, preview_rows=12) == 25
+    assert fetches == [10, 10, 5, 0]
+    assert len(preview) == 12 and not (tmp_path / "out" / "q.csv.tmp").exists()
+    rows = list(csv.reader(path.open(encoding="utf-8")))
+    assert rows[0] == ["route", "price"] and rows[-1] == ["R24", "24"] and len(rows) == 26
+
+
+def test_cache_hits_only_for_same_query_and_watermark(tmp_path):
+    mark = ["1200", "2026-01-20 02:10:00+00", "2026-01-20"]
+    key = query_key("select 1", mark)
+    assert key == query_key("select 1", list(mark))
+    assert key != query_key("select 2", mark)
+    assert key != query_key("select 1", ["1201"] + mark[1:])
+
+    save_cache(tmp_path, {"q.sql": {"key": key, "rows": 3, "csv": "q.csv"}})
+    cache = load_cache(tmp_path)
+    assert cached_entry(cache, tmp_path, "q.sql", key) is None  # CSV missing
+    (tmp_path / "q.csv").write_text("a\n", encoding="utf-8")
+    assert cached_entry(cache, tmp_path, "q.sql", key)["rows"] == 3
+    assert cached_entry(cache, tmp_path, "q.sql", query_key("select 1", ["0"])) is None
+
+
+def test_watermark_changes_when_prices_are_corrected_in_place():
+    """Runs WATERMARK_SQL on a real server when PG* points at one (docker compose / CI)."""
+    from tests.test_postgres_copy import _pg_connect
+
+    conn = _pg_connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "create temp table fact_fares (snapshot_date date, origin text, dest text, "
+                "depart_date date, price_usd numeric(10,2), scrape_ts timestamptz, "
+                "provider text, trip_class int, number_of_changes int)"
+            )
+            cur.execute(
+                "insert into fact_fares values "
+                "('2026-01-19', 'JFK', 'LHR', '2026-03-01', 450.50, '2026-01-19 02:10Z', "
+                "'kiwi', 0, 1), "
+                "('2026-01-20', 'JFK', 'CDG', '2026-03-01', 310.00, '2026-01-20 02:10Z', "
+                "'kiwi', 0, 0)"
+            )
+        conn.commit()
+        mark = watermark(conn, "fact_fares")
+        assert mark is not None and mark[0] == "2"
+
+        # A past partition reloaded with corrected prices: same count, same max dates.
+        with conn.cursor() as cur:
+            cur.execute(
+                "update fact_fares set price_usd = 420.00 where snapshot_date = '2026-01-19'"
+            )
+        conn.commit()
+        corrected = watermark(conn, "fact_fares")
+        assert corrected[:3] == mark[:3]
+        assert query_key("select 1", corrected) != query_key("select 1", mark)
+
+        # Prices swapped between rows: the sum is equal, the row hashes are not.
+        with conn.cursor() as cur:
+            cur.execute("update fact_fares set price_usd = 730.00 - price_usd")
+        conn.commit()
+        swapped = watermark(conn, "fact_fares")
+        assert swapped[3] == corrected[3] and swapped != corrected
+    finally:
+        conn.close()
+
+
+def test_runner_streams_queries_through_cursor_factory():
+    class _Conn:
+        def cursor(self):
+            raise AssertionError("queries must use the server-side cursor")
+
+        def commit(self):
+            pass
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    fetches = []
+    made = []
+
+    def factory(conn, script, index):
+        made.append((script.name, index))
+        return _NamedCursor([("JFK-LHR", 450)] * 3, fetches)
+
+    def on_rows(script, index, cur):
+        n = 0
+        while batch := cur.fetchmany(2):
+            n += len(batch)
+        return n
+
+    scripts = plan_scripts([("a.sql", "select 1"), ("b.sql", "with x as (select 1) select 2")],
+                           serial_default=False)
+    report = run_scripts(scripts, _Conn, workers=2, on_rows=on_rows, cursor_factory=factory)
+    assert report["ok"] and sorted(made) == [("a.sql", 0), ("b.sql", 0)]
+    assert [s["statements"][0]["rowcount"] for s in report["scripts"]] == [3, 3]
@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+
+from warehouse.sql_runner import plan_scripts, run_scripts, split_statements, write_report
+
+
+def test_split_ignores_semicolons_in_strings_and_comments():
+    sql = """
+    -- header; not a statement
+    insert into t values ('a;b', 'it''s; fine', E'back\\'slash;');
+    select ";odd" from "x;y" /* block; /* nested; */ still comment; */ where 1 = 1;
+    create function f() returns int as $body$ begin return 1; end; $body$ language plpgsql;
+    select $$;$$, price$1 from t;
+    -- trailing comment only;
+    """
+    stmts = split_statements(sql)
+    assert len(stmts) == 4
+    assert stmts[0].endswith("E'back\\'slash;')")
+    assert stmts[1].startswith('select ";odd"') and stmts[1].endswith("where 1 = 1")
+    assert stmts[2].endswith("language plpgsql")
+    assert stmts[3] == "select $$;$$, price$1 from t"
+    assert split_statements("-- only a comment;\n/* and; this */") == []
+
+
+def test_plan_uses_depends_header_or_default():
+    named = [
+        ("00_reset.sql", "drop schema x;"),
+        ("01_create.sql", "create table x.t (a int);"),
+        ("proof.sql", "-- depends: 01_create.sql, not_in_run.sql\nselect 1;"),
+        ("verify.sql", "-- depends: 01_create.sql\nselect 2;"),
+        ("free.sql", "-- depends: none\nselect 3;"),
+        ("late.sql", "-- Proof queries\nselect 4;\n-- depends: 00_reset.sql\nselect 5;"),
+    ]
+    deps = {s.name: s.depends for s in plan_scripts(named)}
+    assert deps == {
+        "00_reset.sql": (), "01_create.sql": ("00_reset.sql",), "proof.sql": ("01_create.sql",),
+        "verify.sql": ("01_create.sql",), "free.sql": (),
+        "late.sql": ("free.sql",),  # only the leading comment block is a header
+    }
+    assert all(s.depends == () for s in plan_scripts(named[:2], serial_default=False))
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn, self.description, self.rowcount = conn, None, -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt):
+        if "boom" in stmt:
+            raise RuntimeError("relation boom does not exist")
+        with self.conn.lock:
+            self.conn.active[0] += 1
+            self.conn.peak[0] = max(self.conn.peak[0], self.conn.active[0])
+        time.sleep(0.05)
+        with self.conn.lock:
+            self.conn.active[0] -= 1
+        self.conn.log.append(stmt)
+        self.rowcount = 7
+
+
+class _Conn:
+    def __init__(self, shared):
+        self.lock, self.active, self.peak, self.log = shared
+        self.closed = False
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_independent_scripts_run_concurrently_and_failures_skip_dependents(tmp_path):
+    shared = (threading.Lock(), [0], [0], [])
+    conns = []
+
+    def connect():
+        conns.append(_Conn(shared))
+        return conns[-1]
+
+    scripts = plan_scripts([
+        ("00_setup.sql", "create table a (x int); insert into a values (1)"),
+        ("q1.sql", "-- depends: 00_setup.sql\nselect 1;"),
+        ("q2.sql", "-- depends: 00_setup.sql\nselect 2;"),
+        ("q3.sql", "-- depends: 00_setup.sql\nselect * from boom;"),
+        ("after_q3.sql", "-- depends: q3.sql\nselect 4;"),
+    ])
+    report = run_scripts(scripts, connect, workers=3)
+
+    status = {s["name"]: s["status"] for s in report["scripts"]}
+    assert status == {"00_setup.sql": "ok", "q1.sql": "ok", "q2.sql": "ok",
+                      "q3.sql": "failed", "after_q3.sql": "skipped"}
+    assert not report["ok"] and shared[2][0] >= 2  # queries overlapped
+    assert len(conns) <= 3 and all(c.closed for c in conns)
+    setup = report["scripts"][0]
+    assert [(s["index"], s["rowcount"]) for s in setup["statements"]] == [(0, 7), (1, 7)]
+    assert "boom does not exist" in report["scripts"][3]["error"]
+
+    path = write_report(report, tmp_path / "reports" / "run.json")
+    assert json.loads(path.read_text())["scripts"][1]["statements"][0]["label"] == "select 1"
+
+
+def test_connect_failure_marks_script_failed():
+    def connect():
+        raise RuntimeError("could not connect to server")
+
+    scripts = plan_scripts([("a.sql", "select 1"), ("b.sql", "select 2")])
+    report = run_scripts(scripts, connect, workers=2)
+    assert [(s["status"], s["error"]) for s in report["scripts"]] == [
+        ("failed", "connect failed: could not connect to server"),
+        ("skipped", "dependency not ok: a.sql"),
+    ]
@@ -19,3 +19,107 @@ def test_validation_fails_price_non_positive():
     result = validate_df(df)
     assert result["ok"] is False
     assert any("price_usd_non_positive_rows" in x for x in result["issues"])
+
+def _silver_frame(n=3000):
+    return pd.DataFrame({
+        "snapshot_date": ["2026-01-01"] * (n // 2) + ["2026-01-02"] * (n - n // 2),
+        "origin": ["JFK", "SFO", "ATL"] * (n // 3),
+        "dest": ["LAX"] * n,
+        "depart_date": ["2026-02-01"] * n,
+        "price_usd": [100.0 + i for i in range(n)],
+        "cabin": ["economy"] * n,
+    })
+
+def test_parquet_validation_matches_validate_df(tmp_path):
+    from transform.fare_schema import to_compact
+    from transform.silver_dataset import read_silver, write_silver_dataset
+    from transform.validate_silver import parquet_files, validate_parquet
+
+    df = _silver_frame()
+    df.loc[10, "price_usd"] = -1.0
+    df.loc[2000, "cabin"] = "LOUNGE"
+    df.loc[2500, "origin"] = None
+    write_silver_dataset(to_compact(df), tmp_path, row_group_size=256)
+
+    got = validate_parquet(parquet_files(tmp_path), workers=4)
+    expected = validate_df(read_silver(tmp_path))
+    assert got["issues"] == expected["issues"]
+    assert got["rows"] == expected["rows"] == len(df)
+    assert any("invalid_cabin_values: ['LOUNGE']" == x for x in got["issues"])
+    assert any(x.startswith("null_rate_too_high: origin=") for x in got["issues"])
+    assert set(got["timings_ms"]) >= {"null_rate:origin", "positive:price_usd", "accepted:cabin"}
+
+def test_parquet_validation_answers_clean_row_groups_from_statistics(tmp_path):
+    from transform.fare_schema import to_compact
+    from transform.silver_dataset import write_silver_dataset
+    from transform.validate_silver import parquet_files, validate_parquet
+
+    write_silver_dataset(to_compact(_silver_frame()), tmp_path, row_group_size=256)
+    result = validate_parquet(parquet_files(tmp_path), workers=2)
+    assert result["ok"] is True
+    assert result["row_groups"] > 1
+    assert result["column_chunks_decoded"] == 0  # null counts, price min, one cabin value
+
+def test_row_groups_of_one_file_are_validated_in_parallel(tmp_path, monkeypatch):
+    import threading
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    import transform.validate_silver as vs
+    from transform.fare_schema import to_compact
+
+    df = _silver_frame()
+    df.loc[2900, "price_usd"] = -1.0
+    path = tmp_path / "one.parquet"
+    pq.write_table(pa.Table.from_pandas(to_compact(df)), path, row_group_size=512)
+
+    barrier, seen = threading.Barrier(2, timeout=5), []
+    validate_row_group = vs._validate_row_group
+
+    def tracked(task, checks):
+        seen.append(task.index)
+        if task.index < 2:
+            barrier.wait()  # the first two row groups of the file run at the same time
+        return validate_row_group(task, checks)
+
+    monkeypatch.setattr(vs, "_validate_row_group", tracked)
+    got = vs.validate_parquet(vs.parquet_files(path), workers=2)
+    assert sorted(seen) == list(range(pq.read_metadata(path).num_row_groups)) and len(seen) > 2
+    assert got["issues"] == validate_df(df)["issues"] and got["rows"] == len(df)
+
+def test_parquet_validation_without_optional_columns(tmp_path):
+    from transform.fare_schema import to_compact
+    from transform.silver_dataset import write_silver_dataset
+    from transform.validate_silver import parquet_files, validate_parquet
+
+    df = _silver_frame().drop(columns=["cabin"])
+    write_silver_dataset(to_compact(df), tmp_path, row_group_size=256)
+    result = validate_parquet(parquet_files(tmp_path), workers=2)
+    assert result["ok"] is True and result["rows"] == len(df)
+
+def test_dataset_validation_reuses_cached_partitions(tmp_path):
+    from transform.fare_schema import to_compact
+    from transform.silver_dataset import write_partition, write_silver_dataset
+    from transform.validate_silver import CHECKS, validate_dataset
+
+    df = to_compact(_silver_frame())
+    write_silver_dataset(df, tmp_path, row_group_size=256)
+
+    first = validate_dataset(tmp_path, workers=2)
+    assert first["ok"] and first["partitions_validated"] == 2
+
+    again = validate_dataset(tmp_path, workers=2)
+    assert again["partitions_cached"] == 2 and again["partitions_validated"] == 0
+    assert again["rows"] == first["rows"] and again["ok"]
+
+    day2 = df[df["snapshot_date"] == "2026-01-02"].copy()
+    day2.loc[day2.index[0], "price_usd"] = 0
+    write_partition(tmp_path, "2026-01-02", day2, row_group_size=256)
+    changed = validate_dataset(tmp_path, workers=2)
+    assert changed["partitions_validated"] == 1 and changed["partitions_cached"] == 1
+    assert changed["issues"] == ["price_usd_non_positive_rows: 1"]
+
+    # A different contract invalidates every cached partition.
+    stricter = validate_dataset(tmp_path, workers=2, checks=CHECKS[:-1])
+    assert stricter["partitions_validated"] == 2
@@ -0,0 +1,303 @@
+# transform/bronze_reader.py
+"""
+One streaming reader for every bronze format.
+
+  dt=YYYY-MM-DD/fares.csv        collector (gate, trip_class, number_of_changes)
+  dt=YYYY-MM-DD/fares.parquet    collector --format parquet (date32, dictionary codes,
+                                 timestamp scrape_ts)
+  dt=YYYY-MM-DD/fares.jsonl[.gz] ingest_api_to_s3 / legacy samples (airline, cabin)
+
+`iter_bronze_batches(path)` yields pyarrow Tables of about `block_size` input bytes,
+already unified, so mixed-format history is transformed in one pass without
+converting files first:
+
+  - column names standardized (strip, lower-case, space/dash -> underscore)
+  - declared columns (BRONZE_TYPES) cast to one type whatever the source format:
+    dates stay 'YYYY-MM-DD' strings, scrape_ts 'YYYY-MM-DDTHH:MM:SSZ', codes plain
+    strings (dictionaries decoded); any other column becomes a string
+  - files with `airline` but no `gate` (API / legacy rows) get gate = airline
+
+Usage:
+  from transform.bronze_reader import find_bronze_files, iter_bronze_batches
+  for path in find_bronze_files(Path("data/bronze")):
+      for table in iter_bronze_batches(path):
+          ...
+"""
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+
+# Declared bronze types. Dates stay strings here and are parsed once in the silver
+# clean/cast step; columns not listed are read as strings so files with different
+# extra columns still concatenate.
+BRONZE_TYPES = {
+    "snapshot_date": "string",
+    "origin": "string",
+    "dest": "string",
+    "depart_date": "string",
+    "price_usd": "float64",
+    "scrape_ts": "string",
+    "gate": "string",
+    "trip_class": "int16",
+    "number_of_changes": "int16",
+    "airline": "string",
+    "cabin": "string",
+}
+
+# Longest suffix first: "fares.jsonl.gz" must not match ".gz" alone.
+BRONZE_FORMATS = {
+    ".jsonl.gz": "jsonl",
+    ".jsonl": "jsonl",
+    ".csv": "csv",
+    ".parquet": "parquet",
+}
+
+# Input bytes per yielded table when streaming (None = whole file in one table).
+DEFAULT_BLOCK_SIZE = 16 * 1024 * 1024
+
+_DT_DIR_RE = re.compile(r"^dt=(\d{4}-\d{2}-\d{2})$")
+_SCRAPE_TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def standard_names(columns) -> List[str]:
+    # Plain str ops: called per file/block on a handful of names.
+    return [str(c).strip().lower().replace(" ", "_").replace("-", "_") for c in columns]
+
+
+def bronze_format(path: Path) -> Optional[str]:
+    name = Path(path).name.lower()
+    for suffix, fmt in BRONZE_FORMATS.items():
+        if name.endswith(suffix):
+            return fmt
+    return None
+
+
+def bronze_partition_date(path: Path) -> Optional[str]:
+    """'YYYY-MM-DD' of a `dt=YYYY-MM-DD/` partition file, None for flat files."""
+    m = _DT_DIR_RE.match(Path(path).parent.name)
+    return m.group(1) if m else None
+
+
+def find_bronze_files(
+    input_dir: Path, start: Optional[str] = None, end: Optional[str] = None
+) -> List[Path]:
+    """
+    Bronze files under `input_dir`: hive-style `dt=YYYY-MM-DD/fares.<format>` partitions
+    (optionally limited to start <= dt <= end) plus legacy flat files in `input_dir`
+    (only when no date range is given, since they carry no partition date).
+    """
+    input_dir = Path(input_dir)
+    files = []
+    for part in sorted(input_dir.glob("dt=*")):
+        m = _DT_DIR_RE.match(part.name)
+        if not m or (start and m.group(1) < start) or (end and m.group(1) > end):
+            continue
+        for suffix in BRONZE_FORMATS:
+            if (part / f"fares{suffix}").is_file():
+                files.append(part / f"fares{suffix}")
+    if not start and not end:
+        files.extend(
+            sorted(p for p in input_dir.iterdir() if p.is_file() and bronze_format(p))
+        )
+    return files
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Unify
+def _as_string(arr):
+    import pyarrow as pa  # optional import
+    import pyarrow.compute as pc
+
+    if pa.types.is_dictionary(arr.type):
+        arr = arr.cast(arr.type.value_type)
+    if pa.types.is_timestamp(arr.type):
+        # Whole seconds like the collector's CSV (Parquet stores them as ms).
+        tz = "UTC" if arr.type.tz is not None else None
+        arr = arr.cast(pa.timestamp("s", tz=tz), safe=False)
+        return pc.strftime(arr, format=_SCRAPE_TS_FORMAT)
+    if pa.types.is_nested(arr.type):
+        # Nested JSON values: keep them, as JSON text.
+        return pa.array(
+            [None if v is None else json.dumps(v) for v in arr.to_pylist()], pa.string()
+        )
+    return arr.cast(pa.string())
+
+
+def conform(table, columns: Optional[Sequence[str]] = None):
+    """Standard names + BRONZE_TYPES (other columns as strings); gate from airline."""
+    import pyarrow as pa  # optional import
+
+    table = table.rename_columns(standard_names(table.column_names))
+    arrays, names = [], []
+    for name, col in zip(table.column_names, table.columns):
+        if name in names:
+            continue  # e.g. "Origin" and "origin" in one file: first wins
+        want = pa.type_for_alias(BRONZE_TYPES.get(name, "string"))
+        arrays.append(col if col.type == want else
+                      _as_string(col) if want == pa.string() else col.cast(want))
+        names.append(name)
+    if "gate" not in names and "airline" in names:
+        arrays.append(arrays[names.index("airline")])
+        names.append("gate")
+    table = pa.Table.from_arrays(arrays, names=names)
+    if columns is not None:
+        table = table.select([c for c in table.column_names if c in columns])
+    return table
+
+
+def _source_columns(raw_names: Sequence[str], columns: Optional[Sequence[str]]):
+    """Raw column names to read so that `columns` (standard names) can be produced."""
+    if columns is None:
+        return None
+    std = standard_names(raw_names)
+    wanted = set(columns)
+    if "gate" in wanted and "gate" not in std:
+        wanted.add("airline")
+    return [raw for raw, name in zip(raw_names, std) if name in wanted]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Formats (each yields raw pyarrow Tables; conform() is applied by the caller)
+def _iter_csv(path: Path, block_size: Optional[int], columns):
+    import pyarrow as pa  # optional import (pyarrow CSV engine)
+    import pyarrow.csv as pacsv
+
+    with open(path, newline="", encoding="utf-8-sig") as fp:
+        header = next(csv.reader(fp), [])
+    types = {
+        raw: pa.type_for_alias(BRONZE_TYPES[name])
+        for raw, name in zip(header, standard_names(header))
+        if name in BRONZE_TYPES
+    }
+    convert = pacsv.ConvertOptions(
+        column_types=types,
+        strings_can_be_null=True,
+        include_columns=_source_columns(header, columns),
+    )
+    if block_size is None:
+        # One thread per file: parallelism comes from the caller's file pool.
+        yield pacsv.read_csv(
+            path, read_options=pacsv.ReadOptions(use_threads=False), convert_options=convert
+        )
+        return
+    reader = pacsv.open_csv(
+        path, read_options=pacsv.ReadOptions(block_size=block_size), convert_options=convert
+    )
+    for batch in reader:
+        yield pa.Table.from_batches([batch])
+
+
+def _iter_jsonl(path: Path, block_size: Optional[int], columns):
+    import pyarrow as pa  # optional import
+    import pyarrow.json as pajson
+
+    opener = gzip.open if path.name.lower().endswith(".gz") else open
+    with opener(path, "rb") as fp:
+        first = fp.readline()
+        if not first.strip():
+            return
+        # Declare every field of the first record up front so ISO dates are not inferred
+        # as timestamps; fields that only show up later are inferred (then conformed).
+        raw_names = list(json.loads(first))
+        schema = pa.schema([
+            (raw, pa.type_for_alias(BRONZE_TYPES.get(name, "string")))
+            for raw, name in zip(raw_names, standard_names(raw_names))
+        ])
+        parse = pajson.ParseOptions(explicit_schema=schema, unexpected_field_behavior="infer")
+        keep = _source_columns(raw_names, columns)
+
+        lines = [first]
+        while True:
+            lines += fp.readlines(block_size) if block_size else fp.readlines()
+            block = b"".join(line for line in lines if line.strip())
+            if not block:
+                break
+            table = pajson.read_json(
+                io.BytesIO(block),
+                read_options=pajson.ReadOptions(use_threads=False),
+                parse_options=parse,
+            )
+            if keep is not None:
+                table = table.select([c for c in table.column_names if c in keep])
+            yield table
+            lines = []
+
+
+def _iter_parquet(path: Path, block_size: Optional[int], columns):
+    import pyarrow as pa  # optional import
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    include = _source_columns(pf.schema_arrow.names, columns)
+    if block_size is None:
+        yield pf.read(columns=include)
+        return
+    # Rows per batch so that each batch covers ~block_size bytes of the file.
+    row_bytes = max(1, path.stat().st_size // max(1, pf.metadata.num_rows))
+    for batch in pf.iter_batches(batch_size=max(1024, block_size // row_bytes), columns=include):
+        yield pa.Table.from_batches([batch])
+
+
+_READERS = {"csv": _iter_csv, "jsonl": _iter_jsonl, "parquet": _iter_parquet}
+
+
+def iter_bronze_batches(
+    path: Path,
+    block_size: Optional[int] = DEFAULT_BLOCK_SIZE,
+    columns: Optional[Sequence[str]] = None,
+) -> Iterator:
+    """
+    Unified pyarrow Tables of ~block_size input bytes from one bronze file (any format).
+    `columns` (standard names) limits what is parsed; block_size=None reads it whole.
+    """
+    path = Path(path)
+    fmt = bronze_format(path)
+    if fmt is None:
+        raise ValueError(f"Unsupported bronze file (expected {sorted(BRONZE_FORMATS)}): {path}")
+    for table in _READERS[fmt](path, block_size, columns):
+        if table.num_rows:
+            yield conform(table, columns)
+
+
+def bronze_columns(path: Path) -> List[str]:
+    """
+    Standard column names iter_bronze_batches yields for `path`, from the CSV header,
+    Parquet schema or first JSONL record (fields first seen later are not included).
+    """
+    path = Path(path)
+    fmt = bronze_format(path)
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as fp:
+            raw = next(csv.reader(fp), [])
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq  # optional import
+
+        raw = pq.read_schema(path).names
+    elif fmt == "jsonl":
+        opener = gzip.open if path.name.lower().endswith(".gz") else open
+        with opener(path, "rb") as fp:
+            first = fp.readline()
+        raw = list(json.loads(first)) if first.strip() else []
+    else:
+        raise ValueError(f"Unsupported bronze file (expected {sorted(BRONZE_FORMATS)}): {path}")
+    names = list(dict.fromkeys(standard_names(raw)))  # first wins, like conform()
+    if "gate" not in names and "airline" in names:
+        names.append("gate")
+    return names
+
+
+def read_bronze_file(path: Path, columns: Optional[Sequence[str]] = None):
+    """A whole bronze file (any format) as one unified pyarrow Table."""
+    import pyarrow as pa  # optional import
+
+    tables = list(iter_bronze_batches(path, block_size=None, columns=columns))
+    if not tables:
+        return pa.table({})
+    return pa.concat_tables(tables, promote_options="default")
@@ -2,41 +2,59 @@
 from __future__ import annotations
 
 import argparse
+import json
+import os
+import re
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
+from typing import List, Optional
 
 import pandas as pd
 
-from transform.contract import REQUIRED_COLUMNS
+from transform.bronze_reader import (
+    BRONZE_TYPES,
+    bronze_columns,
+    find_bronze_files,
+    iter_bronze_batches,
+    read_bronze_file,
+    standard_names as _standard_names,
+)
+from transform.contract import DEDUPE_COLUMNS, REQUIRED_COLUMNS
+from transform.engines import duckdb_clean_and_cast
+from transform.fare_schema import constant_category, day_strings, to_arrow_table, to_compact
+from transform.silver_dataset import (
+    ROW_GROUP_SIZE,
+    SORT_COLUMNS,
+    bucket_of,
+    file_fingerprint,
+    part_file_name,
+    partition_dates,
+    partition_dir,
+    write_partition,
+    write_silver_dataset,
+)
 
 def _standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = (
-        df.columns.astype(str)
-        .str.strip()
-        .str.lower()
-        .str.replace(" ", "_")
-        .str.replace("-", "_")
-    )
+    df = df.copy(deep=False)  # renaming only; no need to copy the data
+    df.columns = _standard_names(df.columns)
     return df
 
-def _clean_and_cast(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-
-    # Standardize string fields
-    if "origin" in df.columns:
-        df["origin"] = df["origin"].astype(str).str.strip().str.upper()
-    if "dest" in df.columns:
-        df["dest"] = df["dest"].astype(str).str.strip().str.upper()
+def _dedupe(df: pd.DataFrame) -> pd.DataFrame:
+    dedupe_cols = [c for c in DEDUPE_COLUMNS if c in df.columns]
+    if dedupe_cols:
+        df = df.drop_duplicates(subset=dedupe_cols, keep="last")
+    return df
 
-    # Cast dates
-    for c in ["snapshot_date", "depart_date"]:
-        if c in df.columns:
-            df[c] = pd.to_datetime(df[c], errors="coerce").dt.date
+def _clean_and_cast(df: pd.DataFrame, dedupe: bool = True) -> pd.DataFrame:
+    # Shallow: every column below is replaced, never written in place.
+    df = df.copy(deep=False)
 
-    # Cast price
-    if "price_usd" in df.columns:
-        df["price_usd"] = pd.to_numeric(df["price_usd"], errors="coerce")
+    # Standardize + cast to the compact fare schema (IATA categoricals, datetime64 days,
+    # float32 prices; see transform/fare_schema.py)
+    df = to_compact(df)
 
     # Drop rows missing required cols
     df = df.dropna(subset=[c for c in REQUIRED_COLUMNS if c in df.columns])
@@ -45,50 +63,443 @@ def _clean_and_cast(df: pd.DataFrame) -> pd.DataFrame:
     if "price_usd" in df.columns:
         df = df[df["price_usd"] > 0]
 
-    # Deduplicate (define a stable key)
-    dedupe_cols = [c for c in ["snapshot_date", "origin", "dest", "depart_date", "price_usd"] if c in df.columns]
-    if dedupe_cols:
-        df = df.drop_duplicates(subset=dedupe_cols, keep="last")
+    if dedupe:
+        df = _dedupe(df)
 
-    # Add load timestamp (freshness)
-    df["load_ts"] = datetime.now(timezone.utc)
+    # Add load timestamp (freshness); one value per run, so a 1-byte categorical
+    df["load_ts"] = constant_category(pd.Timestamp(datetime.now(timezone.utc)), len(df), df.index)
 
     return df
 
-def read_bronze_csvs(input_dir: Path) -> pd.DataFrame:
-    files = sorted(input_dir.glob("*.csv"))
+def read_bronze_table(
+    input_dir: Path,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    workers: int = 8,
+):
+    """All bronze rows (CSV / JSONL / Parquet, unified: see bronze_reader) as one Table."""
+    files = find_bronze_files(input_dir, start, end)
+    if not files:
+        raise FileNotFoundError(f"No bronze files found in {input_dir}")
+
+    import pyarrow as pa  # optional import
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        tables = list(pool.map(read_bronze_file, files))
+
+    # concat_tables only stitches chunk lists together (no copy).
+    return pa.concat_tables(tables, promote_options="default")
+
+def read_bronze_csvs(
+    input_dir: Path,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    workers: int = 8,
+) -> pd.DataFrame:
+    # to_pandas is the single copy.
+    return read_bronze_table(input_dir, start, end, workers).to_pandas()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Engines
+#
+# clean/cast/dedupe behind one interface: fn(bronze pyarrow Table, threads) -> compact
+# silver frame. Reading (read_bronze_table) and writing (silver_dataset) are shared, so
+# engines only differ in how they compute the rows; see transform/engines.py.
+
+def pandas_clean_and_cast(table, threads: int = 1) -> pd.DataFrame:
+    """Reference engine (single-threaded pandas)."""
+    names = _standard_names(table.column_names)
+    return _clean_and_cast(table.rename_columns(names).to_pandas())
+
+ENGINES = {
+    "pandas": pandas_clean_and_cast,
+    "duckdb": duckdb_clean_and_cast,
+}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Incremental mode
+#
+# Keeps `<dataset>/_state.json` next to the silver partitions, recording every bronze
+# file seen (size, mtime, sha256 and the snapshot dates it contributed). A run only
+# reads bronze files that are new or changed, and rewrites only the snapshot_date
+# partitions they touch (re-reading the other bronze files feeding those partitions,
+# if any). The dedupe key includes
+# snapshot_date, so rebuilding a whole snapshot_date partition from all of its inputs
+# gives exactly the rows a full rebuild would.
+
+SILVER_STATE_NAME = "_state.json"
+
+def load_state(dataset_dir: Path) -> dict:
+    try:
+        return json.loads((dataset_dir / SILVER_STATE_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"files": {}}
+
+def save_state(dataset_dir: Path, state: dict) -> None:
+    path = dataset_dir / SILVER_STATE_NAME
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _transform_file(path: Path, engine: str = "pandas") -> pd.DataFrame:
+    # One file per pool worker: the engine itself runs single-threaded here.
+    df = ENGINES[engine](read_bronze_file(path), 1)
+    # ISO strings: partition names + JSON state, and equality with them is cheap.
+    df["snapshot_date"] = day_strings(df["snapshot_date"])
+    return df
+
+def run_incremental(
+    input_dir: Path,
+    dataset_dir: Path,
+    workers: int = 8,
+    buckets: int = 0,
+    row_group_size: int = ROW_GROUP_SIZE,
+    engine: str = "pandas",
+) -> dict:
+    """Bring the silver dataset up to date with `input_dir`; returns run stats."""
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    state = load_state(dataset_dir)
+    seen = state["files"]
+
+    files = {f.relative_to(input_dir).as_posix(): f for f in find_bronze_files(input_dir)}
+    fingerprints = {k: file_fingerprint(f, seen.get(k)) for k, f in files.items()}
+    changed = sorted(
+        k for k, fp in fingerprints.items()
+        if k not in seen or seen[k].get("sha256") != fp["sha256"]
+    )
+    removed = sorted(set(seen) - set(files))
+
+    def transform(k: str) -> pd.DataFrame:
+        return _transform_file(files[k], engine)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        frames = dict(zip(changed, pool.map(transform, changed)))
+
+    new_dates = {k: sorted(set(df["snapshot_date"])) for k, df in frames.items()}
+    affected = set()
+    for k in changed + removed:
+        affected.update(seen.get(k, {}).get("snapshot_dates", []))
+        affected.update(new_dates.get(k, []))
+
+    # Unchanged files that also feed an affected date are re-read (rare: late deliveries).
+    for k in sorted(set(files) - set(frames)):
+        if affected.intersection(seen[k].get("snapshot_dates", [])):
+            frames[k] = transform(k)
+
+    # Concatenate in find_bronze_files order so keep="last" matches a full rebuild.
+    by_date = defaultdict(list)
+    for k in (k for k in files if k in frames):
+        for snapshot_date, group in frames[k].groupby("snapshot_date", sort=False):
+            if snapshot_date in affected:
+                by_date[snapshot_date].append(group)
+
+    rows = 0
+    for snapshot_date in sorted(affected):
+        parts = by_date.get(snapshot_date)
+        out = _dedupe(pd.concat(parts, ignore_index=True)) if parts else pd.DataFrame()
+        write_partition(dataset_dir, snapshot_date, out, buckets, row_group_size)
+        rows += len(out)
+
+    state["files"] = {
+        k: {
+            **fingerprints[k],
+            "snapshot_dates": new_dates.get(k, seen.get(k, {}).get("snapshot_dates", [])),
+        }
+        for k in files
+    }
+    save_state(dataset_dir, state)
+    return {
+        "files": len(files),
+        "changed": len(changed),
+        "removed": len(removed),
+        "partitions_rewritten": len(affected),
+        "rows_written": rows,
+    }
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Chunked (out-of-core) mode
+#
+# Bronze is streamed in blocks sized from --max-memory and silver row groups are
+# written as each block is cleaned, so peak memory no longer scales with history.
+# Dedupe keeps the *last* row per DEDUPE_COLUMNS key like _clean_and_cast, which needs
+# to know the future: pass 1 streams only the key columns and stores one 64-bit hash
+# per cleaned row (8 bytes/row, the only state that grows with input), from which a
+# keep-bitmap of last occurrences is built; pass 2 streams full rows and writes those
+# the bitmap keeps. Within each output file rows are sorted per row group (not
+# globally) by origin/dest/depart_date.
+#
+# Pass 1 also records the union of all files' columns (every output file gets that
+# schema, missing columns as nulls, like the in-memory concat) and the last file
+# feeding each snapshot_date, so that date's writers are closed as soon as that file
+# is done instead of holding one open file per partition for the whole backfill.
+
+# pandas frames take several times the input bytes they were parsed from.
+_CHUNK_EXPANSION = 8
+
+def parse_size(s: str) -> int:
+    """'512MB', '2G', '1048576' -> bytes."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*", s.lower())
+    if not m:
+        raise argparse.ArgumentTypeError(f"Bad size {s!r} (expected e.g. 512MB, 2G)")
+    return int(float(m.group(1)) * 1024 ** " kmgt".index(m.group(2) or " "))
+
+def _iter_chunks(path: Path, block_size: int, key_columns_only: bool = False):
+    """Standardized, uncleaned DataFrames of ~block_size input bytes each (any format)."""
+    columns = DEDUPE_COLUMNS if key_columns_only else None
+    for table in iter_bronze_batches(path, block_size, columns=columns):
+        yield table.to_pandas()
+
+def _dedupe_keep_mask(files: List[Path], block_size: int):
+    """
+    Pass 1: (bool array over cleaned rows, True for the last row of each dedupe key;
+    {snapshot_date: index of the last file with rows for it}).
+    """
+    import numpy as np
+
+    hashes = []
+    last_file = {}
+    for i, path in enumerate(files):
+        for chunk in _iter_chunks(path, block_size, key_columns_only=True):
+            chunk = _clean_and_cast(chunk, dedupe=False)
+            cols = [c for c in DEDUPE_COLUMNS if c in chunk.columns]
+            hashes.append(pd.util.hash_pandas_object(chunk[cols], index=False).to_numpy())
+            for snapshot_date in day_strings(chunk["snapshot_date"]).unique():
+                last_file[snapshot_date] = i
+
+    h = np.concatenate(hashes) if hashes else np.empty(0, dtype="uint64")
+    _, first_in_reversed = np.unique(h[::-1], return_index=True)
+    keep = np.zeros(len(h), dtype=bool)
+    keep[len(h) - 1 - first_in_reversed] = True
+    return keep, last_file
+
+def _silver_schema(files: List[Path]):
+    """Arrow schema of chunked output: cleaned form of the union of all files' columns."""
+    import pyarrow as pa  # optional import
+
+    names = list(dict.fromkeys(c for path in files for c in bronze_columns(path)))
+    empty = pd.DataFrame({
+        c: pd.Series(dtype="object" if BRONZE_TYPES.get(c, "string") == "string"
+                     else BRONZE_TYPES[c])
+        for c in names
+    })
+    cleaned = _clean_and_cast(empty, dedupe=False).drop(columns=["snapshot_date"])
+    schema = to_arrow_table(cleaned).schema
+    # Columns with no typed form (plain labels, all-null here) are written as strings.
+    return pa.schema([pa.field(f.name, pa.string()) if f.type == pa.null() else f
+                      for f in schema])
+
+def _conform_to(table, schema, path: Path):
+    """`table` with exactly `schema`'s columns and types (absent ones as nulls)."""
+    import pyarrow as pa  # optional import
+
+    extra = set(table.column_names) - set(schema.names)
+    if extra:
+        # Only JSONL fields missing from the file's first record can get here.
+        raise ValueError(
+            f"{path}: columns {sorted(extra)} not in the bronze schema; "
+            "run without --chunked"
+        )
+    return pa.Table.from_arrays(
+        [table[f.name].cast(f.type) if f.name in table.column_names
+         else pa.nulls(table.num_rows, f.type) for f in schema],
+        schema=schema,
+    )
+
+def run_chunked(
+    input_dir: Path,
+    dataset_dir: Path,
+    max_memory: int = 512 * 1024 * 1024,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    buckets: int = 0,
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> dict:
+    """Full (or --start/--end ranged) rebuild of the silver dataset in bounded memory."""
+    import pyarrow.parquet as pq  # optional import
+
+    files = find_bronze_files(input_dir, start, end)
     if not files:
-        raise FileNotFoundError(f"No CSV files found in {input_dir}")
+        raise FileNotFoundError(f"No bronze files found in {input_dir}")
+    block_size = max(1 << 16, max_memory // _CHUNK_EXPANSION)
+
+    keep, last_file = _dedupe_keep_mask(files, block_size)
+    schema = _silver_schema(files)
 
-    dfs = []
-    for f in files:
-        dfs.append(pd.read_csv(f))
-    return pd.concat(dfs, ignore_index=True)
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    writers = {}  # (snapshot_date, bucket) -> (ParquetWriter, tmp path, final path)
+    closed = set()
+    offset = rows = 0
+    try:
+        for i, path in enumerate(files):
+            for chunk in _iter_chunks(path, block_size):
+                chunk = _clean_and_cast(chunk, dedupe=False)
+                n = len(chunk)
+                chunk = chunk[keep[offset:offset + n]]
+                offset += n
+                rows += len(chunk)
+
+                dates = day_strings(chunk["snapshot_date"])
+                bucket_ids = (
+                    [bucket_of(o, d, buckets) for o, d in zip(chunk["origin"], chunk["dest"])]
+                    if buckets > 0
+                    else [-1] * len(chunk)
+                )
+                groups = chunk.groupby([dates, bucket_ids], sort=False)
+                for (snapshot_date, bucket), group in groups:
+                    bucket = None if bucket < 0 else int(bucket)
+                    group = group.drop(columns=["snapshot_date"]).sort_values(
+                        SORT_COLUMNS, kind="stable"
+                    )
+                    key = (snapshot_date, bucket)
+                    if key not in writers:
+                        part = partition_dir(dataset_dir, snapshot_date)
+                        part.mkdir(parents=True, exist_ok=True)
+                        final = part / part_file_name(bucket, buckets)
+                        tmp = final.with_name(f"{final.name}.tmp")
+                        writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+                        writers[key] = (writer, tmp, final)
+                    table = _conform_to(to_arrow_table(group), schema, path)
+                    writers[key][0].write_table(table, row_group_size=row_group_size)
+            # Dates whose last input was this file are complete: free their handles.
+            for key, (writer, _, _) in writers.items():
+                if key not in closed and last_file.get(key[0], -1) <= i:
+                    writer.close()
+                    closed.add(key)
+    finally:
+        for key, (writer, _, _) in writers.items():
+            if key not in closed:
+                writer.close()
+
+    for _, tmp, final in writers.values():
+        os.replace(tmp, final)
+
+    # Same replacement semantics as write_silver_dataset.
+    written = {}
+    for (snapshot_date, _), (_, _, final) in writers.items():
+        written.setdefault(snapshot_date, set()).add(final.name)
+    for snapshot_date, names in written.items():
+        for old in partition_dir(dataset_dir, snapshot_date).glob("part-*.parquet"):
+            if old.name not in names:
+                old.unlink()
+    if not (start or end):
+        for snapshot_date in partition_dates(dataset_dir):
+            if snapshot_date not in written:
+                shutil.rmtree(partition_dir(dataset_dir, snapshot_date))
+    (dataset_dir / SILVER_STATE_NAME).unlink(missing_ok=True)
+
+    return {
+        "files": len(files),
+        "rows_written": rows,
+        "partitions": len(written),
+        "block_size": block_size,
+        "index_bytes": int(keep.nbytes + 8 * len(keep)),
+    }
 
 def write_silver_parquet(df: pd.DataFrame, output_path: Path) -> None:
+    # Legacy single-file output (when --output ends with .parquet).
     output_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_parquet(output_path, index=False)
 
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--input", default="data/bronze", help="Bronze folder with CSV files")
-    p.add_argument("--output", default="data/silver/flight_fares.parquet", help="Silver parquet output path")
+    p.add_argument("--input", default="data/bronze", help="Bronze folder (CSV, JSONL, Parquet)")
+    p.add_argument("--start", default=None, help="First dt= partition to read (YYYY-MM-DD)")
+    p.add_argument("--end", default=None, help="Last dt= partition to read (YYYY-MM-DD)")
+    p.add_argument(
+        "--workers", type=int, default=8, help="Parallel partition readers (and engine threads)"
+    )
+    p.add_argument(
+        "--engine",
+        choices=sorted(ENGINES),
+        default="pandas",
+        help="Clean/cast/dedupe engine (duckdb: multi-threaded, needs `pip install duckdb`)",
+    )
+    p.add_argument(
+        "--output",
+        default="data/silver/flight_fares",
+        help="Silver dataset dir (snapshot_date= partitions), or a .parquet path for one file",
+    )
+    p.add_argument("--buckets", type=int, default=0, help="Route buckets per partition (0 = off)")
+    p.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE)
+    p.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only transform new/changed bronze files into the --output dataset",
+    )
+    p.add_argument(
+        "--chunked",
+        action="store_true",
+        help="Out-of-core rebuild: stream bronze in blocks bounded by --max-memory",
+    )
+    p.add_argument(
+        "--max-memory", type=parse_size, default="512MB", help="Chunked mode memory budget"
+    )
     args = p.parse_args()
 
     input_dir = Path(args.input)
     output_path = Path(args.output)
 
-    df = read_bronze_csvs(input_dir)
-    df = _standardize_columns(df)
-    df = _clean_and_cast(df)
+    if args.incremental:
+        if args.start or args.end:
+            raise SystemExit("[FAILED] --incremental always covers all of --input; "
+                             "drop --start/--end")
+        stats = run_incremental(
+            input_dir, output_path, args.workers, args.buckets, args.row_group_size, args.engine
+        )
+        print(
+            f"[OK] Incremental silver: {output_path} files={stats['files']} "
+            f"changed={stats['changed']} removed={stats['removed']} "
+            f"partitions_rewritten={stats['partitions_rewritten']} rows={stats['rows_written']}"
+        )
+        return
+
+    if args.chunked:
+        if output_path.suffix == ".parquet":
+            raise SystemExit("[FAILED] --chunked writes a dataset dir, not a .parquet file")
+        if args.engine != "pandas":
+            raise SystemExit("[FAILED] --chunked only supports --engine pandas")
+        stats = run_chunked(
+            input_dir,
+            output_path,
+            args.max_memory,
+            args.start,
+            args.end,
+            args.buckets,
+            args.row_group_size,
+        )
+        print(
+            f"[OK] Chunked silver: {output_path} files={stats['files']} "
+            f"rows={stats['rows_written']} partitions={stats['partitions']} "
+            f"block_bytes={stats['block_size']} dedupe_index_bytes={stats['index_bytes']}"
+        )
+        return
+
+    table = read_bronze_table(input_dir, args.start, args.end, args.workers)
+    df = ENGINES[args.engine](table, args.workers)
 
     # Final check: required columns exist
     missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
     if missing:
         raise ValueError(f"Missing required columns in transformed output: {missing}")
 
-    write_silver_parquet(df, output_path)
-    print(f"[OK] Wrote silver parquet: {output_path} rows={len(df)} cols={len(df.columns)}")
+    if output_path.suffix == ".parquet":
+        write_silver_parquet(df, output_path)
+        print(f"[OK] Wrote silver parquet: {output_path} rows={len(df)} cols={len(df.columns)}")
+        return
+
+    files = write_silver_dataset(
+        df,
+        output_path,
+        args.buckets,
+        args.row_group_size,
+        remove_missing=not (args.start or args.end),
+    )
+    # A full/ranged rebuild invalidates what incremental mode knows about the inputs.
+    (output_path / SILVER_STATE_NAME).unlink(missing_ok=True)
+    print(
+        f"[OK] Wrote silver dataset: {output_path} rows={len(df)} cols={len(df.columns)} "
+        f"files={files}"
+    )
 
 if __name__ == "__main__":
     main()
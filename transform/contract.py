@@ -1,6 +1,20 @@
 # transform/contract.py
 from __future__ import annotations
 
+# bronze columns written by ingestion/collector.py (CSV header / Parquet schema order);
+# also the column order of raw.fares
+BRONZE_HEADER = [
+    "snapshot_date",
+    "origin",
+    "dest",
+    "depart_date",
+    "price_usd",
+    "scrape_ts",
+    "gate",
+    "trip_class",
+    "number_of_changes",
+]
+
 REQUIRED_COLUMNS = [
     "snapshot_date",
     "origin",
@@ -9,6 +23,15 @@ REQUIRED_COLUMNS = [
     "price_usd",
 ]
 
+# silver dedupe key (includes snapshot_date, so dedupe never crosses snapshots)
+DEDUPE_COLUMNS = [
+    "snapshot_date",
+    "origin",
+    "dest",
+    "depart_date",
+    "price_usd",
+]
+
 # optional columns you may have (won't fail if missing)
 OPTIONAL_COLUMNS = [
     "cabin",
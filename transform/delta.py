@@ -0,0 +1,285 @@
+# transform/delta.py
+"""
+Snapshot-to-snapshot delta encoding of collector bronze (change data capture).
+
+Most fares for a (origin, dest, depart_date, gate, trip_class) do not move from
+one daily snapshot to the next, so instead of storing every row every day the
+delta store keeps, per `data/delta/dt=YYYY-MM-DD/`:
+
+  fares_base.parquet   full snapshot (first date, then every --base-every days)
+  fares_delta.parquet  only rows with op = I (inserted), U (changed), D (gone)
+
+`read_snapshot(delta_root, date)` rebuilds the full snapshot for any stored date
+from the latest base at or before it plus the deltas in between.
+
+Notes:
+- A fare "changed" when any non-key column other than snapshot_date/scrape_ts
+  differs (price_usd, number_of_changes). Rebuilt rows keep the scrape_ts of the
+  snapshot where they last changed; snapshot_date is set to the requested date.
+- Duplicate keys within one snapshot collapse to the cheapest fare.
+
+Run:
+  python -m transform.delta --date 2026-01-23
+  python -m transform.delta --all --base-every 7
+  python -m transform.delta --reconstruct 2026-01-23 --output /tmp/fares_2026-01-23.csv
+"""
+from __future__ import annotations
+
+import argparse
+import re
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from transform.bronze_reader import bronze_partition_date, find_bronze_files, read_bronze_file
+from transform.contract import BRONZE_HEADER
+
+KEY_COLUMNS = ["origin", "dest", "depart_date", "gate", "trip_class"]
+VOLATILE_COLUMNS = ["snapshot_date", "scrape_ts"]
+VALUE_COLUMNS = [c for c in BRONZE_HEADER if c not in KEY_COLUMNS + VOLATILE_COLUMNS]
+
+BASE_NAME = "fares_base.parquet"
+DELTA_NAME = "fares_delta.parquet"
+OP_INSERT, OP_UPDATE, OP_DELETE = "I", "U", "D"
+
+_DT_RE = re.compile(r"^dt=(\d{4}-\d{2}-\d{2})$")
+
+
+@dataclass(frozen=True)
+class DeltaStats:
+    snapshot_date: str
+    kind: str  # "base" | "delta"
+    rows: int  # rows in the full snapshot
+    inserted: int = 0
+    changed: int = 0
+    deleted: int = 0
+
+    @property
+    def stored_rows(self) -> int:
+        if self.kind == "base":
+            return self.rows
+        return self.inserted + self.changed + self.deleted
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Reading bronze
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Same dtypes whichever bronze format(s) the partition was written in."""
+    df = df.reindex(columns=BRONZE_HEADER)
+    out = pd.DataFrame(index=df.index)
+    for c in BRONZE_HEADER:
+        if c == "price_usd":
+            out[c] = pd.to_numeric(df[c], errors="coerce")
+        elif c in ("snapshot_date", "depart_date"):
+            out[c] = pd.to_datetime(df[c], errors="coerce").dt.strftime("%Y-%m-%d").fillna("")
+        elif c == "scrape_ts":
+            ts = pd.to_datetime(df[c], errors="coerce", utc=True)
+            out[c] = ts.dt.strftime("%Y-%m-%dT%H:%M:%SZ").fillna("")
+        elif c in ("trip_class", "number_of_changes"):
+            n = pd.to_numeric(df[c], errors="coerce").astype("Int64")
+            out[c] = n.astype("string").fillna("").astype(str)
+        else:
+            out[c] = df[c].astype("string").fillna("").astype(str)
+    return out
+
+
+def _dedupe(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.sort_values(KEY_COLUMNS + ["price_usd"], kind="stable")
+    return df.drop_duplicates(subset=KEY_COLUMNS, keep="first").reset_index(drop=True)
+
+
+def read_bronze_partition(bronze_root: Path, snapshot_date: str) -> pd.DataFrame:
+    """Every bronze file of `dt=<snapshot_date>/` (any format, via transform.bronze_reader)."""
+    files = find_bronze_files(bronze_root, snapshot_date, snapshot_date)
+    if not files:
+        raise FileNotFoundError(f"No bronze fares file in {bronze_root / f'dt={snapshot_date}'}")
+    raw = pd.concat([read_bronze_file(f).to_pandas() for f in files], ignore_index=True)
+    return _dedupe(_normalize(raw))
+
+
+def partition_dates(root: Path, file_names: Optional[tuple] = None) -> List[str]:
+    """
+    Sorted dates of `dt=` partitions under `root` that contain one of `file_names`
+    (default: any bronze fares file).
+    """
+    if file_names is None:
+        return sorted({d for d in map(bronze_partition_date, find_bronze_files(root)) if d})
+    dates = []
+    for p in root.glob("dt=*"):
+        m = _DT_RE.match(p.name)
+        if m and any((p / n).exists() for n in file_names):
+            dates.append(m.group(1))
+    return sorted(dates)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Delta encode / apply
+def compute_delta(prev: pd.DataFrame, curr: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rows of `curr` that are new or changed vs `prev` (op I/U), plus rows of
+    `prev` whose key disappeared (op D, previous values). Columns: BRONZE_HEADER + op.
+    """
+    merged = curr.merge(
+        prev[KEY_COLUMNS + VALUE_COLUMNS + VOLATILE_COLUMNS],
+        on=KEY_COLUMNS,
+        how="outer",
+        suffixes=("", "_prev"),
+        indicator=True,
+    )
+    both = merged["_merge"] == "both"
+    changed = pd.Series(False, index=merged.index)
+    for c in VALUE_COLUMNS:
+        a, b = merged[c], merged[f"{c}_prev"]
+        changed |= ~((a == b) | (a.isna() & b.isna()))
+
+    inserted = merged[merged["_merge"] == "left_only"][BRONZE_HEADER].assign(op=OP_INSERT)
+    updated = merged[both & changed][BRONZE_HEADER].assign(op=OP_UPDATE)
+
+    gone = merged[merged["_merge"] == "right_only"]
+    prev_cols = {f"{c}_prev": c for c in VALUE_COLUMNS + VOLATILE_COLUMNS}
+    deleted = gone[KEY_COLUMNS + list(prev_cols)].rename(columns=prev_cols)
+    deleted = deleted[BRONZE_HEADER].assign(op=OP_DELETE)
+
+    delta = pd.concat([inserted, updated, deleted], ignore_index=True)
+    return delta.astype({c: prev[c].dtype for c in BRONZE_HEADER}).sort_values(
+        KEY_COLUMNS, kind="stable"
+    ).reset_index(drop=True)
+
+
+def apply_delta(snapshot: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of compute_delta: apply_delta(prev, compute_delta(prev, curr)) == curr."""
+    touched = pd.MultiIndex.from_frame(delta[KEY_COLUMNS])
+    keep = ~pd.MultiIndex.from_frame(snapshot[KEY_COLUMNS]).isin(touched)
+    upserts = delta[delta["op"] != OP_DELETE][BRONZE_HEADER]
+    out = pd.concat([snapshot[keep], upserts], ignore_index=True)
+    return out.sort_values(KEY_COLUMNS, kind="stable").reset_index(drop=True)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Delta store
+def stored_dates(delta_root: Path) -> List[str]:
+    return partition_dates(delta_root, (BASE_NAME, DELTA_NAME))
+
+
+def read_snapshot(delta_root: Path, snapshot_date: str) -> pd.DataFrame:
+    """Full snapshot for `snapshot_date`, rebuilt from the nearest base + deltas."""
+    chain = [d for d in stored_dates(delta_root) if d <= snapshot_date]
+    if not chain or chain[-1] != snapshot_date:
+        raise FileNotFoundError(f"No delta-store partition for dt={snapshot_date} in {delta_root}")
+
+    bases = [d for d in chain if (delta_root / f"dt={d}" / BASE_NAME).exists()]
+    if not bases:
+        raise FileNotFoundError(f"No base snapshot at or before dt={snapshot_date}")
+
+    snap = pd.read_parquet(delta_root / f"dt={bases[-1]}" / BASE_NAME)
+    for d in chain:
+        if d > bases[-1]:
+            snap = apply_delta(snap, pd.read_parquet(delta_root / f"dt={d}" / DELTA_NAME))
+    return snap.assign(snapshot_date=snapshot_date)
+
+
+def _write_parquet(df: pd.DataFrame, path: Path) -> None:
+    tmp = path.with_name(f"{path.name}.tmp")
+    df.to_parquet(tmp, index=False, compression="zstd")
+    tmp.replace(path)
+
+
+def encode_snapshot(
+    bronze_root: Path, delta_root: Path, snapshot_date: str, base_every: int = 7
+) -> DeltaStats:
+    """
+    Store `snapshot_date` in the delta store: a base if it is the first date or
+    `base_every` days after the last base, else a delta vs the previous stored date.
+    """
+    curr = read_bronze_partition(bronze_root, snapshot_date)
+    out_dir = delta_root / f"dt={snapshot_date}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    stored = stored_dates(delta_root)
+    later = [d for d in stored if d > snapshot_date]
+    if later:
+        # Later deltas were computed against the old version of this date.
+        raise ValueError(
+            f"dt={snapshot_date} is older than stored dt={later[-1]}; "
+            f"rebuild the delta store from dt={snapshot_date} onwards instead"
+        )
+    earlier = [d for d in stored if d < snapshot_date]
+    last_base = max(
+        (d for d in earlier if (delta_root / f"dt={d}" / BASE_NAME).exists()), default=None
+    )
+    needs_base = last_base is None or (
+        date.fromisoformat(snapshot_date) - date.fromisoformat(last_base)
+    ).days >= base_every
+
+    # A date may be re-encoded (e.g. bronze rewritten): drop whatever was there.
+    for name in (BASE_NAME, DELTA_NAME):
+        (out_dir / name).unlink(missing_ok=True)
+
+    if needs_base:
+        _write_parquet(curr, out_dir / BASE_NAME)
+        return DeltaStats(snapshot_date, "base", rows=len(curr))
+
+    prev = read_snapshot(delta_root, earlier[-1])
+    delta = compute_delta(prev, curr)
+    _write_parquet(delta, out_dir / DELTA_NAME)
+    ops = delta["op"].value_counts()
+    return DeltaStats(
+        snapshot_date,
+        "delta",
+        rows=len(curr),
+        inserted=int(ops.get(OP_INSERT, 0)),
+        changed=int(ops.get(OP_UPDATE, 0)),
+        deleted=int(ops.get(OP_DELETE, 0)),
+    )
+
+
+def _print_stats(s: DeltaStats) -> None:
+    ratio = s.stored_rows / s.rows if s.rows else 0.0
+    print(
+        f"[OK] dt={s.snapshot_date} {s.kind}: rows={s.rows} stored={s.stored_rows} "
+        f"({ratio:.1%}) inserted={s.inserted} changed={s.changed} deleted={s.deleted}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Delta-encode collector bronze snapshots")
+    p.add_argument("--bronze-root", default="data/bronze")
+    p.add_argument("--delta-root", default="data/delta")
+    p.add_argument("--date", default=None, help="Snapshot date to encode (default: today)")
+    p.add_argument("--all", action="store_true", help="Encode every bronze date not yet stored")
+    p.add_argument("--base-every", type=int, default=7, help="Days between full base snapshots")
+    p.add_argument("--reconstruct", default=None, help="Rebuild the snapshot for this date")
+    p.add_argument("--output", default=None, help="CSV/Parquet path for --reconstruct")
+    args = p.parse_args(argv)
+
+    bronze_root, delta_root = Path(args.bronze_root), Path(args.delta_root)
+
+    if args.reconstruct:
+        df = read_snapshot(delta_root, args.reconstruct)
+        out = Path(args.output or f"fares_{args.reconstruct}.csv")
+        out.parent.mkdir(parents=True, exist_ok=True)
+        if out.suffix == ".parquet":
+            df.to_parquet(out, index=False)
+        else:
+            df.to_csv(out, index=False)
+        print(f"[OK] Rebuilt dt={args.reconstruct}: rows={len(df)} -> {out}")
+        return 0
+
+    if args.all:
+        done = set(stored_dates(delta_root))
+        todo = [d for d in partition_dates(bronze_root) if d not in done]
+    else:
+        todo = [args.date or date.today().isoformat()]
+
+    for d in todo:
+        _print_stats(encode_snapshot(bronze_root, delta_root, d, args.base_every))
+    if not todo:
+        print("[OK] Delta store is up to date.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
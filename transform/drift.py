@@ -0,0 +1,259 @@
+# transform/drift.py
+"""
+Per-route distribution / drift checks on silver, from sketches only.
+
+For every silver partition, one `RouteSketch` per origin-dest route is stored in
+`<dataset>/_sketches/snapshot_date=YYYY-MM-DD.json` (tagged with the partition's
+content hash, so only new/changed partitions are ever re-read):
+
+  rows          row count
+  price         QuantileSketch of price_usd
+  depart_dates  DistinctSketch of depart_date
+  gates         DistinctSketch of gate
+
+A new partition is compared, route by route, with the merged sketches of the
+previous `window` partitions (its rolling baseline):
+
+  route_rows_collapsed   rows < min_rows_ratio * baseline median rows/day
+  price_median_shift     p50 moved by more than price_factor (either way)
+  price_spike            max > spike_factor * baseline p99
+  depart_dates_dropped   distinct depart_dates < min_distinct_ratio * baseline
+  gates_dropped          distinct gates < min_distinct_ratio * baseline
+
+Work per run is proportional to the new partitions' rows (to sketch them) plus
+window * routes small JSON sketches, not to the total history.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from transform.sketches import (
+    HLL_P,
+    DistinctSketch,
+    QuantileSketch,
+    hll_registers,
+    quantile_index,
+)
+from transform.silver_dataset import partition_dates, read_silver
+
+SKETCH_DIR = "_sketches"
+SKETCH_COLUMNS = ["origin", "dest", "price_usd", "depart_date", "gate"]
+
+
+@dataclass
+class RouteSketch:
+    rows: int = 0
+    price: QuantileSketch = field(default_factory=QuantileSketch)
+    depart_dates: DistinctSketch = field(default_factory=DistinctSketch)
+    gates: DistinctSketch = field(default_factory=DistinctSketch)
+
+    def merge(self, other: "RouteSketch") -> "RouteSketch":
+        self.rows += other.rows
+        self.price.merge(other.price)
+        self.depart_dates.merge(other.depart_dates)
+        self.gates.merge(other.gates)
+        return self
+
+    def to_json(self) -> dict:
+        return {
+            "rows": self.rows,
+            "price": self.price.to_json(),
+            "depart_dates": self.depart_dates.to_json(),
+            "gates": self.gates.to_json(),
+        }
+
+    @classmethod
+    def from_json(cls, d: dict) -> "RouteSketch":
+        return cls(
+            d["rows"],
+            QuantileSketch.from_json(d["price"]),
+            DistinctSketch.from_json(d["depart_dates"]),
+            DistinctSketch.from_json(d["gates"]),
+        )
+
+
+def build_route_sketches(df: pd.DataFrame) -> Dict[str, RouteSketch]:
+    """One RouteSketch per origin-dest route, built with grouped numpy ops (no per-row Python)."""
+    if df.empty:
+        return {}
+    codes, pairs = pd.MultiIndex.from_arrays([df["origin"], df["dest"]]).factorize()
+    routes = [f"{o}-{d}" for o, d in pairs]
+    n_routes = len(routes)
+    rows = np.bincount(codes, minlength=n_routes)
+
+    price = pd.to_numeric(df["price_usd"], errors="coerce").to_numpy(dtype="float64")
+    ok = price > 0
+    bins = (
+        pd.DataFrame({"route": codes[ok], "bin": quantile_index(price[ok])})
+        .value_counts()
+        .sort_index()
+    )
+    price_bins: Dict[int, Dict[int, int]] = {}
+    for (route, b), n in bins.items():
+        price_bins.setdefault(route, {})[b] = int(n)
+
+    def registers(column: str) -> np.ndarray:
+        regs = np.zeros((n_routes, 1 << HLL_P), dtype="uint8")
+        if column not in df.columns:
+            return regs
+        s = df[column]
+        present = s.notna().to_numpy()
+        index, rank = hll_registers(s[present])
+        best = (
+            pd.DataFrame({"route": codes[present], "index": index, "rank": rank})
+            .groupby(["route", "index"])["rank"]
+            .max()
+        )
+        r, i = best.index.get_level_values(0), best.index.get_level_values(1)
+        regs[r, i] = best.to_numpy().astype("uint8")
+        return regs
+
+    departs, gates = registers("depart_date"), registers("gate")
+    return {
+        route: RouteSketch(
+            int(rows[k]),
+            QuantileSketch(bins=price_bins.get(k, {})),
+            DistinctSketch(registers=departs[k]),
+            DistinctSketch(registers=gates[k]),
+        )
+        for k, route in enumerate(routes)
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Storage: <dataset>/_sketches/snapshot_date=YYYY-MM-DD.json
+def sketch_path(dataset_dir: Path, snapshot_date: str) -> Path:
+    return Path(dataset_dir) / SKETCH_DIR / f"snapshot_date={snapshot_date}.json"
+
+
+def _load(dataset_dir: Path, snapshot_date: str) -> Optional[dict]:
+    try:
+        return json.loads(sketch_path(dataset_dir, snapshot_date).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def load_sketches(dataset_dir: Path, snapshot_date: str) -> Dict[str, RouteSketch]:
+    d = _load(dataset_dir, snapshot_date) or {"routes": {}}
+    return {route: RouteSketch.from_json(s) for route, s in d["routes"].items()}
+
+
+def update_sketches(dataset_dir: Path, content_hashes: Dict[str, str]) -> List[str]:
+    """
+    (Re)build sketches of partitions whose stored content hash differs from
+    `content_hashes[date]`; drop sketches of partitions that no longer exist.
+    Returns the dates that were rebuilt.
+    """
+    dataset_dir = Path(dataset_dir)
+    (dataset_dir / SKETCH_DIR).mkdir(parents=True, exist_ok=True)
+    rebuilt = []
+    for snapshot_date, content_hash in sorted(content_hashes.items()):
+        prev = _load(dataset_dir, snapshot_date)
+        if prev and prev.get("content_hash") == content_hash:
+            continue
+        df = read_silver(dataset_dir, start=snapshot_date, end=snapshot_date,
+                         columns=SKETCH_COLUMNS)
+        sketches = build_route_sketches(df)
+        path = sketch_path(dataset_dir, snapshot_date)
+        tmp = path.with_name(f"{path.name}.tmp")
+        tmp.write_text(
+            json.dumps({
+                "content_hash": content_hash,
+                "routes": {route: s.to_json() for route, s in sketches.items()},
+            }),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+        rebuilt.append(snapshot_date)
+    for path in (dataset_dir / SKETCH_DIR).glob("snapshot_date=*.json"):
+        if path.stem.split("=", 1)[1] not in content_hashes:
+            path.unlink()
+    return rebuilt
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Checks
+@dataclass(frozen=True)
+class DriftThresholds:
+    window: int = 7  # baseline = this many previous partitions
+    min_baseline_days: int = 3  # route must appear on at least this many of them
+    min_rows: int = 20  # price checks need this many rows today and per baseline day
+    min_rows_ratio: float = 0.1
+    price_factor: float = 3.0
+    spike_factor: float = 10.0
+    min_distinct_ratio: float = 0.5
+
+
+def _finding(snapshot_date, route, check, value, baseline) -> dict:
+    return {
+        "snapshot_date": snapshot_date,
+        "route": route,
+        "check": check,
+        "value": round(float(value), 2),
+        "baseline": round(float(baseline), 2),
+    }
+
+
+def check_drift(
+    dataset_dir: Path,
+    dates: Sequence[str],
+    thresholds: Optional[DriftThresholds] = None,
+) -> List[dict]:
+    """Drift findings for partitions `dates`, each against its previous `window` partitions."""
+    all_dates = partition_dates(dataset_dir)
+    cache: Dict[str, Dict[str, RouteSketch]] = {}
+
+    def sketches(d: str) -> Dict[str, RouteSketch]:
+        if d not in cache:
+            cache[d] = load_sketches(dataset_dir, d)
+        return cache[d]
+
+    t = thresholds if thresholds is not None else DriftThresholds()
+    findings = []
+    for d in sorted(dates):
+        pos = all_dates.index(d) if d in all_dates else len(all_dates)
+        window = all_dates[max(0, pos - t.window):pos]
+        if len(window) < t.min_baseline_days:
+            continue
+        today = sketches(d)
+        per_route: Dict[str, List[RouteSketch]] = {}
+        for b in window:
+            for route, s in sketches(b).items():
+                per_route.setdefault(route, []).append(s)
+
+        for route, days in sorted(per_route.items()):
+            if len(days) < t.min_baseline_days:
+                continue
+            base_rows = float(np.median([s.rows for s in days] + [0] * (len(window) - len(days))))
+            cur = today.get(route, RouteSketch())
+            if base_rows > 0 and cur.rows < t.min_rows_ratio * base_rows:
+                findings.append(_finding(d, route, "route_rows_collapsed", cur.rows, base_rows))
+                continue
+
+            base = RouteSketch()
+            for s in days:
+                base.merge(s)  # into a fresh sketch: the cached ones stay untouched
+            if cur.rows >= t.min_rows and base_rows >= t.min_rows:
+                p50, base_p50 = cur.price.quantile(0.5), base.price.quantile(0.5)
+                if p50 > t.price_factor * base_p50 or p50 * t.price_factor < base_p50:
+                    findings.append(_finding(d, route, "price_median_shift", p50, base_p50))
+                top, base_p99 = cur.price.quantile(1.0), base.price.quantile(0.99)
+                if top > t.spike_factor * base_p99:
+                    findings.append(_finding(d, route, "price_spike", top, base_p99))
+
+            for check, attr in (
+                ("depart_dates_dropped", "depart_dates"),
+                ("gates_dropped", "gates"),
+            ):
+                base_n = float(np.mean([getattr(s, attr).estimate() for s in days]))
+                cur_n = getattr(cur, attr).estimate()
+                if base_n >= 2 and cur_n < t.min_distinct_ratio * base_n:
+                    findings.append(_finding(d, route, check, cur_n, base_n))
+    return findings
@@ -0,0 +1,86 @@
+# transform/engines.py
+"""
+Columnar engines for the bronze -> silver clean/cast/dedupe step.
+
+Every engine takes the bronze rows as one pyarrow Table (standardized column names,
+see `transform.bronze_to_silver.read_bronze_table`) and returns a compact silver
+frame (transform/fare_schema.py) with the same rows, in the same order, as the
+pandas reference `transform.bronze_to_silver._clean_and_cast`:
+
+  origin, dest     strip + upper-case; anything that is not 3 letters -> NULL
+  dates            parsed to days; unparseable -> NULL
+  price_usd        float32
+  rows             dropped if a REQUIRED_COLUMNS value is NULL or price_usd <= 0
+  dedupe           last row per DEDUPE_COLUMNS key (input order), then input order kept
+  load_ts          one value per run
+
+The engine is picked with `bronze_to_silver --engine`; the writers are shared.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from transform.contract import DEDUPE_COLUMNS, REQUIRED_COLUMNS
+from transform.fare_schema import AIRPORT_COLUMNS, DATE_COLUMNS, constant_category, to_compact
+
+_ROW = "_bronze_row"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _clean_sql(columns) -> str:
+    """SELECT that applies the clean/cast/dedupe rules to the registered `bronze` view."""
+    replace = []
+    for c in columns:
+        q = _quote(c)
+        if c in AIRPORT_COLUMNS:
+            code = f"upper(trim(CAST({q} AS VARCHAR)))"
+            replace.append(f"CASE WHEN regexp_full_match({code}, '[A-Z]{{3}}') "
+                           f"THEN {code} END AS {q}")
+        elif c in DATE_COLUMNS:
+            replace.append(f"coalesce(TRY_CAST({q} AS DATE), "
+                           f"CAST(TRY_CAST({q} AS TIMESTAMP) AS DATE)) AS {q}")
+        elif c == "price_usd":
+            replace.append(f"TRY_CAST({q} AS FLOAT) AS {q}")
+    select = f"SELECT * REPLACE ({', '.join(replace)})" if replace else "SELECT *"
+
+    where = [f"{_quote(c)} IS NOT NULL" for c in REQUIRED_COLUMNS if c in columns]
+    if "price_usd" in columns:
+        where.append('"price_usd" > 0')
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    keys = [_quote(c) for c in DEDUPE_COLUMNS if c in columns]
+    qualify = (
+        f"QUALIFY row_number() OVER (PARTITION BY {', '.join(keys)} ORDER BY {_ROW} DESC) = 1"
+        if keys else ""
+    )
+    return (
+        f"SELECT * EXCLUDE ({_ROW}) FROM ("
+        f"SELECT * FROM ({select} FROM bronze) {where_sql} {qualify}"
+        f") ORDER BY {_ROW}"
+    )
+
+
+def duckdb_clean_and_cast(table, threads: int = 8) -> pd.DataFrame:
+    """DuckDB (multi-threaded, vectorized) implementation of the clean/cast/dedupe step."""
+    import duckdb  # optional import
+    import pyarrow as pa
+
+    columns = [c for c in table.column_names if c != _ROW]
+    table = table.append_column(_ROW, pa.array(np.arange(table.num_rows, dtype="int64")))
+
+    con = duckdb.connect(config={"threads": max(1, threads)})
+    try:
+        con.register("bronze", table)
+        out = con.sql(_clean_sql(columns)).to_arrow_table()
+    finally:
+        con.close()
+
+    df = to_compact(out.to_pandas())
+    df["load_ts"] = constant_category(pd.Timestamp(datetime.now(timezone.utc)), len(df), df.index)
+    return df
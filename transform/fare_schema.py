@@ -0,0 +1,126 @@
+# transform/fare_schema.py
+"""
+Compact in-memory representation of fare frames, shared by every stage.
+
+A plain silver frame holds origin/dest as Python str objects, dates as Python
+`date` objects and a per-row `load_ts`, i.e. ~50+ bytes per cell. The compact
+form keeps the same column names and values with smaller dtypes:
+
+  origin, dest           category over every 3-letter code (AIRPORT_DTYPE): 2 bytes,
+                         identical codes in every frame, so concat stays categorical
+  snapshot_date,
+  depart_date            datetime64[s] at midnight: 8 bytes, vectorized
+  price_usd              float32: 4 bytes (cents-exact below ~100k; widened + rounded
+                         back to 2 decimals on the way out)
+  trip_class,
+  number_of_changes      Int8
+  gate, airline, cabin   category
+  load_ts                category (one value per run): 1 byte
+
+`to_compact` converts any plain/bronze-typed frame; `to_arrow_table` is the
+storage form (date32, float64, plain strings) used when writing Parquet.
+"""
+from __future__ import annotations
+
+import string
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+AIRPORT_COLUMNS = ["origin", "dest"]
+DATE_COLUMNS = ["snapshot_date", "depart_date"]
+SMALL_INT_COLUMNS = ["trip_class", "number_of_changes"]
+LABEL_COLUMNS = ["gate", "airline", "cabin", "carrier", "currency"]
+
+DAY_DTYPE = "datetime64[s]"
+PRICE_DTYPE = "float32"
+
+
+@lru_cache(maxsize=1)
+def airport_dtype() -> pd.CategoricalDtype:
+    """Every 'AAA'..'ZZZ' code, sorted, so category codes are stable across frames."""
+    codes = ["".join(p) for p in product(string.ascii_uppercase, repeat=3)]
+    return pd.CategoricalDtype(codes, ordered=False)
+
+
+def as_airport(s: pd.Series) -> pd.Series:
+    """Strip/upper-case to AIRPORT_DTYPE; anything that is not 3 letters becomes NaN."""
+    if s.dtype == airport_dtype():
+        return s
+    # Clean the (few) distinct values, not every row, then map them onto the fixed codes.
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    cleaned = pd.Index(uniques).astype(str).str.strip().str.upper()
+    lookup = np.append(airport_dtype().categories.get_indexer(cleaned), -1).astype("int16")
+    return pd.Series(
+        pd.Categorical.from_codes(lookup[codes], dtype=airport_dtype()), index=s.index, name=s.name
+    )
+
+
+def as_day(s: pd.Series) -> pd.Series:
+    """Dates / ISO strings / timestamps -> datetime64[s] at midnight (NaT if unparseable)."""
+    if s.dtype != DAY_DTYPE:
+        s = pd.to_datetime(s, errors="coerce")
+        if getattr(s.dt, "tz", None) is not None:
+            s = s.dt.tz_localize(None)
+    return s.dt.normalize().astype(DAY_DTYPE)
+
+
+def as_price(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s, errors="coerce").astype(PRICE_DTYPE)
+
+
+def constant_category(value, n: int, index=None) -> pd.Series:
+    """A column that repeats one value, stored as 1-byte codes."""
+    return pd.Series(
+        pd.Categorical.from_codes(np.zeros(n, dtype="int8"), categories=[value]), index=index
+    )
+
+
+def day_strings(s: pd.Series) -> pd.Series:
+    """'YYYY-MM-DD' labels for a date column in any representation."""
+    return as_day(s).dt.strftime("%Y-%m-%d")
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Same columns/values, compact dtypes. Shallow: only converted columns are new."""
+    df = df.copy(deep=False)
+    for c in AIRPORT_COLUMNS:
+        if c in df.columns:
+            df[c] = as_airport(df[c])
+    for c in DATE_COLUMNS:
+        if c in df.columns:
+            df[c] = as_day(df[c])
+    if "price_usd" in df.columns:
+        df["price_usd"] = as_price(df["price_usd"])
+    for c in SMALL_INT_COLUMNS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int8")
+    for c in LABEL_COLUMNS + ["load_ts"]:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    return df
+
+
+def to_arrow_table(df: pd.DataFrame):
+    """Storage form for Parquet: date32 dates, float64 cents-rounded prices, plain strings."""
+    import pyarrow as pa  # optional import
+
+    arrays, names = [], []
+    for c in df.columns:
+        s = df[c]
+        if c in DATE_COLUMNS:
+            days = as_day(s).to_numpy(dtype="datetime64[D]")
+            arr = pa.array(days, pa.date32(), from_pandas=True)
+        elif c == "price_usd":
+            arr = pa.array(pd.to_numeric(s, errors="coerce").astype("float64").round(2))
+        elif isinstance(s.dtype, pd.CategoricalDtype):
+            # Decoded: Parquet builds its own (used-values-only) dictionary per column chunk,
+            # and the arrow type no longer depends on how many categories a frame had.
+            arr = pa.array(s).dictionary_decode()
+        else:
+            arr = pa.Array.from_pandas(s)
+        arrays.append(arr)
+        names.append(c)
+    return pa.Table.from_arrays(arrays, names=names)
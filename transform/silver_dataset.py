@@ -0,0 +1,266 @@
+# transform/silver_dataset.py
+"""
+Hive-partitioned silver dataset + predicate-pushdown reader.
+
+Layout (written by `transform.bronze_to_silver`):
+
+  data/silver/flight_fares/
+    snapshot_date=2026-01-23/part-0.parquet        (buckets=0: one file per date)
+    snapshot_date=2026-01-23/part-007-of-016.parquet  (buckets=16: crc32(origin-dest) % 16)
+    _state.json                                    (incremental mode bookkeeping)
+
+Rows are sorted by (origin, dest, depart_date) inside each file and written in
+row groups of `ROW_GROUP_SIZE` rows with min/max statistics, so a route filter
+only reads the row groups whose origin/dest range can contain the route, and a
+date filter only opens the matching snapshot_date directories.
+
+Usage:
+  from transform.silver_dataset import read_silver
+  df = read_silver("data/silver/flight_fares", origin="JFK", dest="LHR",
+                   start="2026-01-01", end="2026-01-31")
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+import zlib
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import pandas as pd
+
+from transform.fare_schema import day_strings, to_arrow_table, to_compact
+
+SORT_COLUMNS = ["origin", "dest", "depart_date"]
+ROW_GROUP_SIZE = 32 * 1024  # small enough that one route rarely spans many groups
+
+_PART_DIR_RE = re.compile(r"^snapshot_date=(\d{4}-\d{2}-\d{2})$")
+_BUCKET_FILE_RE = re.compile(r"^part-(\d+)-of-(\d+)\.parquet$")
+
+
+def bucket_of(origin: str, dest: str, buckets: int) -> int:
+    return zlib.crc32(f"{origin}-{dest}".encode("utf-8")) % buckets
+
+
+def part_file_name(bucket: Optional[int] = None, buckets: int = 0) -> str:
+    return "part-0.parquet" if bucket is None else f"part-{bucket:03d}-of-{buckets:03d}.parquet"
+
+
+def _route_may_be_in(path: Path, origin: str, dest: str) -> bool:
+    m = _BUCKET_FILE_RE.match(path.name)
+    return m is None or int(m.group(1)) == bucket_of(origin, dest, int(m.group(2)))
+
+
+def partition_dir(dataset_dir: Path, snapshot_date: str) -> Path:
+    return Path(dataset_dir) / f"snapshot_date={snapshot_date}"
+
+
+def partition_dates(dataset_dir: Path) -> List[str]:
+    dates = []
+    for p in Path(dataset_dir).glob("snapshot_date=*"):
+        m = _PART_DIR_RE.match(p.name)
+        if m and p.is_dir():
+            dates.append(m.group(1))
+    return sorted(dates)
+
+
+def file_fingerprint(path: Path, prev: Optional[dict] = None) -> dict:
+    """{size, mtime_ns, sha256}; `prev` is returned as is if size + mtime match it."""
+    # size + mtime short-circuit: only hash files that look touched.
+    st = Path(path).stat()
+    if prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns:
+        return prev
+    h = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            h.update(block)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Writer
+def _write_table(df: pd.DataFrame, path: Path, row_group_size: int) -> None:
+    import pyarrow.parquet as pq  # optional import
+
+    table = to_arrow_table(df)
+    tmp = path.with_name(f"{path.name}.tmp")
+    pq.write_table(
+        table,
+        tmp,
+        row_group_size=row_group_size,
+        compression="zstd",
+        write_statistics=True,
+    )
+    os.replace(tmp, path)
+
+
+def write_partition(
+    dataset_dir: Path,
+    snapshot_date: str,
+    df: pd.DataFrame,
+    buckets: int = 0,
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> int:
+    """
+    Replace one snapshot_date partition with `df` (empty df -> partition removed).
+    `snapshot_date` is encoded in the directory name, not stored in the files.
+    Returns the number of files written.
+    """
+    part = partition_dir(dataset_dir, snapshot_date)
+    if df.empty:
+        shutil.rmtree(part, ignore_errors=True)
+        return 0
+    part.mkdir(parents=True, exist_ok=True)
+
+    df = df.drop(columns=["snapshot_date"], errors="ignore")
+    df = df.sort_values(SORT_COLUMNS, kind="stable", ignore_index=True)
+
+    if buckets > 0:
+        keys = [bucket_of(o, d, buckets) for o, d in zip(df["origin"], df["dest"])]
+        groups = [(int(b), g) for b, g in df.groupby(keys, sort=True)]
+    else:
+        groups = [(None, df)]
+
+    written = set()
+    for bucket, group in groups:
+        name = part_file_name(bucket, buckets)
+        _write_table(group, part / name, row_group_size)
+        written.add(name)
+
+    # Drop files left over from an earlier run with different buckets / routes.
+    for old in part.glob("part-*.parquet"):
+        if old.name not in written:
+            old.unlink()
+    return len(written)
+
+
+def write_silver_dataset(
+    df: pd.DataFrame,
+    dataset_dir: Path,
+    buckets: int = 0,
+    row_group_size: int = ROW_GROUP_SIZE,
+    remove_missing: bool = True,
+) -> int:
+    """
+    Write one partition per snapshot_date in `df`. With `remove_missing`, partitions
+    not in `df` are deleted (full rebuild); otherwise they are left alone.
+    """
+    dataset_dir = Path(dataset_dir)
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    dates = day_strings(df["snapshot_date"])
+
+    files = 0
+    keep = set()
+    for snapshot_date, group in df.groupby(dates, sort=True):
+        files += write_partition(dataset_dir, snapshot_date, group, buckets, row_group_size)
+        keep.add(snapshot_date)
+    for snapshot_date in partition_dates(dataset_dir) if remove_missing else []:
+        if snapshot_date not in keep:
+            shutil.rmtree(partition_dir(dataset_dir, snapshot_date))
+    return files
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Reader
+@dataclass
+class ScanStats:
+    files: int = 0
+    row_groups_total: int = 0
+    row_groups_read: int = 0
+
+
+def _filter_expr(origin, dest, start, end, depart_start, depart_end):
+    import pyarrow as pa  # optional import
+    import pyarrow.dataset as ds
+
+    def day(v: Union[str, date]) -> "pa.Scalar":
+        return pa.scalar(date.fromisoformat(v) if isinstance(v, str) else v, pa.date32())
+
+    parts = []
+    if origin:
+        parts.append(ds.field("origin") == origin)
+    if dest:
+        parts.append(ds.field("dest") == dest)
+    if start:
+        parts.append(ds.field("snapshot_date") >= day(start))
+    if end:
+        parts.append(ds.field("snapshot_date") <= day(end))
+    if depart_start:
+        parts.append(ds.field("depart_date") >= day(depart_start))
+    if depart_end:
+        parts.append(ds.field("depart_date") <= day(depart_end))
+
+    expr = None
+    for p in parts:
+        expr = p if expr is None else expr & p
+    return expr
+
+
+def read_silver(
+    dataset_dir: Union[str, Path],
+    origin: Optional[str] = None,
+    dest: Optional[str] = None,
+    start: Optional[Union[str, date]] = None,
+    end: Optional[Union[str, date]] = None,
+    depart_start: Optional[Union[str, date]] = None,
+    depart_end: Optional[Union[str, date]] = None,
+    columns: Optional[Sequence[str]] = None,
+    stats: Optional[ScanStats] = None,
+) -> pd.DataFrame:
+    """
+    Silver rows matching the predicates (all optional, ANDed; dates inclusive).
+    Date predicates prune snapshot_date directories, origin+dest prune route buckets,
+    and every predicate is checked against row-group statistics before reading.
+    Pass a `ScanStats` to see how much was actually read. Returns a compact frame
+    (see transform/fare_schema.py).
+    """
+    import pyarrow as pa  # optional import
+    import pyarrow.dataset as ds
+
+    dataset_dir = Path(dataset_dir)
+    start_s = str(start) if start else None
+    end_s = str(end) if end else None
+
+    files = []
+    for d in partition_dates(dataset_dir):
+        if (start_s and d < start_s) or (end_s and d > end_s):
+            continue
+        for p in sorted(partition_dir(dataset_dir, d).glob("part-*.parquet")):
+            if not (origin and dest) or _route_may_be_in(p, origin, dest):
+                files.append(str(p))
+
+    if not files:
+        return to_compact(pd.DataFrame(columns=list(columns) if columns else None))
+    partitioning = ds.partitioning(pa.schema([("snapshot_date", pa.date32())]), flavor="hive")
+    dataset = ds.dataset(
+        files, format="parquet", partitioning=partitioning, partition_base_dir=str(dataset_dir)
+    )
+    expr = _filter_expr(origin, dest, start, end, depart_start, depart_end)
+
+    # Partitions written from different bronze formats can carry different optional
+    # columns (e.g. airline/cabin): read every fragment with the union of their schemas.
+    fragments = list(dataset.get_fragments(filter=expr))
+    schema = pa.unify_schemas(
+        [dataset.schema] + [f.physical_schema for f in fragments], promote_options="permissive"
+    )
+    if columns is not None:
+        columns = [c for c in columns if c in schema.names]  # optional columns may be absent
+
+    tables = []
+    for fragment in fragments:
+        row_groups = fragment.split_by_row_group(expr, schema=schema)
+        if stats is not None:
+            stats.files += 1
+            stats.row_groups_total += fragment.num_row_groups
+            stats.row_groups_read += len(row_groups)
+        for rg in row_groups:
+            tables.append(rg.to_table(schema=schema, filter=expr, columns=columns))
+
+    if not tables:
+        empty = schema.empty_table()
+        return to_compact((empty.select(list(columns)) if columns else empty).to_pandas())
+    return to_compact(pa.concat_tables(tables).to_pandas())
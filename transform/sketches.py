@@ -0,0 +1,125 @@
+# transform/sketches.py
+"""
+Small mergeable sketches (numpy only), used for per-route drift checks.
+
+  QuantileSketch  log-bucketed histogram (DDSketch): any quantile within `alpha`
+                  relative error; merge = add bucket counts
+  DistinctSketch  HyperLogLog with 2**p registers: distinct count within
+                  ~1.04/sqrt(2**p); merge = element-wise max
+
+Both are built vectorized from whole columns (`*_index` / `*_registers` helpers
+return per-row bucket ids so callers can group many sketches in one pass) and
+serialize to small JSON-friendly dicts.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+QUANTILE_ALPHA = 0.01
+HLL_P = 6  # 64 registers: ~13% error, plenty for "did coverage collapse?"
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Quantiles
+def _gamma(alpha: float) -> float:
+    return (1 + alpha) / (1 - alpha)
+
+
+def quantile_index(values: np.ndarray, alpha: float = QUANTILE_ALPHA) -> np.ndarray:
+    """Bucket id per value; values must be > 0 (callers drop non-positive prices)."""
+    values = np.asarray(values, dtype="float64")
+    return np.ceil(np.log(np.maximum(values, 1e-9)) / math.log(_gamma(alpha))).astype("int64")
+
+
+@dataclass
+class QuantileSketch:
+    alpha: float = QUANTILE_ALPHA
+    bins: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def count(self) -> int:
+        return sum(self.bins.values())
+
+    @classmethod
+    def from_values(cls, values, alpha: float = QUANTILE_ALPHA) -> "QuantileSketch":
+        idx, counts = np.unique(quantile_index(values, alpha), return_counts=True)
+        return cls(alpha, dict(zip(idx.tolist(), counts.tolist())))
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        for k, v in other.bins.items():
+            self.bins[k] = self.bins.get(k, 0) + v
+        return self
+
+    def quantile(self, q: float) -> float:
+        n = self.count
+        if n == 0:
+            return float("nan")
+        rank, seen = q * (n - 1), 0
+        gamma = _gamma(self.alpha)
+        for k in sorted(self.bins):
+            seen += self.bins[k]
+            if seen > rank:
+                return 2 * gamma ** k / (gamma + 1)
+        return 2 * gamma ** max(self.bins) / (gamma + 1)
+
+    def to_json(self) -> dict:
+        return {"alpha": self.alpha, "bins": {str(k): v for k, v in self.bins.items()}}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "QuantileSketch":
+        return cls(d["alpha"], {int(k): int(v) for k, v in d["bins"].items()})
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Distinct counts
+def hll_registers(values: pd.Series, p: int = HLL_P):
+    """(register index, rank) per value: the HyperLogLog update for each row."""
+    # Hashes values, not categorical codes / dtypes-specific bytes: stable across frames.
+    h = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype="uint64")
+    index = (h >> np.uint64(64 - p)).astype("int64")
+    rest = h & np.uint64((1 << (64 - p)) - 1)
+    _, bit_length = np.frexp(rest.astype("float64"))
+    rank = (64 - p) - bit_length + 1  # leading zeros in the low (64 - p) bits, + 1
+    return index, rank.astype("int64")
+
+
+@dataclass
+class DistinctSketch:
+    p: int = HLL_P
+    registers: np.ndarray = None
+
+    def __post_init__(self):
+        if self.registers is None:
+            self.registers = np.zeros(1 << self.p, dtype="uint8")
+
+    @classmethod
+    def from_values(cls, values: pd.Series, p: int = HLL_P) -> "DistinctSketch":
+        sketch = cls(p)
+        index, rank = hll_registers(values.dropna(), p)
+        np.maximum.at(sketch.registers, index, rank.astype("uint8"))
+        return sketch
+
+    def merge(self, other: "DistinctSketch") -> "DistinctSketch":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype("float64"))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # small-range (linear counting) correction
+        return raw
+
+    def to_json(self) -> dict:
+        return {"p": self.p, "registers": self.registers.tobytes().hex()}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "DistinctSketch":
+        return cls(d["p"], np.frombuffer(bytes.fromhex(d["registers"]), dtype="uint8").copy())
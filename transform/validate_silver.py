@@ -1,66 +1,461 @@
 # transform/validate_silver.py
+"""
+Silver contract validation (transform/contract.py).
+
+The contract is compiled once into a list of `Check`s. Every check reduces a batch
+to a small mergeable metric (a null count, a bad-row count, a set of distinct
+values), so all checks run in one pass per batch and partial results just add up:
+
+  validate_df(df)         one pass over an in-memory frame
+  validate_parquet(files) one task per Parquet row group, run in parallel; checks
+                          are answered from row-group statistics (null_count,
+                          min/max) and dictionary pages when possible, and only
+                          the columns that stats cannot answer are decoded
+  validate_dataset(dir)   validate_parquet per snapshot_date partition, with each
+                          partition's metrics cached by content + contract hash, so
+                          a daily run only scans new/changed partitions, and checks
+                          them for per-route drift from sketches (transform/drift.py)
+
+The JSON report has the same rows/cols/issues/ok as before plus `timings_ms`
+(time spent per check, summed over row groups) and scan counters.
+
+Run:
+  python -m transform.validate_silver --path data/silver/flight_fares
+  python -m transform.validate_silver --path data/silver/flight_fares --workers 16
+  python -m transform.validate_silver --path data/silver/flight_fares --full   # ignore cache
+  python -m transform.validate_silver --path data/silver/flight_fares --fail-on-drift
+"""
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
 
 import pandas as pd
 
-from transform.contract import REQUIRED_COLUMNS, NULL_THRESHOLDS, ACCEPTED_CABIN
+from transform.drift import DriftThresholds, check_drift, update_sketches
+from transform.contract import ACCEPTED_CABIN, NULL_THRESHOLDS, REQUIRED_COLUMNS
+from transform.silver_dataset import file_fingerprint, partition_dates, partition_dir
 
-def validate_df(df: pd.DataFrame) -> dict:
-    issues = []
 
-    # row count
-    if len(df) == 0:
+@dataclass(frozen=True)
+class Check:
+    name: str
+    kind: str  # "null_rate" | "positive" | "accepted"
+    column: str
+    max_null: float = 0.0
+    accepted: FrozenSet[str] = frozenset()
+
+def compile_contract() -> List[Check]:
+    checks = [
+        Check(f"null_rate:{col}", "null_rate", col, max_null=max_null)
+        for col, max_null in NULL_THRESHOLDS.items()
+    ]
+    checks.append(Check("positive:price_usd", "positive", "price_usd"))
+    checks.append(Check("accepted:cabin", "accepted", "cabin", accepted=frozenset(ACCEPTED_CABIN)))
+    return checks
+
+CHECKS = compile_contract()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Metrics (per batch) -> merged -> issues
+def _empty_metric(check: Check):
+    return set() if check.kind == "accepted" else 0
+
+def _merge(into: dict, part: dict) -> None:
+    for name, value in part.items():
+        if isinstance(value, set):
+            into.setdefault(name, set()).update(value)
+        else:
+            into[name] = into.get(name, 0) + value
+
+def evaluate(rows: int, columns: Sequence[str], metrics: dict, checks=CHECKS) -> List[str]:
+    """Contract issues from merged metrics (same messages for frames and Parquet)."""
+    issues = []
+    if rows == 0:
         issues.append("row_count is 0")
 
-    # required columns exist
-    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
     if missing:
         issues.append(f"missing_required_columns: {missing}")
 
-    # null thresholds
-    for col, max_null in NULL_THRESHOLDS.items():
-        if col in df.columns:
-            null_rate = float(df[col].isna().mean())
-            if null_rate > max_null:
-                issues.append(f"null_rate_too_high: {col}={null_rate:.3f} > {max_null:.3f}")
-
-    # price > 0
-    if "price_usd" in df.columns:
-        bad = int((df["price_usd"] <= 0).sum(skipna=True))
-        if bad > 0:
-            issues.append(f"price_usd_non_positive_rows: {bad}")
-
-    # accepted values example
-    if "cabin" in df.columns:
-        bad_vals = sorted(set(df["cabin"].dropna().astype(str)) - ACCEPTED_CABIN)
-        if bad_vals:
-            issues.append(f"invalid_cabin_values: {bad_vals[:10]}")
+    for check in checks:
+        if check.column not in columns:
+            continue
+        value = metrics.get(check.name, _empty_metric(check))
+        if check.kind == "null_rate":
+            null_rate = value / rows if rows else 0.0
+            if null_rate > check.max_null:
+                issues.append(
+                    f"null_rate_too_high: {check.column}={null_rate:.3f} > {check.max_null:.3f}"
+                )
+        elif check.kind == "positive" and value > 0:
+            issues.append(f"{check.column}_non_positive_rows: {value}")
+        elif check.kind == "accepted":
+            bad_vals = sorted(value - check.accepted)
+            if bad_vals:
+                issues.append(f"invalid_{check.column}_values: {bad_vals[:10]}")
+    return issues
+
+def _frame_metric(check: Check, s: pd.Series):
+    if check.kind == "null_rate":
+        return int(s.isna().sum())
+    if check.kind == "positive":
+        return int((pd.to_numeric(s, errors="coerce") <= 0).sum())
+    # Distinct values only (categoricals: their used categories), not a set of every row.
+    return set(pd.unique(s.dropna()).astype(str))
 
+def validate_df(df: pd.DataFrame, checks=CHECKS) -> dict:
+    metrics, timings = {}, defaultdict(float)
+    for check in checks:
+        if check.column in df.columns:
+            started = time.perf_counter()
+            metrics[check.name] = _frame_metric(check, df[check.column])
+            timings[check.name] += time.perf_counter() - started
+
+    issues = evaluate(len(df), list(df.columns), metrics, checks)
     return {
         "rows": int(len(df)),
         "cols": int(len(df.columns)),
         "issues": issues,
         "ok": len(issues) == 0,
+        "timings_ms": {k: round(v * 1000, 3) for k, v in timings.items()},
     }
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Parquet: one task per row group, statistics first
+@dataclass(frozen=True)
+class _RowGroupTask:
+    path: str
+    index: int
+    partition_columns: Tuple[str, ...]  # hive keys: never null inside a partition
+    read_dictionary: Tuple[str, ...] = ()  # "accepted" columns present in the file
+
+def _stats(rg_meta, column: str):
+    for i in range(rg_meta.num_columns):
+        col = rg_meta.column(i)
+        if col.path_in_schema == column:
+            return col.statistics
+    return None
+
+def _row_group_metrics(pf, task: _RowGroupTask, checks) -> Tuple[dict, dict, int]:
+    """(metrics, seconds per check, column chunks decoded) for one row group."""
+    import pyarrow.compute as pc  # optional import
+
+    rg_meta = pf.metadata.row_group(task.index)
+    names = set(pf.schema_arrow.names)
+    metrics, timings, decoded = {}, {}, 0
+    for check in checks:
+        started = time.perf_counter()
+        col = check.column
+        if col in task.partition_columns and col not in names:
+            metrics[check.name] = _empty_metric(check)
+        elif col not in names:
+            # Column absent from this file: all of its rows count as null.
+            metrics[check.name] = rg_meta.num_rows if check.kind == "null_rate" else (
+                _empty_metric(check)
+            )
+        else:
+            st = _stats(rg_meta, col)
+            value = None
+            if check.kind == "null_rate" and st is not None and st.has_null_count:
+                value = st.null_count
+            elif check.kind == "positive" and st is not None and st.has_min_max and st.min > 0:
+                value = 0
+            elif check.kind == "accepted" and st is not None and st.has_null_count and (
+                st.null_count == rg_meta.num_rows
+            ):
+                value = set()
+            elif check.kind == "accepted" and st is not None and st.has_min_max and (
+                st.min == st.max
+            ):
+                value = {str(st.min)}
+            if value is None:
+                decoded += 1
+                # Strings come back dictionary-encoded: only the dictionary page is decoded
+                # to strings, the rows stay int indices.
+                column = pf.read_row_group(task.index, columns=[col]).column(0)
+                if check.kind == "null_rate":
+                    value = column.null_count
+                elif check.kind == "positive":
+                    value = int(pc.sum(pc.less_equal(column, 0)).as_py() or 0)
+                else:
+                    value = set()
+                    for chunk in column.chunks:
+                        if hasattr(chunk, "dictionary"):
+                            used = pc.unique(chunk.indices.drop_null())
+                            value.update(map(str, chunk.dictionary.take(used).to_pylist()))
+                        else:
+                            value.update(map(str, pc.unique(chunk.drop_null()).to_pylist()))
+            metrics[check.name] = value
+        timings[check.name] = time.perf_counter() - started
+    return metrics, timings, decoded
+
+def _validate_row_group(task: _RowGroupTask, checks):
+    import pyarrow.parquet as pq  # optional import
+
+    # One ParquetFile per task: workers never share a reader.
+    pf = pq.ParquetFile(task.path, read_dictionary=list(task.read_dictionary))
+    return _row_group_metrics(pf, task, checks)
+
+def parquet_files(path: Path) -> List[Tuple[str, Tuple[str, ...]]]:
+    """(file, hive partition columns) for a silver dataset dir or a single .parquet file."""
+    path = Path(path)
+    if not path.is_dir():
+        return [(str(path), ())]
+    return [
+        (str(p), ("snapshot_date",))
+        for d in partition_dates(path)
+        for p in sorted(partition_dir(path, d).glob("part-*.parquet"))
+    ]
+
+def _scan_files(
+    files: Sequence[Tuple[str, Tuple[str, ...]]], workers: int, checks
+) -> Dict[str, dict]:
+    """Per-file summary {rows, columns, metrics, row_groups, decoded, timings}."""
+    import pyarrow.parquet as pq  # optional import
+
+    summaries, tasks = {}, []
+    for path, partition_columns in files:
+        meta = pq.read_metadata(path)
+        names = meta.schema.to_arrow_schema().names
+        summaries[path] = {
+            "rows": meta.num_rows,
+            "columns": list(partition_columns) + names,
+            "metrics": {},
+            "row_groups": meta.num_row_groups,
+            "decoded": 0,
+            "timings": defaultdict(float),
+        }
+        dictionary = tuple(c.column for c in checks if c.kind == "accepted" and c.column in names)
+        tasks += [
+            _RowGroupTask(path, i, partition_columns, dictionary)
+            for i in range(meta.num_row_groups)
+        ]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_validate_row_group, task, checks) for task in tasks]
+        # Tasks are in (file, row group) order, so each file merges in row-group order.
+        for task, fut in zip(tasks, futures):
+            summary = summaries[task.path]
+            part, seconds, n = fut.result()
+            _merge(summary["metrics"], part)
+            for name, sec in seconds.items():
+                summary["timings"][name] += sec
+            summary["decoded"] += n
+    return summaries
+
+def _merge_summaries(summaries) -> dict:
+    total = {"rows": 0, "columns": [], "metrics": {}, "row_groups": 0, "decoded": 0,
+             "timings": defaultdict(float)}
+    for s in summaries:
+        total["rows"] += s["rows"]
+        total["columns"] += [c for c in s["columns"] if c not in total["columns"]]
+        _merge(total["metrics"], s["metrics"])
+        total["row_groups"] += s["row_groups"]
+        total["decoded"] += s.get("decoded", 0)
+        for name, sec in s.get("timings", {}).items():
+            total["timings"][name] += sec
+    return total
+
+def _report(total: dict, checks, started: float, extra_issues=(), **extra) -> dict:
+    issues = evaluate(total["rows"], total["columns"], total["metrics"], checks)
+    issues += list(extra_issues)
+    return {
+        "rows": int(total["rows"]),
+        "cols": len(total["columns"]),
+        "issues": issues,
+        "ok": len(issues) == 0,
+        **extra,
+        "row_groups": total["row_groups"],
+        "column_chunks_decoded": total["decoded"],
+        "timings_ms": {k: round(v * 1000, 3) for k, v in total["timings"].items()},
+        "wall_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+def validate_parquet(
+    files: Sequence[Tuple[str, Tuple[str, ...]]], workers: int = 8, checks=CHECKS
+) -> dict:
+    """Validate Parquet files row group by row group (in parallel) without loading them."""
+    started = time.perf_counter()
+    summaries = _scan_files(files, workers, checks)
+    return _report(_merge_summaries(summaries.values()), checks, started, files=len(files))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Incremental: per-partition results cached in <dataset>/_validation_cache.json
+#
+# Each snapshot_date partition's merged metrics are stored with the partition's content
+# hash (sha256 of its files, re-hashed only when size/mtime change) and the contract
+# hash. A run validates only partitions whose entry is missing or stale and merges the
+# cached metrics of the rest, so the global report is the same as a full validation.
+
+VALIDATION_CACHE_NAME = "_validation_cache.json"
+
+def contract_hash(checks=CHECKS) -> str:
+    spec = {
+        "required": REQUIRED_COLUMNS,
+        "checks": [{**asdict(c), "accepted": sorted(c.accepted)} for c in checks],
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _load_cache(dataset_dir: Path) -> dict:
+    try:
+        return json.loads((dataset_dir / VALIDATION_CACHE_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"partitions": {}}
+
+def _save_cache(dataset_dir: Path, cache: dict) -> None:
+    path = dataset_dir / VALIDATION_CACHE_NAME
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(json.dumps(cache, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _to_json_metrics(metrics: dict) -> dict:
+    return {k: sorted(v) if isinstance(v, set) else int(v) for k, v in metrics.items()}
+
+def _from_json_metrics(metrics: dict) -> dict:
+    return {k: set(v) if isinstance(v, list) else v for k, v in metrics.items()}
+
+def validate_dataset(
+    dataset_dir: Path,
+    workers: int = 8,
+    checks=CHECKS,
+    use_cache: bool = True,
+    use_drift: bool = True,
+    drift: Optional[DriftThresholds] = None,
+    fail_on_drift: bool = False,
+) -> dict:
+    """
+    Validate a silver dataset dir, re-checking only new/changed partitions. With
+    `use_drift`, those partitions are also checked for per-route drift against their
+    rolling baseline (transform/drift.py, `drift` thresholds or the defaults);
+    findings only fail the run with `fail_on_drift`.
+    """
+    started = time.perf_counter()
+    dataset_dir = Path(dataset_dir)
+    cache = _load_cache(dataset_dir) if use_cache else {"partitions": {}}
+    chash = contract_hash(checks)
+
+    entries, stale = {}, {}
+    for d in partition_dates(dataset_dir):
+        prev = cache["partitions"].get(d, {})
+        files = {
+            p.name: file_fingerprint(p, prev.get("files", {}).get(p.name))
+            for p in sorted(partition_dir(dataset_dir, d).glob("part-*.parquet"))
+        }
+        content = hashlib.sha256(
+            json.dumps(sorted((k, v["sha256"]) for k, v in files.items())).encode("utf-8")
+        ).hexdigest()
+        if prev.get("content_hash") == content and prev.get("contract_hash") == chash:
+            entries[d] = {**prev, "files": files}
+        else:
+            stale[d] = {"files": files, "content_hash": content, "contract_hash": chash}
+
+    # All stale partitions' files in one pool, then regrouped per partition.
+    scanned = _scan_files(
+        [
+            (str(partition_dir(dataset_dir, d) / name), ("snapshot_date",))
+            for d, entry in stale.items()
+            for name in entry["files"]
+        ],
+        workers,
+        checks,
+    )
+    for d, entry in stale.items():
+        part = _merge_summaries(
+            scanned[str(partition_dir(dataset_dir, d) / name)] for name in entry["files"]
+        )
+        entries[d] = {**entry, **part, "metrics": _to_json_metrics(part["metrics"])}
+
+    _save_cache(dataset_dir, {
+        "contract_hash": chash,
+        "partitions": {
+            d: {k: v for k, v in e.items() if k not in ("decoded", "timings")}
+            for d, e in entries.items()
+        },
+    })
+
+    total = _merge_summaries(
+        {**e, "metrics": _from_json_metrics(e["metrics"])}
+        for e in (entries[d] for d in sorted(entries))
+    )
+
+    findings = []
+    if use_drift:
+        t0 = time.perf_counter()
+        update_sketches(dataset_dir, {d: e["content_hash"] for d, e in entries.items()})
+        t1 = time.perf_counter()
+        findings = check_drift(dataset_dir, sorted(stale), drift)
+        total["timings"]["drift:sketches"] += t1 - t0
+        total["timings"]["drift:checks"] += time.perf_counter() - t1
+
+    drift_issues = [
+        f"drift_{f['check']}: {f['route']} {f['snapshot_date']} "
+        f"value={f['value']} baseline={f['baseline']}"
+        for f in findings
+    ] if fail_on_drift else []
+    return _report(
+        total,
+        checks,
+        started,
+        extra_issues=drift_issues,
+        partitions=len(entries),
+        partitions_validated=len(stale),
+        partitions_cached=len(entries) - len(stale),
+        drift=findings,
+    )
+
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--path", default="data/silver/flight_fares.parquet")
+    p.add_argument(
+        "--path", default="data/silver/flight_fares", help="Silver dataset dir or .parquet file"
+    )
     p.add_argument("--report", default="analytics/outputs/validation_report.json")
+    p.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 4, help="Parallel row-group validators"
+    )
+    p.add_argument("--no-drift", action="store_true", help="Skip per-route drift checks")
+    p.add_argument(
+        "--fail-on-drift", action="store_true", help="Treat drift findings as validation issues"
+    )
+    p.add_argument(
+        "--drift-window", type=int, default=DriftThresholds.window, help="Baseline partitions"
+    )
+    p.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the per-partition cache and re-validate every partition",
+    )
     args = p.parse_args()
 
-    df = pd.read_parquet(args.path)
-    result = validate_df(df)
+    path = Path(args.path)
+    if path.is_dir():
+        result = validate_dataset(
+            path,
+            args.workers,
+            use_cache=not args.full,
+            use_drift=not args.no_drift,
+            drift=DriftThresholds(window=args.drift_window),
+            fail_on_drift=args.fail_on_drift,
+        )
+    else:
+        result = validate_parquet(parquet_files(path), args.workers)
 
     Path(args.report).parent.mkdir(parents=True, exist_ok=True)
     Path(args.report).write_text(json.dumps(result, indent=2), encoding="utf-8")
 
     if not result["ok"]:
         raise SystemExit(f"[FAILED] Validation issues: {result['issues']}")
+    for f in result.get("drift", [])[:20]:
+        print(f"[WARN] drift {f['check']}: {f['route']} {f['snapshot_date']} "
+              f"value={f['value']} baseline={f['baseline']}")
     print(f"[OK] Validation passed. Report -> {args.report}")
 
 if __name__ == "__main__":
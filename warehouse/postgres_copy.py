@@ -0,0 +1,316 @@
+# warehouse/postgres_copy.py
+"""
+Bulk-load bronze files into Postgres `raw.fares` with COPY ... FROM STDIN.
+
+Two ways in, both streaming (no DataFrame, no INSERT statements):
+
+  direct   collector CSVs whose header only has raw.fares columns: the file itself
+           is the COPY input (`HEADER true`, column list taken from the header)
+  buffered every other bronze file (JSONL[.gz], Parquet, legacy CSV): read block by
+           block with transform.bronze_reader (names/types unified, gate <- airline),
+           written to an in-memory CSV buffer with pyarrow and COPYed per block
+
+Works with any DB-API connection whose cursor has psycopg2's `copy_expert`.
+
+Incremental loads (`load_incremental`) replace whole snapshot_date partitions and
+record them in `raw.loaded_partitions` (date -> content hash of its bronze files):
+each new/changed partition is COPYed into a temp staging table, then
+delete-then-insert into raw.fares + control row upsert in one transaction, on its
+own pooled connection. Unchanged partitions are skipped without reading them.
+A partition holding the same fares in several files (e.g. fares.jsonl + fares.csv)
+is staged too, in full loads as well: a row repeated with every raw.fares column
+equal in several files is inserted once, from the file read last (find_bronze_files
+order). Rows of one file are never merged, so fares that differ only in gate,
+trip_class or number_of_changes all stay in raw.fares.
+
+Usage:
+  from warehouse.postgres_copy import load_files
+  stats = load_files(conn, find_bronze_files(Path("data/bronze")))
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from transform.bronze_reader import (
+    DEFAULT_BLOCK_SIZE,
+    bronze_format,
+    bronze_partition_date,
+    iter_bronze_batches,
+    standard_names,
+)
+from transform.contract import BRONZE_HEADER
+from transform.silver_dataset import file_fingerprint
+
+RAW_TABLE = "raw.fares"
+RAW_COLUMNS = list(BRONZE_HEADER)
+_DATE_COLUMNS = ("snapshot_date", "depart_date")
+
+
+@dataclass(frozen=True)
+class LoadStats:
+    path: str
+    mode: str  # "direct" | "buffered"
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+
+def copy_sql(table: str, columns: Sequence[str], header: bool) -> str:
+    cols = ", ".join(columns)
+    return f"COPY {table} ({cols}) FROM STDIN WITH (FORMAT csv, HEADER {str(header).lower()})"
+
+
+def direct_columns(path: Path) -> Optional[List[str]]:
+    """raw.fares columns in file order if `path` can be COPYed as is, else None."""
+    if bronze_format(path) != "csv":
+        return None
+    with open(path, newline="", encoding="utf-8-sig") as fp:
+        header = next(csv.reader(fp), [])
+    names = standard_names(header)
+    if not names or len(set(names)) != len(names) or not set(names) <= set(RAW_COLUMNS):
+        return None
+    return names
+
+
+def iter_copy_buffers(path: Path, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[io.BytesIO]:
+    """Header-less CSV buffers with exactly RAW_COLUMNS, one per bronze block."""
+    import pyarrow as pa  # optional import
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+
+    for table in iter_bronze_batches(path, block_size):
+        arrays = []
+        for c in RAW_COLUMNS:
+            if c not in table.column_names:
+                arrays.append(pa.nulls(table.num_rows))
+            elif c in _DATE_COLUMNS:
+                # Unparseable dates load as NULL instead of failing the whole COPY.
+                arrays.append(
+                    pc.strptime(table[c], format="%Y-%m-%d", unit="s", error_is_null=True)
+                    .cast(pa.date32())
+                )
+            else:
+                arrays.append(table[c])
+        buf = io.BytesIO()
+        pacsv.write_csv(
+            pa.Table.from_arrays(arrays, names=RAW_COLUMNS),
+            buf,
+            write_options=pacsv.WriteOptions(include_header=False),
+        )
+        buf.seek(0)
+        yield buf
+
+
+def copy_file(cursor, path: Path, table: str = RAW_TABLE,
+              block_size: int = DEFAULT_BLOCK_SIZE) -> LoadStats:
+    started = time.perf_counter()
+    columns = direct_columns(path)
+    if columns is not None:
+        with open(path, "rb") as fp:
+            cursor.copy_expert(copy_sql(table, columns, header=True), fp)
+        rows, mode = cursor.rowcount, "direct"
+    else:
+        rows, mode = 0, "buffered"
+        for buf in iter_copy_buffers(path, block_size):
+            cursor.copy_expert(copy_sql(table, RAW_COLUMNS, header=False), buf)
+            rows += cursor.rowcount
+    return LoadStats(str(path), mode, int(rows), time.perf_counter() - started)
+
+
+_STAGE_TABLE = "fares_stage"
+
+
+def copy_partition(
+    cursor,
+    files: Sequence[Path],
+    table: str = RAW_TABLE,
+    snapshot_date: Optional[str] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> int:
+    """
+    COPY one partition's `files` into a temp staging table, then insert into `table`
+    every row except those repeated (all raw.fares columns equal) in a later file.
+    Duplicates within one file are kept, as a plain COPY would. With `snapshot_date`,
+    that date's rows are deleted from `table` first and it replaces the files' own
+    (the partition directory is authoritative, so a re-run deletes exactly the rows
+    it inserted last time). Returns the rows inserted.
+    """
+    rest = [c for c in RAW_COLUMNS if c != "snapshot_date"]
+    date = "%s::date" if snapshot_date else "snapshot_date"
+    columns = ", ".join(rest if snapshot_date else RAW_COLUMNS)
+    cursor.execute(f"CREATE TEMP TABLE {_STAGE_TABLE} (LIKE {table} INCLUDING DEFAULTS, "
+                   "_file int NOT NULL DEFAULT 0)")
+    for k, path in enumerate(files):
+        cursor.execute(f"ALTER TABLE {_STAGE_TABLE} ALTER COLUMN _file SET DEFAULT {k}")
+        copy_file(cursor, Path(path), _STAGE_TABLE, block_size)
+    if snapshot_date:
+        cursor.execute(f"DELETE FROM {table} WHERE snapshot_date = %s", (snapshot_date,))
+    cursor.execute(
+        f"INSERT INTO {table} (snapshot_date, {', '.join(rest)}) "
+        f"SELECT {date}, {', '.join(rest)} FROM ("
+        f"SELECT *, max(_file) OVER (PARTITION BY {columns}) AS _last_file "
+        f"FROM {_STAGE_TABLE}) s WHERE _file = _last_file",
+        (snapshot_date,) if snapshot_date else None,
+    )
+    rows = cursor.rowcount
+    cursor.execute(f"DROP TABLE {_STAGE_TABLE}")
+    return int(rows)
+
+
+def load_files(
+    conn,
+    files: Sequence[Path],
+    table: str = RAW_TABLE,
+    truncate: bool = True,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> List[LoadStats]:
+    """
+    COPY every file into `table` in one transaction (optionally emptied first). A
+    dt= partition with several files goes through a staging table (copy_partition)
+    and reports one "partition" row count.
+    """
+    stats = []
+    try:
+        with conn.cursor() as cur:
+            if truncate:
+                cur.execute(f"TRUNCATE {table}")
+            groups = itertools.groupby(
+                (Path(p) for p in files),
+                key=lambda p: p.parent if bronze_partition_date(p) else p,
+            )
+            for _, group in groups:
+                paths = list(group)
+                if len(paths) == 1:
+                    stats.append(copy_file(cur, paths[0], table, block_size))
+                    continue
+                started = time.perf_counter()
+                rows = copy_partition(cur, paths, table, block_size=block_size)
+                stats.append(LoadStats(
+                    str(paths[0].parent), "partition", rows, time.perf_counter() - started
+                ))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return stats
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Incremental partition loads
+CONTROL_TABLE = "raw.loaded_partitions"
+CONTROL_DDL = """
+create table if not exists {table} (
+  snapshot_date date primary key,
+  content_hash text not null,
+  files text not null,
+  rows bigint not null,
+  loaded_at timestamptz not null default now()
+);
+""".format(table=CONTROL_TABLE)
+
+
+@dataclass(frozen=True)
+class Partition:
+    snapshot_date: str
+    files: Tuple[Path, ...]
+    content_hash: str
+
+
+def bronze_partitions(files: Sequence[Path]) -> List[Partition]:
+    """
+    Group `dt=` partition files by date (flat files are ignored, order is kept for
+    loading) and hash their content.
+    """
+    by_date: Dict[str, List[Path]] = {}
+    for path in files:
+        d = bronze_partition_date(path)
+        if d:
+            by_date.setdefault(d, []).append(Path(path))
+    partitions = []
+    for d, paths in sorted(by_date.items()):
+        h = hashlib.sha256()
+        for path in sorted(paths):
+            h.update(f"{path.name}:{file_fingerprint(path)['sha256']}\n".encode())
+        partitions.append(Partition(d, tuple(paths), h.hexdigest()))
+    return partitions
+
+
+def loaded_partitions(conn, control_table: str = CONTROL_TABLE) -> Dict[str, str]:
+    """{snapshot_date: content_hash} from the control table."""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT snapshot_date::text, content_hash FROM {control_table}")
+        rows = cur.fetchall()
+    conn.commit()
+    return dict(rows)
+
+
+def pending_partitions(
+    partitions: Sequence[Partition], loaded: Dict[str, str], force: bool = False
+) -> List[Partition]:
+    return [p for p in partitions if force or loaded.get(p.snapshot_date) != p.content_hash]
+
+
+def load_partition(
+    conn,
+    partition: Partition,
+    table: str = RAW_TABLE,
+    control_table: str = CONTROL_TABLE,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> LoadStats:
+    """Replace one snapshot_date in `table` with the partition's files, atomically."""
+    started = time.perf_counter()
+    d = partition.snapshot_date
+    try:
+        with conn.cursor() as cur:
+            rows = copy_partition(cur, partition.files, table, snapshot_date=d,
+                                  block_size=block_size)
+            cur.execute(
+                f"INSERT INTO {control_table} (snapshot_date, content_hash, files, rows) "
+                "VALUES (%s, %s, %s, %s) ON CONFLICT (snapshot_date) DO UPDATE SET "
+                "content_hash = EXCLUDED.content_hash, files = EXCLUDED.files, "
+                "rows = EXCLUDED.rows, loaded_at = now()",
+                (d, partition.content_hash, ",".join(f.name for f in partition.files), rows),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    path = str(partition.files[0].parent)
+    return LoadStats(path, "partition", int(rows), time.perf_counter() - started)
+
+
+def load_incremental(
+    connect: Callable[[], object],
+    partitions: Sequence[Partition],
+    workers: int = 4,
+    table: str = RAW_TABLE,
+    control_table: str = CONTROL_TABLE,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> List[LoadStats]:
+    """
+    Load `partitions` (see pending_partitions) in parallel. `connect()` hands out a
+    DB-API connection and `.close()` gives it back, e.g. SQLAlchemy's
+    `engine.raw_connection` on an engine with pool_size=workers.
+    """
+    def one(partition: Partition) -> LoadStats:
+        conn = connect()
+        try:
+            return load_partition(conn, partition, table, control_table, block_size)
+        finally:
+            conn.close()
+
+    if workers <= 1 or len(partitions) <= 1:
+        return [one(p) for p in partitions]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(one, partitions))
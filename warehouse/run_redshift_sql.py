@@ -5,22 +5,60 @@ Examples:
   python warehouse/run_redshift_sql.py --help
   python warehouse/run_redshift_sql.py --dry-run
   python warehouse/run_redshift_sql.py
+
+Date-range mode: list bronze partitions under s3://S3_BUCKET/S3_PREFIX_BRONZE/,
+write one COPY manifest and load them all with a single COPY (parallel across
+slices), skipping partitions already recorded in raw.load_audit:
+  python warehouse/run_redshift_sql.py --start 2026-01-01 --end 2026-01-31 --format jsonl.gz
+  python warehouse/run_redshift_sql.py --start 2026-01-01 --end 2026-01-31 \\
+      --local-bronze data/bronze --dry-run    # offline: list a local mirror, print only
 """
 
 from __future__ import annotations
 
 import argparse
+import json
 import os
 import re
 import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from warehouse.sql_runner import (  # noqa: E402
+    format_result,
+    plan_scripts,
+    run_scripts,
+    split_statements,
+    write_report,
+)
+
 SQL_FILES = [
     ROOT / "sql" / "redshift" / "00_reset_schemas.sql",
     ROOT / "sql" / "redshift" / "01_create_raw_table.sql",
     ROOT / "sql" / "redshift" / "02_copy_from_s3.sql",
 ]
+MANIFEST_COPY_SQL = ROOT / "sql" / "redshift" / "03_copy_from_manifest.sql"
+# Parquet goes through a stage table: its double price_usd is cast to decimal(10,2).
+PARQUET_MANIFEST_COPY_SQL = ROOT / "sql" / "redshift" / "03_copy_parquet_from_manifest.sql"
+# JSONL (ingest_api_to_s3) -> raw.fares columns by position; gate <- airline.
+JSONPATHS_FILE = ROOT / "sql" / "redshift" / "fares_jsonpaths.json"
+
+# --format -> (bronze file name, COPY format options; {jsonpaths} = JSONPATHS_FILE's S3 URL)
+_CSV_OPTIONS = (
+    "ignoreheader 1 timeformat 'auto' dateformat 'auto' blanksasnull emptyasnull acceptinvchars"
+)
+_JSON_OPTIONS = "format as json '{jsonpaths}' timeformat 'auto' dateformat 'auto'"
+COPY_FORMATS = {
+    "csv": ("fares.csv", f"csv {_CSV_OPTIONS}"),
+    "jsonl": ("fares.jsonl", _JSON_OPTIONS),
+    "jsonl.gz": ("fares.jsonl.gz", f"{_JSON_OPTIONS} gzip"),
+    "parquet": ("fares.parquet", "format as parquet"),
+}
+_DT_RE = re.compile(r"(?:^|/)dt=(\d{4}-\d{2}-\d{2})/([^/]+)$")
 
 
 def get_env(name: str, default: str | None = None) -> str | None:
@@ -62,12 +100,14 @@ def required_connection_env() -> dict[str, str]:
     }
 
 
-def render_sql(sql: str) -> str:
+def render_sql(sql: str, extra: dict[str, str] | None = None) -> str:
     replacements = {
         "S3_BUCKET": get_env("S3_BUCKET"),
         "S3_PREFIX": get_env("S3_PREFIX"),
         "IAM_ROLE_ARN": get_env("IAM_ROLE_ARN"),
         "REDSHIFT_SCHEMA_RAW": get_env("REDSHIFT_SCHEMA_RAW", "raw"),
+        "AWS_REGION": get_env("AWS_REGION", "us-east-1"),
+        **(extra or {}),
     }
 
     placeholders = set(re.findall(r"\{\{([A-Z0-9_]+)\}\}", sql))
@@ -83,12 +123,200 @@ def render_sql(sql: str) -> str:
 
 
 def execute_sql(conn, sql: str) -> None:
-    statements = [stmt.strip() for stmt in sql.split(";") if stmt.strip()]
+    statements = split_statements(sql)
     with conn.cursor() as cur:
         for stmt in statements:
             cur.execute(stmt)
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Date-range mode: manifest + one COPY
+@dataclass(frozen=True)
+class BronzeObject:
+    snapshot_date: str
+    url: str
+    size: int
+
+
+def _in_range(key: str, file_name: str, start: str, end: str) -> str | None:
+    m = _DT_RE.search(key)
+    if not m or m.group(2) != file_name or not (start <= m.group(1) <= end):
+        return None
+    return m.group(1)
+
+
+def list_local_partitions(
+    bronze_dir: Path, bucket: str, prefix: str, fmt: str, start: str, end: str
+) -> list[BronzeObject]:
+    """Partitions of a local mirror of s3://bucket/prefix/ (offline planning and tests)."""
+    file_name = COPY_FORMATS[fmt][0]
+    objects = []
+    for path in sorted(Path(bronze_dir).glob(f"dt=*/{file_name}")):
+        key = f"{prefix.strip('/')}/{path.parent.name}/{path.name}".lstrip("/")
+        d = _in_range(key, file_name, start, end)
+        if d:
+            objects.append(BronzeObject(d, f"s3://{bucket}/{key}", path.stat().st_size))
+    return objects
+
+
+def list_s3_partitions(
+    s3, bucket: str, prefix: str, fmt: str, start: str, end: str
+) -> list[BronzeObject]:
+    file_name = COPY_FORMATS[fmt][0]
+    base = prefix.strip("/") + "/" if prefix.strip("/") else ""
+    objects = []
+    pages = s3.get_paginator("list_objects_v2").paginate(
+        Bucket=bucket, Prefix=base + "dt=", StartAfter=f"{base}dt={start}"
+    )
+    for page in pages:
+        for obj in page.get("Contents", []):
+            d = _in_range(obj["Key"], file_name, start, end)
+            if d:
+                objects.append(BronzeObject(d, f"s3://{bucket}/{obj['Key']}", obj["Size"]))
+    return sorted(objects, key=lambda o: o.snapshot_date)
+
+
+def build_copy_manifest(objects: list[BronzeObject]) -> dict:
+    # content_length is required for Parquet and lets Redshift split work up front.
+    return {
+        "entries": [
+            {"url": o.url, "mandatory": True, "meta": {"content_length": o.size}}
+            for o in objects
+        ]
+    }
+
+
+def manifest_key(prefix: str, start: str, end: str, fmt: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    base = prefix.strip("/") + "/" if prefix.strip("/") else ""
+    return f"{base}_manifests/fares_{start}_{end}_{fmt}_{stamp}.manifest"
+
+
+def jsonpaths_key(prefix: str) -> str:
+    base = prefix.strip("/") + "/" if prefix.strip("/") else ""
+    return f"{base}_manifests/{JSONPATHS_FILE.name}"
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def render_manifest_copy(
+    manifest_url: str, objects: list[BronzeObject], fmt: str, jsonpaths_url: str = ""
+) -> str:
+    rows = ",\n".join(
+        f"({_quote(o.snapshot_date)}, {_quote(o.url)}, {_quote(fmt)}, {_quote(manifest_url)})"
+        for o in objects
+    )
+    template = PARQUET_MANIFEST_COPY_SQL if fmt == "parquet" else MANIFEST_COPY_SQL
+    options = COPY_FORMATS[fmt][1].format(jsonpaths=jsonpaths_url)
+    return render_sql(
+        template.read_text(encoding="utf-8"),
+        {"MANIFEST_URL": manifest_url, "COPY_FORMAT": options, "AUDIT_ROWS": rows},
+    )
+
+
+def audit_ddl(schema: str) -> str:
+    return (
+        f"create table if not exists {schema}.load_audit ("
+        "snapshot_date date not null, source_url varchar(1024) not null, "
+        "format varchar(16) not null, manifest_url varchar(1024) not null, "
+        "loaded_at timestamp default getdate())"
+    )
+
+
+def loaded_audit_urls(conn, schema: str) -> set[str]:
+    with conn.cursor() as cur:
+        cur.execute(audit_ddl(schema))
+        cur.execute(f"select distinct source_url from {schema}.load_audit")
+        urls = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return urls
+
+
+def run_manifest_copy(args) -> int:
+    bucket = get_env("S3_BUCKET")
+    if not bucket:
+        print("ERROR: Missing required env var: S3_BUCKET")
+        return 1
+    schema = get_env("REDSHIFT_SCHEMA_RAW", "raw")
+    prefix = args.prefix if args.prefix is not None else get_env("S3_PREFIX_BRONZE", "bronze")
+    end = args.end or args.start
+
+    s3 = None
+    if args.local_bronze:
+        objects = list_local_partitions(
+            Path(args.local_bronze), bucket, prefix, args.format, args.start, end
+        )
+    else:
+        import boto3  # optional import
+
+        s3 = boto3.client("s3", region_name=get_env("AWS_REGION", "us-east-1"))
+        objects = list_s3_partitions(s3, bucket, prefix, args.format, args.start, end)
+
+    conn = None
+    try:
+        if args.dry_run:
+            print("[INFO] dry run: load_audit not consulted, every listed partition is planned")
+        else:
+            try:
+                import psycopg2  # type: ignore
+            except Exception:
+                print("ERROR: psycopg2 is not installed. Run: pip install psycopg2-binary")
+                return 1
+            conn_info = required_connection_env()
+            if not conn_info:
+                return 1
+            conn = psycopg2.connect(**conn_info)
+            done = loaded_audit_urls(conn, schema)
+            skipped = [o for o in objects if o.url in done]
+            objects = [o for o in objects if o.url not in done]
+            if skipped:
+                print(f"[OK] Skipping {len(skipped)} partition(s) already in {schema}.load_audit")
+
+        if not objects:
+            print(f"[OK] Nothing to load for {args.start}..{end} ({args.format})")
+            return 0
+
+        key = manifest_key(prefix, args.start, end, args.format)
+        manifest_url = f"s3://{bucket}/{key}"
+        manifest = json.dumps(build_copy_manifest(objects), indent=2)
+        jsonpaths_url = f"s3://{bucket}/{jsonpaths_key(prefix)}"
+        uses_jsonpaths = "{jsonpaths}" in COPY_FORMATS[args.format][1]
+        sql = render_manifest_copy(manifest_url, objects, args.format, jsonpaths_url)
+        if not sql:
+            return 1
+
+        if args.dry_run:
+            print(f"\n--- {manifest_url} ---\n{manifest}\n")
+            if uses_jsonpaths:
+                print(f"\n--- {jsonpaths_url} <- {JSONPATHS_FILE} ---\n")
+            print(f"\n--- copy ({args.format}) ---\n{sql}\n")
+            print(f"DRY RUN complete. {len(objects)} partition(s).")
+            return 0
+
+        if s3 is None:
+            import boto3  # optional import
+
+            s3 = boto3.client("s3", region_name=get_env("AWS_REGION", "us-east-1"))
+        if uses_jsonpaths:
+            s3.put_object(Bucket=bucket, Key=jsonpaths_key(prefix),
+                          Body=JSONPATHS_FILE.read_bytes(), ContentType="application/json")
+        s3.put_object(Bucket=bucket, Key=key, Body=manifest.encode("utf-8"),
+                      ContentType="application/json")
+        try:
+            with conn:
+                execute_sql(conn, sql)
+            print(f"SUCCESS: {len(objects)} partition(s) via {manifest_url}")
+            return 0
+        except Exception as exc:
+            print(f"FAILED: {manifest_url} -> {exc}")
+            return 1
+    finally:
+        if conn is not None:
+            conn.close()
+
+
 def build_arg_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         description="Run Redshift helper SQL (schemas + COPY commands) using env vars.",
@@ -106,11 +334,42 @@ def build_arg_parser() -> argparse.ArgumentParser:
             "01_create_raw_table.sql + 02_copy_from_s3.sql)."
         ),
     )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help=(
+            "Max files run at once, each on its own connection. Files run after the "
+            "previous one unless they declare '-- depends: ...' (see warehouse/sql_runner.py)."
+        ),
+    )
+    p.add_argument("--report", help="Write a JSON run report (per-statement timings) here.")
+    p.add_argument(
+        "--start",
+        help="Date-range mode: first dt=YYYY-MM-DD partition to COPY via a manifest.",
+    )
+    p.add_argument("--end", help="Date-range mode: last partition (default: --start).")
+    p.add_argument(
+        "--format",
+        choices=sorted(COPY_FORMATS),
+        default="csv",
+        help="Date-range mode: bronze file to load (fares.csv / .jsonl / .jsonl.gz / .parquet).",
+    )
+    p.add_argument(
+        "--prefix",
+        help="Date-range mode: bronze prefix in S3_BUCKET (default: S3_PREFIX_BRONZE or bronze).",
+    )
+    p.add_argument(
+        "--local-bronze",
+        help="Date-range mode: list partitions from this local mirror instead of S3.",
+    )
     return p
 
 
 def main() -> int:
     args = build_arg_parser().parse_args()
+    if args.start:
+        return run_manifest_copy(args)
 
     files = SQL_FILES
     if args.files:
@@ -128,9 +387,12 @@ def main() -> int:
             return 1
         rendered.append((path, sql))
 
+    scripts = plan_scripts([(path.name, sql) for path, sql in rendered])
     if args.dry_run:
-        for path, sql in rendered:
-            print(f"\n--- {path} ---\n{sql}\n")
+        for (path, sql), script in zip(rendered, scripts):
+            after = ", ".join(script.depends) or "-"
+            print(f"\n--- {path} (after: {after}; {len(split_statements(sql))} statements) ---")
+            print(f"{sql}\n")
         print("DRY RUN complete.")
         return 0
 
@@ -145,20 +407,16 @@ def main() -> int:
     if not conn_info:
         return 1
 
-    had_failure = False
-    conn = psycopg2.connect(**conn_info)
-
-    with conn:
-        for path, sql in rendered:
-            try:
-                execute_sql(conn, sql)
-                print(f"SUCCESS: {path}")
-            except Exception as exc:
-                print(f"FAILED: {path} -> {exc}")
-                had_failure = True
-
-    conn.close()
-    return 1 if had_failure else 0
+    report = run_scripts(
+        scripts,
+        lambda: psycopg2.connect(**conn_info),
+        workers=args.workers,
+        on_done=lambda result: print(format_result(result)),
+    )
+    print(f"Finished {len(scripts)} file(s) in {report['seconds']:.2f}s")
+    if args.report:
+        print(f"Report: {write_report(report, Path(args.report))}")
+    return 0 if report["ok"] else 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,328 @@
+# warehouse/sql_runner.py
+"""
+Shared SQL script runner (run_redshift_sql.py, scripts/run_analysis_queries.py).
+
+  split_statements  splits on `;` outside '...' / E'...' strings, "quoted" identifiers,
+                    $tag$...$tag$ bodies, -- line and /* nested */ block comments;
+                    comment-only chunks are dropped
+  plan_scripts      dependencies from optional header lines (the leading comment
+                    block, before any code) of each file:
+                        -- depends: 01_create_raw_table.sql, 02_copy_from_s3.sql
+                        -- depends: none
+                    names not part of the run are ignored; files without the header
+                    depend on the previous file (serial_default=True) or on nothing
+  run_scripts       runs every file once its dependencies succeeded, independent files
+                    concurrently on up to `workers` pooled connections; one transaction
+                    per file; per-statement seconds + row counts; returns a JSON-ready
+                    report (write_report) for tracking performance across runs.
+                    With `cursor_factory`, row-returning statements get that cursor
+                    (e.g. a psycopg2 named / server-side cursor) and `on_rows` streams
+                    from it instead of the whole result landing in client memory
+
+Usage:
+  scripts = plan_scripts([(p.name, p.read_text()) for p in paths])
+  report = run_scripts(scripts, lambda: psycopg2.connect(**info), workers=4)
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+_DOLLAR_TAG = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+_DEPENDS = re.compile(r"--\s*depends\s*:(.*)", re.IGNORECASE)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Tokenizer
+def _word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+def split_statements(sql: str) -> List[str]:
+    """Statements of a script, without the terminating `;`."""
+    statements: List[str] = []
+    start, i, n, has_code = 0, 0, len(sql), False
+    while i < n:
+        c = sql[i]
+        if sql.startswith("--", i):
+            j = sql.find("\n", i)
+            i = n if j < 0 else j + 1
+            continue
+        if sql.startswith("/*", i):
+            depth, i = 1, i + 2
+            while i < n and depth:
+                if sql.startswith("/*", i):
+                    depth, i = depth + 1, i + 2
+                elif sql.startswith("*/", i):
+                    depth, i = depth - 1, i + 2
+                else:
+                    i += 1
+            continue
+        if c in ("'", '"'):
+            # E'...' strings also accept backslash escapes.
+            backslash = (
+                c == "'" and i > 0 and sql[i - 1] in "eE"
+                and (i < 2 or not _word_char(sql[i - 2]))
+            )
+            j = i + 1
+            while j < n:
+                if backslash and sql[j] == "\\":
+                    j += 2
+                elif sql[j] == c and sql.startswith(c * 2, j):
+                    j += 2  # doubled quote inside the literal
+                elif sql[j] == c:
+                    break
+                else:
+                    j += 1
+            i, has_code = j + 1, True
+            continue
+        if c == "$" and (i == 0 or not _word_char(sql[i - 1])):
+            m = _DOLLAR_TAG.match(sql, i)
+            if m:
+                end = sql.find(m.group(0), m.end())
+                i, has_code = (n if end < 0 else end + len(m.group(0))), True
+                continue
+        if c == ";":
+            if has_code:
+                statements.append(sql[start:i].strip())
+            start, has_code = i + 1, False
+        elif not c.isspace():
+            has_code = True
+        i += 1
+    if has_code:
+        statements.append(sql[start:].strip())
+    return statements
+
+
+def returns_rows(stmt: str) -> bool:
+    """True for plain queries (first keyword select / with / values / table)."""
+    head = statement_label(stmt).split(None, 1)
+    return bool(head) and head[0].lower().rstrip("(") in ("select", "with", "values", "table")
+
+
+def statement_label(stmt: str, width: int = 80) -> str:
+    """First line of code in `stmt` (comments skipped), for reports."""
+    for line in stmt.splitlines():
+        line = line.strip()
+        if line and not line.startswith("--"):
+            return line[:width]
+    return stmt.strip()[:width]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Plan
+@dataclass(frozen=True)
+class SqlScript:
+    name: str
+    sql: str
+    depends: Tuple[str, ...] = ()
+
+
+def declared_depends(sql: str) -> Optional[Tuple[str, ...]]:
+    """Names from `-- depends:` lines in the leading comment block; None if there are none."""
+    found = []
+    for line in sql.lstrip("\ufeff").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith("--"):
+            break
+        m = _DEPENDS.match(line)
+        if m:
+            found.append(m.group(1))
+    if not found:
+        return None
+    names = [n.strip() for line in found for n in line.split(",")]
+    return tuple(n for n in names if n and n.lower() != "none")
+
+
+def plan_scripts(
+    named_sql: Sequence[Tuple[str, str]], serial_default: bool = True
+) -> List[SqlScript]:
+    in_run = {name for name, _ in named_sql}
+    scripts = []
+    for k, (name, sql) in enumerate(named_sql):
+        deps = declared_depends(sql)
+        if deps is None:
+            deps = (named_sql[k - 1][0],) if serial_default and k > 0 else ()
+        scripts.append(SqlScript(name, sql, tuple(d for d in deps if d in in_run)))
+    return scripts
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Run
+@dataclass
+class StatementResult:
+    index: int
+    label: str
+    seconds: float
+    rowcount: int
+
+
+@dataclass
+class ScriptResult:
+    name: str
+    status: str  # "ok" | "failed" | "skipped"
+    depends: List[str]
+    start_offset: float = 0.0  # seconds after the run started
+    seconds: float = 0.0
+    statements: List[StatementResult] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+# Called for statements that return rows; may consume them and return the row count.
+OnRows = Callable[[SqlScript, int, object], Optional[int]]
+
+
+# (conn, script, statement index) -> cursor used for row-returning statements.
+CursorFactory = Callable[[object, SqlScript, int], object]
+
+
+def run_script(
+    conn,
+    script: SqlScript,
+    on_rows: Optional[OnRows] = None,
+    cursor_factory: Optional[CursorFactory] = None,
+) -> ScriptResult:
+    """All statements of `script` in one transaction on `conn`."""
+    result = ScriptResult(script.name, "ok", list(script.depends))
+    started = time.perf_counter()
+    try:
+        for index, stmt in enumerate(split_statements(script.sql)):
+            t0 = time.perf_counter()
+            server_side = cursor_factory is not None and returns_rows(stmt)
+            cur = cursor_factory(conn, script, index) if server_side else conn.cursor()
+            with cur:
+                cur.execute(stmt)
+                rowcount = cur.rowcount
+                # Named cursors only know their description after the first fetch.
+                if on_rows is not None and (server_side or cur.description is not None):
+                    consumed = on_rows(script, index, cur)
+                    rowcount = rowcount if consumed is None else consumed
+            result.statements.append(StatementResult(
+                index, statement_label(stmt), round(time.perf_counter() - t0, 6), int(rowcount)
+            ))
+        conn.commit()
+    except Exception as exc:
+        conn.rollback()
+        result.status, result.error = "failed", str(exc).strip()
+    result.seconds = round(time.perf_counter() - started, 6)
+    return result
+
+
+def run_scripts(
+    scripts: Sequence[SqlScript],
+    connect: Callable[[], object],
+    workers: int = 1,
+    on_rows: Optional[OnRows] = None,
+    on_done: Optional[Callable[[ScriptResult], None]] = None,
+    cursor_factory: Optional[CursorFactory] = None,
+) -> dict:
+    """
+    Run `scripts` in dependency order, up to `workers` at a time. Connections come
+    from `connect()`, are reused between scripts and closed at the end; a script
+    whose dependency failed is skipped.
+    """
+    workers = max(1, workers)
+    idle: "queue.Queue" = queue.Queue()
+    opened: List[object] = []
+    lock = threading.Lock()
+    run_started, wall = datetime.now(timezone.utc), time.perf_counter()
+
+    def one(script: SqlScript) -> ScriptResult:
+        offset = time.perf_counter() - wall
+        try:
+            conn = idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = connect()
+            except Exception as exc:
+                return ScriptResult(
+                    script.name, "failed", list(script.depends), round(offset, 6),
+                    error=f"connect failed: {str(exc).strip()}",
+                )
+            with lock:
+                opened.append(conn)
+        try:
+            result = run_script(conn, script, on_rows, cursor_factory)
+        finally:
+            idle.put(conn)
+        result.start_offset = round(offset, 6)
+        return result
+
+    results: Dict[str, ScriptResult] = {}
+    pending = list(scripts)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while pending or running:
+                for script in list(pending):
+                    states = [results[d].status if d in results else None for d in script.depends]
+                    if None in states:
+                        continue
+                    pending.remove(script)
+                    if any(s != "ok" for s in states):
+                        failed = [d for d, s in zip(script.depends, states) if s != "ok"]
+                        results[script.name] = ScriptResult(
+                            script.name, "skipped", list(script.depends),
+                            error="dependency not ok: " + ", ".join(failed),
+                        )
+                        if on_done:
+                            on_done(results[script.name])
+                    else:
+                        running[pool.submit(one, script)] = script
+                if not running:
+                    for script in pending:  # unresolvable: dependency cycle
+                        results[script.name] = ScriptResult(
+                            script.name, "skipped", list(script.depends), error="dependency cycle"
+                        )
+                        if on_done:
+                            on_done(results[script.name])
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    script = running.pop(fut)
+                    results[script.name] = fut.result()
+                    if on_done:
+                        on_done(results[script.name])
+    finally:
+        for conn in opened:
+            conn.close()
+
+    ordered = [results[s.name] for s in scripts]
+    return {
+        "started_at": run_started.replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+        "seconds": round(time.perf_counter() - wall, 6),
+        "workers": workers,
+        "ok": all(r.status == "ok" for r in ordered),
+        "scripts": [asdict(r) for r in ordered],
+    }
+
+
+def write_report(report: dict, path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def format_result(result: ScriptResult) -> str:
+    """SUCCESS/FAILED/SKIPPED line plus one indented line per statement."""
+    head = {"ok": "SUCCESS", "failed": "FAILED", "skipped": "SKIPPED"}[result.status]
+    lines = [f"{head}: {result.name} ({result.seconds:.2f}s)"
+             + (f" -> {result.error}" if result.error else "")]
+    for s in result.statements:
+        rows = "" if s.rowcount < 0 else f"{s.rowcount:>8} rows"
+        lines.append(f"    [{s.index:>2}] {s.seconds:>8.3f}s {rows:>13}  {s.label}")
+    return "\n".join(lines)